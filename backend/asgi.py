@@ -12,5 +12,11 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+# Serve the hot read endpoints from workouts/async_views.py under ASGI
+os.environ.setdefault('ASYNC_API_VIEWS', '1')
 
 application = get_asgi_application()
+
+# Load the exercise catalog before the first request needs it
+from workouts.catalog import warm_catalog  # noqa: E402
+warm_catalog()
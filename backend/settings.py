@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack
+    'workouts.middleware.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -73,16 +76,85 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'backend.wsgi.application'
 
+# Serve the read-heavy GET endpoints from the async views in
+# workouts/async_views.py. Only worth enabling under an ASGI server.
+ASYNC_API_VIEWS = os.environ.get('ASYNC_API_VIEWS') == '1'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# DATABASE_PROFILE=production keeps connections open between requests
+# (DB_CONN_MAX_AGE seconds, health-checked before reuse) and, for SQLite, turns
+# on WAL so reads don't wait for the writer. DB_ENGINE picks another backend
+# (e.g. postgresql, with DB_NAME/DB_USER/DB_PASSWORD/DB_HOST/DB_PORT).
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'development')
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite3')
+
+# Applied to every new SQLite connection in the production profile
+SQLITE_PRAGMAS = ';'.join([
+    'PRAGMA journal_mode=WAL',
+    # Durable at checkpoints; with WAL a crash can lose only the last commits, never corrupt
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-64000',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA journal_size_limit=67108864',
+])
+
+
+def database_settings(location):
+    """Settings for one database; ``location`` is the file for SQLite and the host otherwise"""
+    if DB_ENGINE == 'sqlite3':
+        config = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': location}
+        if DATABASE_PROFILE == 'production':
+            config['OPTIONS'] = {
+                'init_command': SQLITE_PRAGMAS,
+                # Take the write lock when a transaction starts rather than on its
+                # first write, so concurrent writers queue instead of failing
+                'transaction_mode': 'IMMEDIATE',
+                # Seconds a writer waits for the lock before "database is locked"
+                'timeout': 20,
+            }
+    else:
+        config = {
+            'ENGINE': f'django.db.backends.{DB_ENGINE}',
+            'NAME': os.environ.get('DB_NAME', 'hackoasis'),
+            'USER': os.environ.get('DB_USER', ''),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': location,
+            'PORT': os.environ.get('DB_PORT', ''),
+        }
+    if DATABASE_PROFILE == 'production':
+        config['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', '60'))
+        config['CONN_HEALTH_CHECKS'] = True
+    return config
+
+
+if DB_ENGINE == 'sqlite3':
+    DATABASES = {'default': database_settings(os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'))}
+else:
+    DATABASES = {'default': database_settings(os.environ.get('DB_HOST', ''))}
+
+# Read replicas: comma-separated SQLite files or hosts. GET requests read from
+# them and everything else uses 'default'; see workouts/routers.py. For a local
+# demo, point DB_REPLICAS at a second SQLite file and refresh it with
+# `manage.py copy_sqlite_replica`.
+DB_REPLICAS = [location for location in os.environ.get('DB_REPLICAS', '').split(',') if location]
+for index, location in enumerate(DB_REPLICAS, start=1):
+    # Tests run against 'default' only
+    DATABASES[f'replica{index}'] = {**database_settings(location), 'TEST': {'MIRROR': 'default'}}
+
+# A user who just wrote reads from 'default' for this long, so they see their
+# own changes despite replication lag. The pins live in this cache, which
+# should be shared by every process; the default local-memory cache only
+# covers writes served by the same process.
+REPLICA_PIN_SECONDS = 5
+REPLICA_PIN_CACHE_ALIAS = 'default'
+
+if DB_REPLICAS:
+    DATABASE_ROUTERS = ['workouts.routers.ReadReplicaRouter']
+    MIDDLEWARE.insert(1, 'workouts.middleware.ReadReplicaMiddleware')
 
 
 # Password validation
@@ -104,6 +176,36 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing. The first hasher hashes new passwords and costs one full
+# run per login attempt; the others still verify older hashes, which are
+# re-hashed with the first on the next successful login. Override with a
+# comma-separated PASSWORD_HASHERS, e.g. to put Argon2PasswordHasher first
+# (needs argon2-cffi) or raise the cost. benchmarks/bench_login.py compares them.
+PASSWORD_HASHERS = os.environ.get('PASSWORD_HASHERS', ','.join([
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+])).split(',')
+
+# The header (as a request.META key, e.g. 'HTTP_X_FORWARDED_FOR') reverse
+# proxies put the client address in, and how many proxies append to it; see
+# workouts/clients.py. Leave unset unless every request comes through them.
+CLIENT_ADDRESS_HEADER = os.environ.get('CLIENT_ADDRESS_HEADER') or None
+TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', '1'))
+
+# Failed logins allowed per email from one client address, and per client
+# address, within WINDOW seconds before login_view answers 429 without
+# hashing; see workouts/login.py
+LOGIN_THROTTLE = {
+    'MAX_FAILURES': 5,
+    'MAX_FAILURES_PER_ADDRESS': 50,
+    'WINDOW': 300,
+    'MAX_SIZE': 100000,
+}
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -129,13 +231,73 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'workouts.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson-backed JSON when installed, stdlib json otherwise
+    'DEFAULT_RENDERER_CLASSES': [
+        'workouts.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'workouts.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Token -> (user, profile) cache used by CachedTokenAuthentication. Without
+# CACHE_ALIAS each worker process keeps its own copies for TTL seconds, so a
+# logout or password change made on one worker reaches the others only after
+# that long. Set CACHE_ALIAS to a shared Django cache (e.g. Redis) to keep the
+# entries there instead, for SHARED_TTL seconds; invalidations then apply to
+# every worker at once, at the cost of one cache read per request.
+AUTH_TOKEN_CACHE = {
+    'MAX_SIZE': 10000,
+    'TTL': 5,
+    'CACHE_ALIAS': None,
+    'SHARED_TTL': 300,
+}
+
+# In-memory exercise catalog (workouts/catalog.py). Each process checks for
+# changes made elsewhere every TTL seconds: with CACHE_ALIAS naming a cache
+# shared by all processes that is one cache read, otherwise a reload.
+EXERCISE_CATALOG = {
+    'TTL': 30,
+    'CACHE_ALIAS': None,
+}
+
+# Background jobs (plan generation/regeneration). ThreadPoolBackend runs them
+# in-process; DatabaseBackend leaves them for `manage.py run_jobs` workers.
+JOB_BACKEND = os.environ.get('JOB_BACKEND', 'workouts.jobs.ThreadPoolBackend')
+JOB_WORKERS = 4
+# Seconds a job may stay running before run_jobs assumes its worker died and
+# requeues it; keep it well above the slowest job
+JOB_TIMEOUT = 600
+
+# /api/sync/ tombstones older than this are removed by `manage.py prune_tombstones`;
+# clients whose cursor predates the pruning get a full snapshot.
+SYNC_TOMBSTONE_DAYS = 90
+
+# Per-route timing and SQL metrics, served at /metrics in Prometheus format.
+# PROFILE_SAMPLE_RATE > 0 runs that share of sync requests under cProfile and
+# dumps the slow ones (over PROFILE_SLOW_MS) into PROFILE_DIR.
+REQUEST_METRICS = {
+    'ENABLED': True,
+    'PROFILE_SAMPLE_RATE': float(os.environ.get('PROFILE_SAMPLE_RATE', '0')),
+    'PROFILE_SLOW_MS': 500,
+    'PROFILE_DIR': 'profiles',
+    'TOKEN': os.environ.get('METRICS_TOKEN'),
+    # Scrapers allowed without a token, e.g. ['10.0.0.5']; DEBUG allows everyone
+    'ALLOWED_ADDRESSES': [],
+}
+
+# What to do when a request runs more queries or takes longer than its
+# budget in workouts/budgets.py: 'off', 'log' or 'raise'
+QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE', 'log' if DEBUG else 'off')
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
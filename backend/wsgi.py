@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# Load the exercise catalog before the first request needs it
+from workouts.catalog import warm_catalog  # noqa: E402
+warm_catalog()
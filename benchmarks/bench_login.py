@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark login throughput per password hasher, with and without the throttle
+
+For each hasher, seeds users whose passwords use it and times successful
+logins through login_view. It then replays a credential-stuffing burst of
+wrong passwords against a few emails, first with LOGIN_THROTTLE effectively
+off and then with the configured limits. Throttled attempts are refused
+before any query or hashing, so the burst costs a fraction of the CPU time.
+
+Usage: python -m benchmarks.bench_login [--hashers pbkdf2_sha256,scrypt] [--logins N] [--attempts N]
+"""
+
+import argparse
+import time
+
+from benchmarks.common import PASSWORD, setup_django, test_database
+
+HASHERS = {
+    'pbkdf2_sha256': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'pbkdf2_sha1': 'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'bcrypt_sha256': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+}
+
+
+def seed(prefix, count):
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from rest_framework.authtoken.models import Token
+    from workouts.models import UserProfile
+
+    password = make_password(PASSWORD)
+    users = User.objects.bulk_create([
+        User(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', password=password) for i in range(count)
+    ])
+    UserProfile.objects.bulk_create([UserProfile(user=user, name=user.username) for user in users])
+    Token.objects.bulk_create([Token(user=user, key=Token.generate_key()) for user in users])
+    return [user.email for user in users]
+
+
+def run(client, emails, password, count, address):
+    """Post ``count`` logins cycling through ``emails``; returns (wall s, CPU s, status counts)"""
+    statuses = {}
+    wall, cpu = time.perf_counter(), time.process_time()
+    for i in range(count):
+        response = client.post('/api/auth/login/', {'email': emails[i % len(emails)], 'password': password},
+                               content_type='application/json', REMOTE_ADDR=address)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    return time.perf_counter() - wall, time.process_time() - cpu, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--hashers', default='pbkdf2_sha256,scrypt',
+                        help=f'comma-separated, from {", ".join(HASHERS)}')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--logins', type=int, default=20)
+    parser.add_argument('--attempts', type=int, default=100, help='wrong-password attempts per stuffing run')
+    args = parser.parse_args()
+
+    setup_django()
+    import logging
+    from django.contrib.auth.hashers import get_hasher
+    from django.test import Client, override_settings
+    from workouts.login import login_throttle, login_throttle_settings
+
+    # 401/429 responses are the point of the stuffing runs
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+    limits = login_throttle_settings()
+    unthrottled = {'MAX_FAILURES': args.attempts + 1, 'MAX_FAILURES_PER_ADDRESS': args.attempts + 1}
+    client = Client()
+
+    print(f'{"hasher":<16}{"login ms":>10}{"logins/s":>10}{"stuffing":>12}{"attempts/s":>12}{"CPU s":>8}  statuses')
+    with test_database():
+        for name in args.hashers.split(','):
+            name = name.strip()
+            with override_settings(PASSWORD_HASHERS=[HASHERS[name]]):
+                hasher = get_hasher()
+                try:
+                    # Argon2 and bcrypt need argon2-cffi / bcrypt installed
+                    if hasher.library:
+                        hasher._load_library()
+                except ValueError as exc:
+                    print(f'{name:<16}skipped: {exc}')
+                    continue
+                emails = seed(f'login-{name}-', args.users)
+                login_throttle.clear()
+                wall, _, statuses = run(client, emails, PASSWORD, args.logins, '10.0.0.1')
+                assert statuses == {200: args.logins}, statuses
+                login_ms = wall / args.logins * 1000
+                for label, options in (('unthrottled', unthrottled), ('throttled', limits)):
+                    login_throttle.clear()
+                    with override_settings(LOGIN_THROTTLE=options):
+                        wall, cpu, statuses = run(client, emails[:3], 'wrong-password', args.attempts, '10.0.0.2')
+                    print(f'{name:<16}{login_ms:>10.1f}{1000 / login_ms:>10.1f}{label:>12}'
+                          f'{args.attempts / wall:>12.0f}{cpu:>8.2f}  {statuses}')
+    login_throttle.clear()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Compare query plans and timings for the session/plan access paths
+
+"before" runs the old query shapes (joining through user_profile__user) with
+the composite indexes dropped; "after" filters on user_profile_id with the
+indexes from workouts/migrations/0002_access_path_indexes.py in place.
+
+Usage: python -m benchmarks.bench_query_plans [--users N] [--weeks N]
+"""
+
+import argparse
+import datetime
+
+from benchmarks.common import seed_users, setup_django, test_database, timeit
+
+
+def access_paths(profile, old_shape):
+    """The querysets the viewsets issue, in either the old or the new shape"""
+    from workouts.models import WorkoutPlan, WorkoutSession
+
+    if old_shape:
+        sessions = WorkoutSession.objects.filter(user_profile__user=profile.user)
+        plans = WorkoutPlan.objects.filter(user_profile__user=profile.user)
+    else:
+        sessions = WorkoutSession.objects.filter(user_profile_id=profile.id)
+        plans = WorkoutPlan.objects.filter(user_profile_id=profile.id)
+    plan = plans.first()
+    today = datetime.date.today()
+    week_end = today + datetime.timedelta(days=6)
+    return {
+        'session list': sessions.order_by('date', 'id')[:50],
+        'visible week': sessions.filter(date__gte=today, date__lte=week_end).order_by('date', 'id'),
+        'planned this week': sessions.filter(status='planned', date__gte=today, date__lte=week_end).order_by('date', 'id'),
+        'plan list': plans,
+        'plan sessions': WorkoutSession.objects.filter(plan=plan).order_by('date', 'id'),
+    }
+
+
+def set_indexes(enabled):
+    from django.db import connection
+    from workouts.models import WorkoutPlan, WorkoutSession
+
+    with connection.schema_editor() as editor:
+        for model in (WorkoutPlan, WorkoutSession):
+            for index in model._meta.indexes:
+                if enabled:
+                    editor.add_index(model, index)
+                else:
+                    editor.remove_index(model, index)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def report(label, profile, old_shape):
+    print(f'== {label} ==')
+    for name, queryset in access_paths(profile, old_shape).items():
+        elapsed = timeit(lambda: list(queryset.all()), repeat=5, number=20) / 20
+        print(f'-- {name}: {elapsed * 1000:.3f} ms/query')
+        for line in queryset.explain().splitlines():
+            print(f'   {line}')
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--weeks', type=int, default=12)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        profiles = seed_users(args.users, weeks=args.weeks)
+        profile = profiles[len(profiles) // 2]
+
+        set_indexes(False)
+        report('before', profile, old_shape=True)
+        set_indexes(True)
+        report('after', profile, old_shape=False)
+
+
+if __name__ == '__main__':
+    main()
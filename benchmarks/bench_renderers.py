@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark DRF's JSONRenderer against FastJSONRenderer on plan payloads
+
+Renders the serialized plan list of one user (plans with nested sessions and
+their exercises JSON), checks both renderers produce identical bytes (the
+payloads hold no floats whose formatting differs; see FastJSONRenderer) and
+prints the best time per render for each.
+
+Usage: python -m benchmarks.bench_renderers [--plans N] [--weeks N]
+"""
+
+import argparse
+import datetime
+import decimal
+
+from benchmarks.common import seed_users, setup_django, test_database, timeit
+
+
+def build_payload(plans, weeks):
+    from workouts.models import WorkoutPlan
+    from workouts.serializers import WorkoutPlanSerializer
+    from workouts.services import generate_workout_plan
+
+    profile = seed_users(1, weeks=weeks)[0]
+    for _ in range(plans - 1):
+        generate_workout_plan(profile, weeks=weeks)
+    for session in profile.sessions.all():
+        session.exercises = [
+            {'name': name, 'sets': 4, 'reps': 8, 'weight': 62.5, 'notes': 'tempo 3-1-1 — rest 90s'}
+            for name in ('Squat', 'Bench Press', 'Deadlift', 'Overhead Press', 'Row')
+        ]
+        session.save(update_fields=['exercises'])
+    queryset = WorkoutPlan.objects.filter(user_profile=profile).prefetch_related('sessions')
+    return WorkoutPlanSerializer(queryset, many=True).data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--plans', type=int, default=10)
+    parser.add_argument('--weeks', type=int, default=12)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from workouts.renderers import FastJSONRenderer, orjson
+
+    with test_database():
+        payload = build_payload(args.plans, args.weeks)
+
+    # Types that reach JSONEncoder.default rather than being pre-serialized
+    extra = {
+        'now': datetime.datetime.now(datetime.timezone.utc),
+        'today': datetime.date.today(),
+        'volume': decimal.Decimal('1234.50'),
+    }
+    for name, data in (('plans', payload), ('native types', extra)):
+        baseline = JSONRenderer().render(data)
+        fast = FastJSONRenderer().render(data)
+        assert baseline == fast, f'{name}: renderers disagree'
+
+    rendered = JSONRenderer().render(payload)
+    print(f'orjson: {orjson.__version__ if orjson else "not installed (stdlib fallback)"}')
+    print(f'payload: {len(rendered)} bytes')
+    for renderer in (JSONRenderer(), FastJSONRenderer()):
+        elapsed = timeit(lambda: renderer.render(payload), repeat=5, number=20) / 20
+        print(f'{type(renderer).__name__:>18}: {elapsed * 1000:.3f} ms/render')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Shared helpers for the benchmark scripts
+
+Each script is run from the project root, e.g.
+    python -m benchmarks.bench_query_plans
+and works against a throwaway test database, never db.sqlite3.
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+project_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_dir))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+
+def setup_django():
+    """Configure Django for a standalone script"""
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database(verbosity=0):
+    """Create the test databases, run the migrations and drop them on exit"""
+    from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=verbosity, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=verbosity)
+        teardown_test_environment()
+
+
+PASSWORD = 'benchmark-password'
+
+
+def seed_users(count, weeks=12, availability=None, prefix='bench', fatigue_days=0):
+    """Create users with profiles, one generated plan and ``fatigue_days`` of fatigue entries each
+
+    Every user's password is PASSWORD. Returns the profiles.
+    """
+    import datetime
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from workouts.availability import sync_availability_slots
+    from workouts.models import FatigueEntry, UserProfile
+    from workouts.services import generate_workout_plan
+
+    if availability is None:
+        availability = {day: ['18:00-19:00'] for day in ('Monday', 'Tuesday', 'Thursday', 'Friday', 'Saturday')}
+    # Hash once: every seeded user shares the same password
+    password = make_password(PASSWORD)
+    users = User.objects.bulk_create([
+        User(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', password=password)
+        for i in range(count)
+    ])
+    profiles = UserProfile.objects.bulk_create([
+        UserProfile(user=user, name=user.username, availability=availability)
+        for user in users
+    ])
+    sync_availability_slots(profiles)
+    start_date = datetime.date.today() - datetime.timedelta(weeks=weeks // 2)
+    for profile in profiles:
+        generate_workout_plan(profile, weeks=weeks, start_date=start_date)
+    today = datetime.date.today()
+    FatigueEntry.objects.bulk_create([
+        FatigueEntry(user_profile=profile, date=today - datetime.timedelta(days=days), level=1 + (profile.id + days) % 10)
+        for profile in profiles
+        for days in range(fatigue_days)
+    ], batch_size=1000)
+    return profiles
+
+
+def timeit(func, repeat=5, number=1):
+    """Return the best wall time in seconds of ``number`` calls over ``repeat`` runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
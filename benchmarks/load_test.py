@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Replay a mixed API workload and report latency percentiles and queries per request
+
+By default seeds a throwaway test database with users, plans, sessions and
+fatigue history and replays a weighted, seeded-random mix of login, token
+verify, profile read/update, plan list, session list and session status
+updates through the Django test client, counting the SQL queries of every
+request. With --url the same mix is sent over keep-alive HTTP to a running
+server (runserver, uvicorn or mock_backend.py) from --concurrency threads;
+users are registered there first and query counts are not available.
+
+--output writes the results as JSON. --compare exits non-zero when a p95 is
+more than --tolerance slower than the baseline (and at least --min-ms) or an
+operation runs more queries per request than it did, so CI can diff runs
+against a checked-in baseline.
+
+Usage: python -m benchmarks.load_test [--users N] [--requests N] [--output FILE] [--compare FILE]
+       python -m benchmarks.load_test --url http://127.0.0.1:8000 [--concurrency N]
+"""
+
+import argparse
+import datetime
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from benchmarks.common import PASSWORD, seed_users, setup_django, test_database
+
+# Relative frequency of each operation; login is rare because hashing dominates it
+WEIGHTS = {
+    'login': 1,
+    'verify': 15,
+    'profile_get': 20,
+    'profile_patch': 5,
+    'plan_list': 15,
+    'session_list': 30,
+    'session_update': 14,
+}
+
+STATUSES = ('completed', 'missed', 'planned', 'rescheduled')
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+
+class LoadUser:
+    """Client-side state of one simulated user"""
+
+    def __init__(self, email, token=None, profile_id=None, session_ids=()):
+        self.email = email
+        self.token = token
+        self.profile_id = profile_id
+        self.session_ids = list(session_ids)
+
+
+class InProcessTarget:
+    """Send requests through the Django test client and count their queries"""
+
+    def __init__(self):
+        from django.db import connection
+        from django.test import Client
+        from django.test.utils import CaptureQueriesContext
+
+        self.client = Client(raise_request_exception=False)
+        self.capture = lambda: CaptureQueriesContext(connection)
+
+    def request(self, method, path, token=None, body=None):
+        headers = {'HTTP_AUTHORIZATION': f'Token {token}'} if token else {}
+        data = json.dumps(body) if body is not None else None
+        with self.capture() as queries:
+            if data is None:
+                response = self.client.generic(method, path, **headers)
+            else:
+                response = self.client.generic(method, path, data, content_type='application/json', **headers)
+        payload = response.json() if response.get('Content-Type', '').startswith('application/json') else None
+        return response.status_code, payload, len(queries)
+
+
+class HttpTarget:
+    """Send requests to a live server over one keep-alive connection per thread"""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.local = threading.local()
+
+    def connection(self):
+        if getattr(self.local, 'connection', None) is None:
+            self.local.connection = self.connection_class(self.netloc, timeout=30)
+        return self.local.connection
+
+    def request(self, method, path, token=None, body=None):
+        headers = {'Accept': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Token {token}'
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(2):
+            connection = self.connection()
+            try:
+                connection.request(method, self.prefix + path, body=data, headers=headers)
+                response = connection.getresponse()
+                raw = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # The server closed the idle connection; reconnect once
+                connection.close()
+                self.local.connection = None
+                if attempt:
+                    raise
+        if response.will_close:
+            connection.close()
+            self.local.connection = None
+        is_json = (response.getheader('Content-Type') or '').startswith('application/json')
+        return response.status, json.loads(raw) if is_json and raw else None, None
+
+
+def session_ids_from(payload):
+    if isinstance(payload, dict):
+        payload = payload.get('results', [])
+    return [session['id'] for session in payload or []]
+
+
+def random_availability(rng):
+    days = rng.sample(WEEKDAYS, rng.randint(2, 5))
+    hour = rng.randint(6, 19)
+    return {day: [f'{hour:02d}:00-{hour + 1:02d}:30'] for day in days}
+
+
+def run_operation(target, user, operation, rng):
+    """Run one operation as ``user``; returns (status, queries)"""
+    if operation == 'login':
+        status, payload, queries = target.request('POST', '/api/auth/login/', body={'email': user.email, 'password': PASSWORD})
+        if status == 200:
+            user.token = payload['token']
+        return status, queries
+    if operation == 'verify':
+        return target.request('GET', '/api/auth/verify/', user.token)[::2]
+    if operation == 'profile_get':
+        return target.request('GET', '/api/user-profile/', user.token)[::2]
+    if operation == 'profile_patch':
+        body = {'availability': random_availability(rng), 'equipment': rng.choice(([], ['dumbbells'], ['barbell', 'bench']))}
+        return target.request('PATCH', f'/api/user-profile/{user.profile_id}/', user.token, body)[::2]
+    if operation == 'plan_list':
+        return target.request('GET', '/api/workout-plans/', user.token)[::2]
+    if operation == 'session_list':
+        date_from = (datetime.date.today() - datetime.timedelta(days=14)).isoformat()
+        status, payload, queries = target.request('GET', f'/api/workout-sessions/?date_from={date_from}', user.token)
+        if status == 200 and not user.session_ids:
+            user.session_ids = session_ids_from(payload)
+        return status, queries
+    if operation == 'session_update':
+        if not user.session_ids:
+            return run_operation(target, user, 'session_list', rng)
+        session_id = rng.choice(user.session_ids)
+        body = {'status': rng.choice(STATUSES)}
+        return target.request('POST', f'/api/workout-sessions/{session_id}/update_status/', user.token, body)[::2]
+    raise ValueError(f'Unknown operation {operation}')
+
+
+def build_workload(rng, count, users):
+    operations = rng.choices(list(WEIGHTS), weights=list(WEIGHTS.values()), k=count)
+    return [(operation, rng.randrange(users)) for operation in operations]
+
+
+def seed_in_process(args):
+    from rest_framework.authtoken.models import Token
+    from workouts.models import WorkoutSession
+
+    profiles = seed_users(args.users, weeks=args.weeks, prefix='load', fatigue_days=args.fatigue_days)
+    tokens = Token.objects.bulk_create([Token(user=profile.user, key=Token.generate_key()) for profile in profiles])
+    sessions = {}
+    for profile_id, session_id in WorkoutSession.objects.values_list('user_profile_id', 'id'):
+        sessions.setdefault(profile_id, []).append(session_id)
+    return [
+        LoadUser(profile.user.email, token.key, profile.id, sessions.get(profile.id, ()))
+        for profile, token in zip(profiles, tokens)
+    ]
+
+
+def seed_http(target, args):
+    """Register (or log in) the load users on the server and look up their profiles"""
+    users = []
+    for i in range(args.users):
+        email = f'load{i}@example.com'
+        body = {'email': email, 'username': f'load{i}', 'password': PASSWORD, 'name': f'load{i}'}
+        status, payload, _ = target.request('POST', '/api/auth/register/', body=body)
+        if status not in (200, 201):
+            status, payload, _ = target.request('POST', '/api/auth/login/', body={'email': email, 'password': PASSWORD})
+        if status != 200 and status != 201:
+            raise SystemExit(f'Could not register or log in {email}: {status} {payload}')
+        user = LoadUser(email, payload['token'])
+        status, profile, _ = target.request('GET', '/api/user-profile/', user.token)
+        user.profile_id = profile['id']
+        target.request('PATCH', f'/api/user-profile/{user.profile_id}/', user.token,
+                       {'availability': random_availability(random.Random(i))})
+        target.request('POST', '/api/workout-plans/', user.token, {'weeks': args.weeks})
+        users.append(user)
+    return users
+
+
+def replay(target, users, workload, seed, concurrency):
+    """Run the workload; returns (samples, elapsed) with samples as (operation, status, seconds, queries)"""
+    def run(chunk, rng):
+        results = []
+        for operation, index in chunk:
+            started = time.perf_counter()
+            status, queries = run_operation(target, users[index], operation, rng)
+            results.append((operation, status, time.perf_counter() - started, queries))
+        return results
+
+    started = time.perf_counter()
+    if concurrency <= 1:
+        samples = run(workload, random.Random(seed))
+    else:
+        chunks = [workload[i::concurrency] for i in range(concurrency)]
+        with ThreadPoolExecutor(concurrency) as pool:
+            parts = pool.map(run, chunks, [random.Random(seed + i) for i in range(concurrency)])
+            samples = [sample for part in parts for sample in part]
+    return samples, time.perf_counter() - started
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted ``values``"""
+    index = max(0, min(len(values) - 1, int(round(fraction * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+def summarize(samples, elapsed):
+    operations = {}
+    for operation in WEIGHTS:
+        rows = [sample for sample in samples if sample[0] == operation]
+        if not rows:
+            continue
+        times = sorted(seconds * 1000 for _, _, seconds, _ in rows)
+        queries = [count for _, _, _, count in rows if count is not None]
+        operations[operation] = {
+            'count': len(rows),
+            'errors': sum(1 for _, status, _, _ in rows if status >= 400),
+            'p50_ms': round(percentile(times, 0.50), 3),
+            'p95_ms': round(percentile(times, 0.95), 3),
+            'p99_ms': round(percentile(times, 0.99), 3),
+            'max_ms': round(times[-1], 3),
+            'queries_mean': round(sum(queries) / len(queries), 2) if queries else None,
+            'queries_max': max(queries) if queries else None,
+        }
+    return {
+        'requests': len(samples),
+        'errors': sum(stats['errors'] for stats in operations.values()),
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(samples) / elapsed, 1) if elapsed else None,
+        'operations': operations,
+    }
+
+
+def print_report(summary):
+    header = f'{"operation":<16}{"count":>7}{"errors":>8}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"queries":>9}'
+    print(header)
+    print('-' * len(header))
+    for operation, stats in summary['operations'].items():
+        queries = '-' if stats['queries_mean'] is None else f'{stats["queries_mean"]:g}'
+        print(f'{operation:<16}{stats["count"]:>7}{stats["errors"]:>8}{stats["p50_ms"]:>10.2f}'
+              f'{stats["p95_ms"]:>10.2f}{stats["p99_ms"]:>10.2f}{queries:>9}')
+    print(f'\n{summary["requests"]} requests in {summary["seconds"]:.2f}s '
+          f'({summary["requests_per_second"]} req/s), {summary["errors"]} errors')
+
+
+def compare(summary, baseline, tolerance, min_ms):
+    """Describe every operation that regressed against ``baseline``"""
+    regressions = []
+    for operation, before in baseline['operations'].items():
+        after = summary['operations'].get(operation)
+        if after is None:
+            continue
+        limit = max(before['p95_ms'] * (1 + tolerance), before['p95_ms'] + min_ms)
+        if after['p95_ms'] > limit:
+            regressions.append(f'{operation}: p95 {after["p95_ms"]:.2f} ms > {limit:.2f} ms '
+                               f'(baseline {before["p95_ms"]:.2f} ms)')
+        if None not in (before['queries_max'], after['queries_max']) and after['queries_max'] > before['queries_max']:
+            regressions.append(f'{operation}: up to {after["queries_max"]} queries per request '
+                               f'(baseline {before["queries_max"]})')
+        if after['errors'] > before['errors']:
+            regressions.append(f'{operation}: {after["errors"]} errors (baseline {before["errors"]})')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--weeks', type=int, default=12)
+    parser.add_argument('--fatigue-days', type=int, default=90)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--url', help='replay against a running server instead of in-process')
+    parser.add_argument('--concurrency', type=int, default=1, help='client threads (--url only)')
+    parser.add_argument('--output', help='write the results as JSON')
+    parser.add_argument('--compare', help='baseline JSON to check the results against')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed relative p95 slowdown')
+    parser.add_argument('--min-ms', type=float, default=2.0, help='ignore p95 slowdowns smaller than this')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    workload = build_workload(rng, args.requests, args.users)
+    config = {key: getattr(args, key) for key in ('users', 'weeks', 'fatigue_days', 'requests', 'seed')}
+    if args.url:
+        if args.concurrency > args.users:
+            parser.error('--concurrency cannot exceed --users')
+        target = HttpTarget(args.url)
+        users = seed_http(target, args)
+        samples, elapsed = replay(target, users, workload, args.seed, args.concurrency)
+        config.update(url=args.url, concurrency=args.concurrency)
+    else:
+        # The test database is a single in-memory SQLite connection
+        if args.concurrency != 1:
+            parser.error('--concurrency needs --url')
+        setup_django()
+        with test_database():
+            users = seed_in_process(args)
+            samples, elapsed = replay(InProcessTarget(), users, workload, args.seed, 1)
+
+    summary = summarize(samples, elapsed)
+    print_report(summary)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'config': config, **summary}, f, indent=2)
+            f.write('\n')
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('config') != config:
+            print(f'\nwarning: baseline was recorded with {baseline.get("config")}', file=sys.stderr)
+        regressions = compare(summary, baseline, args.tolerance, args.min_ms)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f'\nNo regressions against {args.compare}')
+
+
+if __name__ == '__main__':
+    main()
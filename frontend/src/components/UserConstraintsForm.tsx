@@ -87,7 +87,7 @@ const UserConstraintsForm: React.FC<UserConstraintsFormProps> = ({
     resolver: yupResolver(schema),
     defaultValues: {
       name: userProfile?.name || '',
-      fatigueLevel: userProfile?.fatigue_log?.[userProfile.fatigue_log.length - 1]?.level || 5,
+      fatigueLevel: userProfile?.fatigue?.latest_level || 5,
     },
   });
 
@@ -35,7 +35,7 @@ import {
   Add,
   Refresh,
 } from '@mui/icons-material';
-import { useMutation, useQueryClient } from 'react-query';
+import { useMutation, useQuery, useQueryClient } from 'react-query';
 import { workoutApi } from '../services/api';
 import { DatePicker } from '@mui/x-date-pickers/DatePicker';
 import { LocalizationProvider } from '@mui/x-date-pickers/LocalizationProvider';
@@ -60,12 +60,23 @@ const WorkoutPlansDisplay: React.FC<WorkoutPlansDisplayProps> = ({
   const [sessionNotes, setSessionNotes] = useState('');
   const queryClient = useQueryClient();
 
+  // Per-week counts are kept by the server, so the summary needn't walk every session
+  const { data: weeklyStats } = useQuery(
+    'weeklyStats',
+    () => workoutApi.getWeeklyStats({
+      date_from: dayjs().subtract(3, 'week').format('YYYY-MM-DD'),
+      date_to: dayjs().format('YYYY-MM-DD'),
+    }),
+    { retry: 1 }
+  );
+
   const updateSessionMutation = useMutation(
     ({ sessionId, status, notes }: { sessionId: number; status: string; notes?: string }) =>
       workoutApi.updateWorkoutSession(sessionId, status),
     {
       onSuccess: () => {
         queryClient.invalidateQueries('workoutPlans');
+        queryClient.invalidateQueries('weeklyStats');
         toast.success('Session updated successfully!');
         setSessionDialogOpen(false);
       },
@@ -76,10 +87,12 @@ const WorkoutPlansDisplay: React.FC<WorkoutPlansDisplayProps> = ({
   );
 
   const regeneratePlanMutation = useMutation(
-    (planId: number) => workoutApi.createWorkoutPlan({ plan_id: planId }),
+    // The API answers 202 with a job; refresh the plans only once it has finished
+    async (planId: number) => workoutApi.waitForJob(await workoutApi.regenerateWorkoutPlan(planId)),
     {
       onSuccess: () => {
         queryClient.invalidateQueries('workoutPlans');
+        queryClient.invalidateQueries('weeklyStats');
         toast.success('Workout plan regenerated!');
       },
       onError: () => {
@@ -128,6 +141,61 @@ const WorkoutPlansDisplay: React.FC<WorkoutPlansDisplayProps> = ({
     }
   };
 
+  const formatRate = (completed: number, finished: number) =>
+    finished ? `${Math.round((completed / finished) * 100)}%` : '–';
+
+  const renderWeeklyStats = () => {
+    if (!weeklyStats || weeklyStats.length === 0) {
+      return null;
+    }
+    // Summaries are keyed by Monday; a week without sessions has no row
+    const monday = dayjs().subtract((dayjs().day() + 6) % 7, 'day').format('YYYY-MM-DD');
+    const thisWeek = weeklyStats.find((week: any) => week.week_start === monday) || {
+      week_start: monday, planned: 0, completed: 0, missed: 0, rescheduled: 0, volume: 0, completed_volume: 0,
+    };
+    const recent = weeklyStats.reduce(
+      (sum: any, week: any) => ({
+        completed: sum.completed + week.completed,
+        finished: sum.finished + week.completed + week.missed + week.rescheduled,
+      }),
+      { completed: 0, finished: 0 }
+    );
+    const figures = [
+      { label: 'Completed this week', value: thisWeek.completed },
+      { label: 'Missed this week', value: thisWeek.missed },
+      { label: 'Still planned', value: thisWeek.planned },
+      {
+        label: 'Completion rate',
+        value: formatRate(thisWeek.completed, thisWeek.completed + thisWeek.missed + thisWeek.rescheduled),
+      },
+      { label: 'Last 4 weeks', value: formatRate(recent.completed, recent.finished) },
+      { label: 'Volume done', value: `${thisWeek.completed_volume} / ${thisWeek.volume}` },
+    ];
+    return (
+      <Grid item xs={12}>
+        <Card elevation={3}>
+          <CardContent>
+            <Typography variant="h6" sx={{ mb: 2, color: 'primary.main' }}>
+              Week of {dayjs(thisWeek.week_start).format('MMMM DD')}
+            </Typography>
+            <Grid container spacing={2}>
+              {figures.map((figure) => (
+                <Grid item xs={6} md={2} key={figure.label}>
+                  <Typography variant="h5" sx={{ fontWeight: 'bold' }}>
+                    {figure.value}
+                  </Typography>
+                  <Typography variant="body2" color="text.secondary">
+                    {figure.label}
+                  </Typography>
+                </Grid>
+              ))}
+            </Grid>
+          </CardContent>
+        </Card>
+      </Grid>
+    );
+  };
+
   if (loading) {
     return (
       <Box sx={{ display: 'flex', justifyContent: 'center', p: 4 }}>
@@ -164,6 +232,7 @@ const WorkoutPlansDisplay: React.FC<WorkoutPlansDisplayProps> = ({
   return (
     <LocalizationProvider dateAdapter={AdapterDayjs}>
       <Grid container spacing={3}>
+        {renderWeeklyStats()}
         {workoutPlans.map((plan, index) => (
           <Grid item xs={12} key={plan.id}>
             <motion.div
@@ -80,7 +80,12 @@ const Dashboard: React.FC = () => {
     }
   );
 
-  const updateProfileMutation = useMutation(workoutApi.updateUserProfile, {
+  const updateProfileMutation = useMutation(async ({ fatigueLevel, ...profile }: any) => {
+    if (fatigueLevel !== undefined && fatigueLevel !== userProfile?.fatigue?.latest_level) {
+      await workoutApi.logFatigue(fatigueLevel);
+    }
+    return workoutApi.updateUserProfile(profile);
+  }, {
     onSuccess: () => {
       queryClient.invalidateQueries('userProfile');
       toast.success('Profile updated successfully!');
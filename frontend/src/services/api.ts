@@ -83,6 +83,28 @@ export const workoutApi = {
     return response.data;
   },
 
+  // Fatigue is an append-only series; the profile only carries its rolling summary
+  logFatigue: async (level: number, date?: string): Promise<any> => {
+    const response = await api.post('/fatigue/', { level, date });
+    return response.data;
+  },
+
+  getFatigueEntries: async (params?: {
+    date_from?: string;
+    date_to?: string;
+    cursor?: string;
+  }): Promise<{ next: string | null; previous: string | null; results: any[] }> => {
+    const response = await api.get('/fatigue/', { params });
+    return response.data;
+  },
+
+  getExercises: async (params?: { category?: string; search?: string; available?: boolean }): Promise<any[]> => {
+    const response = await api.get('/exercises/', {
+      params: { ...params, available: params?.available ? '1' : undefined },
+    });
+    return response.data;
+  },
+
   getWorkoutPlans: async (): Promise<any[]> => {
     const response = await api.get('/workout-plans/');
     return response.data;
@@ -93,6 +115,33 @@ export const workoutApi = {
     return response.data;
   },
 
+  // Returns the 202 job; pass it to waitForJob before reading the plans
+  regenerateWorkoutPlan: async (planId: number): Promise<any> => {
+    const response = await api.post(`/workout-plans/${planId}/regenerate/`);
+    return response.data;
+  },
+
+  // Plan generation runs as a background job; poll its status until it finishes
+  getJob: async (jobId: number): Promise<any> => {
+    const response = await api.get(`/jobs/${jobId}/`);
+    return response.data;
+  },
+
+  waitForJob: async (job: any, intervalMs = 1000, timeoutMs = 120000): Promise<any> => {
+    const deadline = Date.now() + timeoutMs;
+    while (job.status === 'queued' || job.status === 'running') {
+      if (Date.now() > deadline) {
+        throw new Error(`Job ${job.id} did not finish in time`);
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+      job = await workoutApi.getJob(job.id);
+    }
+    if (job.status === 'failed') {
+      throw new Error(`Job ${job.id} failed`);
+    }
+    return job;
+  },
+
   updateWorkoutSession: async (sessionId: number, status: string): Promise<any> => {
     const response = await api.post(`/workout-sessions/${sessionId}/update_status/`, {
       status,
@@ -100,8 +149,20 @@ export const workoutApi = {
     return response.data;
   },
 
-  getWorkoutSessions: async (): Promise<any[]> => {
-    const response = await api.get('/workout-sessions/');
+  getWorkoutSessions: async (params?: {
+    date_from?: string;
+    date_to?: string;
+    status?: string;
+    plan?: number;
+    cursor?: string;
+  }): Promise<{ next: string | null; previous: string | null; results: any[] }> => {
+    const response = await api.get('/workout-sessions/', { params });
+    return response.data;
+  },
+
+  // Server-maintained per-week counts and volume, so the dashboard needn't load every session
+  getWeeklyStats: async (params?: { date_from?: string; date_to?: string }): Promise<any[]> => {
+    const response = await api.get('/stats/weekly/', { params });
     return response.data;
   },
 };
@@ -1,207 +1,1027 @@
 #!/usr/bin/env python3
 """
 Mock backend server for testing the frontend
-This provides a simple HTTP server that responds to the API endpoints
+
+A stand-in for the Django API that needs nothing beyond the standard library.
+It serves the same routes as workouts/urls.py, with the same response shapes,
+from in-memory state: registered users, tokens, profile edits, plans, sessions,
+fatigue entries and jobs all persist until the process exits. Plan jobs run
+inline, so the job in a 202 response has already succeeded.
+
+Requests are handled on a thread each (ThreadingHTTPServer) over HTTP/1.1
+keep-alive connections, so it holds up under load tests of the frontend or
+client SDKs (see benchmarks/load_test.py --url). One lock guards the state;
+handlers only touch dicts, so it is never held for long.
+
+Usage: python mock_backend.py [--host HOST] [--port PORT] [--origin URL] [--verbose]
 """
 
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import argparse
+import base64
+import csv
+import datetime
+import hashlib
+import io
 import json
-import urllib.parse
-from datetime import datetime
-import uuid
+import re
+import secrets
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
 
-class MockAPIHandler(BaseHTTPRequestHandler):
-    def do_OPTIONS(self):
-        """Handle CORS preflight requests"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', 'http://localhost:3000')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        self.send_header('Access-Control-Allow-Credentials', 'true')
-        self.end_headers()
+DEMO_EMAIL = 'demo@example.com'
+DEMO_PASSWORD = 'demo-password'
 
-    def do_POST(self):
-        """Handle POST requests"""
-        if self.path == '/api/auth/register/':
-            self.handle_register()
-        elif self.path == '/api/auth/login/':
-            self.handle_login()
-        elif self.path == '/api/auth/verify/':
-            self.handle_verify()
-        else:
-            self.send_error(404)
+WEEKDAYS = {'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6}
+SESSION_STATUSES = ('planned', 'completed', 'missed', 'rescheduled')
+CATEGORIES = ('legs', 'push', 'pull', 'hinge', 'core')
+FATIGUE_WINDOW_DAYS = 7
+TIME_RANGE = re.compile(r'^(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})$')
 
-    def do_GET(self):
-        """Handle GET requests"""
-        if self.path == '/api/user-profile/':
-            self.handle_get_profile()
-        elif self.path == '/api/workout-plans/':
-            self.handle_get_workout_plans()
-        elif self.path == '/api/workout-sessions/':
-            self.handle_get_workout_sessions()
-        else:
-            self.send_error(404)
+# Mirrors the catalog seeded by workouts/migrations/0009_exercise_catalog.py:
+# (slug, name, category, required equipment, sets, reps, priority)
+CATALOG = [
+    ('barbell-back-squat', 'Barbell Back Squat', 'legs', ['barbell', 'squat rack'], 5, 5, 10),
+    ('goblet-squat', 'Goblet Squat', 'legs', ['dumbbells'], 3, 10, 20),
+    ('kettlebell-goblet-squat', 'Kettlebell Goblet Squat', 'legs', ['kettlebell'], 3, 10, 30),
+    ('squat', 'Squat', 'legs', [], 3, 10, 100),
+    ('barbell-bench-press', 'Barbell Bench Press', 'push', ['barbell', 'bench'], 5, 5, 10),
+    ('dumbbell-bench-press', 'Dumbbell Bench Press', 'push', ['dumbbells', 'bench'], 3, 10, 20),
+    ('dumbbell-shoulder-press', 'Dumbbell Shoulder Press', 'push', ['dumbbells'], 3, 10, 30),
+    ('push-up', 'Push-up', 'push', [], 3, 12, 100),
+    ('pull-up', 'Pull-up', 'pull', ['pull-up bar'], 3, 8, 10),
+    ('dumbbell-row', 'Dumbbell Row', 'pull', ['dumbbells'], 3, 10, 20),
+    ('band-row', 'Resistance Band Row', 'pull', ['resistance bands'], 3, 15, 30),
+    ('superman', 'Superman', 'pull', [], 3, 12, 100),
+    ('deadlift', 'Deadlift', 'hinge', ['barbell'], 5, 5, 10),
+    ('kettlebell-swing', 'Kettlebell Swing', 'hinge', ['kettlebell'], 3, 15, 20),
+    ('dumbbell-romanian-deadlift', 'Dumbbell Romanian Deadlift', 'hinge', ['dumbbells'], 3, 10, 30),
+    ('glute-bridge', 'Glute Bridge', 'hinge', [], 3, 15, 100),
+    ('hanging-knee-raise', 'Hanging Knee Raise', 'core', ['pull-up bar'], 3, 10, 10),
+    ('dead-bug', 'Dead Bug', 'core', [], 3, 10, 100),
+]
+EXERCISES = sorted(
+    (
+        {'id': index, 'slug': slug, 'name': name, 'category': category, 'equipment': equipment,
+         'default_sets': sets, 'default_reps': reps, 'priority': priority}
+        for index, (slug, name, category, equipment, sets, reps, priority) in enumerate(CATALOG, start=1)
+    ),
+    key=lambda exercise: (exercise['priority'], exercise['id']),
+)
+EXERCISES_BY_ID = {exercise['id']: exercise for exercise in EXERCISES}
 
-    def do_PATCH(self):
-        """Handle PATCH requests"""
-        if self.path == '/api/user-profile/':
-            self.handle_update_profile()
-        else:
-            self.send_error(404)
-
-    def handle_register(self):
-        """Handle user registration"""
-        content_length = int(self.headers['Content-Length'])
-        post_data = self.rfile.read(content_length)
-        data = json.loads(post_data.decode('utf-8'))
-        
-        # Simulate registration
-        user_id = str(uuid.uuid4())
-        token = f"mock_token_{user_id}"
-        
-        response_data = {
-            'token': token,
-            'user': {
-                'id': user_id,
-                'email': data.get('email'),
-                'username': data.get('username'),
-                'name': data.get('username')
-            }
+
+class HttpError(Exception):
+    def __init__(self, status, data):
+        super().__init__(status)
+        self.status = status
+        self.data = data
+
+
+def not_found(message='Not found.'):
+    return HttpError(HTTPStatus.NOT_FOUND, {'detail': message})
+
+
+def bad_request(data):
+    return HttpError(HTTPStatus.BAD_REQUEST, data)
+
+
+def timestamp():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def today():
+    return datetime.date.today()
+
+
+def parse_date(value, field):
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise bad_request({field: ['Date has wrong format. Use one of these formats instead: YYYY-MM-DD.']})
+
+
+def hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def normalize_equipment(equipment):
+    names = {str(item).strip().lower() for item in equipment or []}
+    names -= {'none', ''}
+    return names
+
+
+def available_exercises(equipment):
+    have = normalize_equipment(equipment)
+    return [exercise for exercise in EXERCISES if set(exercise['equipment']) <= have]
+
+
+def session_template(equipment):
+    """One preferred exercise per category, as the API represents session exercises"""
+    picked = {}
+    for exercise in available_exercises(equipment):
+        picked.setdefault(exercise['category'], exercise)
+    return [
+        {'exercise': exercise['id'], 'name': exercise['name'], 'sets': exercise['default_sets'],
+         'reps': exercise['default_reps']}
+        for category in CATEGORIES
+        if (exercise := picked.get(category)) is not None
+    ]
+
+
+def validate_availability(value):
+    if not isinstance(value, dict):
+        raise bad_request({'availability': ['Expected an object of day -> ["HH:MM-HH:MM", ...]']})
+    for day, ranges in value.items():
+        if WEEKDAYS.get(str(day).strip().lower()[:3]) is None:
+            raise bad_request({'availability': [f'Unknown day {day!r}']})
+        if not isinstance(ranges, list):
+            raise bad_request({'availability': [f'Expected a list of time ranges for {day}']})
+        for text in ranges:
+            match = TIME_RANGE.match(str(text).strip())
+            if match is None:
+                raise bad_request({'availability': [f'Invalid time range {text!r} for {day}']})
+            start_h, start_m, end_h, end_m = map(int, match.groups())
+            if start_m > 59 or end_m > 59 or (start_h, start_m) >= (end_h, end_m) or end_h * 60 + end_m > 24 * 60:
+                raise bad_request({'availability': [f'Invalid time range {text!r} for {day}']})
+    return value
+
+
+def session_volume(exercises):
+    volume = 0
+    for exercise in exercises or []:
+        try:
+            volume += int(exercise.get('sets', 0)) * int(exercise.get('reps', 0))
+        except (AttributeError, TypeError, ValueError):
+            continue
+    return volume
+
+
+def encode_cursor(offset):
+    return base64.urlsafe_b64encode(f'o={offset}'.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        return max(0, int(base64.urlsafe_b64decode(cursor.encode()).decode().removeprefix('o=')))
+    except (ValueError, UnicodeDecodeError):
+        raise not_found('Invalid cursor')
+
+
+class MockStore:
+    """All API state, guarded by ``lock``"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ids = {}
+        self.users = {}
+        self.users_by_email = {}
+        self.usernames = set()
+        self.tokens = {}
+        self.user_tokens = {}
+        self.profiles = {}
+        self.plans = {}
+        self.sessions = {}
+        self.jobs = {}
+        self.fatigue = {}
+        # Per-profile and per-plan indexes, so no request scans every user's rows
+        self.owned = {}
+        self.plan_sessions = {}
+        # (profile id, kind, object id, change number) for delta sync
+        self.tombstones = []
+        # Per-profile change counters, the /api/sync/ cursor
+        self.change_counters = {}
+
+    def next_id(self, kind):
+        self.ids[kind] = self.ids.get(kind, 0) + 1
+        return self.ids[kind]
+
+    def next_change(self, profile_id):
+        self.change_counters[profile_id] = self.change_counters.get(profile_id, 0) + 1
+        return self.change_counters[profile_id]
+
+    def add(self, kind, objects, obj, profile_id):
+        objects[obj['id']] = obj
+        self.owned.setdefault((kind, profile_id), {})[obj['id']] = obj
+
+    def of(self, kind, profile_id):
+        """A profile's objects of ``kind`` ('plan', 'session', 'job' or 'fatigue') in id order"""
+        return list(self.owned.get((kind, profile_id), {}).values())
+
+    # Users and profiles
+
+    def create_user(self, email, username, password):
+        user = {
+            'id': self.next_id('user'), 'username': username, 'email': email,
+            'first_name': '', 'last_name': '', 'password': hash_password(password),
         }
-        
-        self.send_response(200)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', 'http://localhost:3000')
-        self.send_header('Access-Control-Allow-Credentials', 'true')
-        self.end_headers()
-        self.wfile.write(json.dumps(response_data).encode())
-
-    def handle_login(self):
-        """Handle user login"""
-        content_length = int(self.headers['Content-Length'])
-        post_data = self.rfile.read(content_length)
-        data = json.loads(post_data.decode('utf-8'))
-        
-        # Simulate login
-        user_id = str(uuid.uuid4())
-        token = f"mock_token_{user_id}"
-        
-        response_data = {
-            'token': token,
-            'user': {
-                'id': user_id,
-                'email': data.get('email'),
-                'username': 'testuser',
-                'name': 'Test User'
-            }
+        self.users[user['id']] = user
+        self.users_by_email[email.lower()] = user
+        self.usernames.add(username)
+        now = timestamp()
+        profile = {
+            'id': self.next_id('profile'), 'user_id': user['id'], 'name': username, 'availability': {},
+            'equipment': [], 'created_at': now, 'updated_at': now, 'changed': 0,
         }
-        
-        self.send_response(200)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', 'http://localhost:3000')
-        self.send_header('Access-Control-Allow-Credentials', 'true')
-        self.end_headers()
-        self.wfile.write(json.dumps(response_data).encode())
-
-    def handle_verify(self):
-        """Handle token verification"""
-        response_data = {
-            'id': '1',
-            'email': 'test@example.com',
-            'username': 'testuser',
-            'name': 'Test User'
+        self.profiles[user['id']] = profile
+        return user
+
+    def token_for(self, user):
+        key = self.user_tokens.get(user['id'])
+        if key is None:
+            key = self.user_tokens[user['id']] = secrets.token_hex(20)
+            self.tokens[key] = user['id']
+        return key
+
+    def touch_profile(self, profile):
+        profile['updated_at'] = timestamp()
+        profile['changed'] = self.next_change(profile['id'])
+
+    def serialize_user(self, user):
+        return {key: user[key] for key in ('id', 'username', 'email', 'first_name', 'last_name')}
+
+    def fatigue_summary(self, profile):
+        entries = sorted(
+            self.of('fatigue', profile['id']),
+            key=lambda entry: (entry['date'], entry['id']),
+        )
+        window_start = today() - datetime.timedelta(days=FATIGUE_WINDOW_DAYS)
+        window = [entry['level'] for entry in entries if window_start < entry['date'] <= today()]
+        latest = entries[-1] if entries else None
+        return {
+            'latest_level': latest['level'] if latest else None,
+            'latest_date': latest['date'].isoformat() if latest else None,
+            'window_days': FATIGUE_WINDOW_DAYS,
+            'window_average': round(sum(window) / len(window), 2) if window else None,
+            'window_count': len(window),
         }
-        
-        self.send_response(200)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', 'http://localhost:3000')
-        self.send_header('Access-Control-Allow-Credentials', 'true')
-        self.end_headers()
-        self.wfile.write(json.dumps(response_data).encode())
-
-    def handle_get_profile(self):
-        """Handle get user profile"""
-        response_data = {
-            'id': '1',
-            'user': {
-                'id': '1',
-                'email': 'test@example.com',
-                'username': 'testuser',
-                'name': 'Test User'
-            },
-            'name': 'Test User',
-            'availability': {},
-            'equipment': [],
-            'fatigue_log': []
+
+    def serialize_profile(self, profile):
+        return {
+            'id': profile['id'], 'user': self.serialize_user(self.users[profile['user_id']]),
+            'name': profile['name'], 'availability': profile['availability'], 'equipment': profile['equipment'],
+            'fatigue': self.fatigue_summary(profile),
+            'created_at': profile['created_at'], 'updated_at': profile['updated_at'],
         }
-        
-        self.send_response(200)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', 'http://localhost:3000')
-        self.send_header('Access-Control-Allow-Credentials', 'true')
-        self.end_headers()
-        self.wfile.write(json.dumps(response_data).encode())
-
-    def handle_update_profile(self):
-        """Handle update user profile"""
-        content_length = int(self.headers['Content-Length'])
-        post_data = self.rfile.read(content_length)
-        data = json.loads(post_data.decode('utf-8'))
-        
-        response_data = {
-            'id': '1',
-            'user': {
-                'id': '1',
-                'email': 'test@example.com',
-                'username': 'testuser',
-                'name': data.get('name', 'Test User')
-            },
-            'name': data.get('name', 'Test User'),
-            'availability': data.get('availability', {}),
-            'equipment': data.get('equipment', []),
-            'fatigue_log': data.get('fatigue_log', [])
+
+    # Plans and sessions
+
+    def profile_sessions(self, profile):
+        return sorted(
+            self.of('session', profile['id']),
+            key=lambda session: (session['date'], session['id']),
+        )
+
+    def build_schedule(self, profile, start_date, weeks):
+        weekdays = {
+            WEEKDAYS.get(str(day).strip().lower()[:3]) for day, slots in profile['availability'].items() if slots
         }
-        
-        self.send_response(200)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', 'http://localhost:3000')
-        self.send_header('Access-Control-Allow-Credentials', 'true')
+        exercises = session_template(profile['equipment'])
+        return [
+            (date, [dict(exercise) for exercise in exercises])
+            for date in (start_date + datetime.timedelta(days=offset) for offset in range(weeks * 7))
+            if date.weekday() in weekdays
+        ]
+
+    def create_session(self, plan_id, profile_id, date, exercises, status='planned', notes=''):
+        now = timestamp()
+        session = {
+            'id': self.next_id('session'), 'user_profile': profile_id, 'plan': plan_id, 'date': date,
+            'exercises': exercises, 'status': status, 'notes': notes, 'created_at': now, 'updated_at': now,
+            'changed': self.next_change(profile_id),
+        }
+        self.add('session', self.sessions, session, profile_id)
+        self.plan_sessions.setdefault(plan_id, {})[session['id']] = session
+        return session
+
+    def touch_session(self, session):
+        session['updated_at'] = timestamp()
+        session['changed'] = self.next_change(session['user_profile'])
+
+    def delete_session(self, session):
+        del self.sessions[session['id']]
+        del self.owned[('session', session['user_profile'])][session['id']]
+        del self.plan_sessions[session['plan']][session['id']]
+        self.tombstones.append(
+            (session['user_profile'], 'session', session['id'], self.next_change(session['user_profile']))
+        )
+
+    def generate_plan(self, profile, weeks):
+        now = timestamp()
+        plan = {
+            'id': self.next_id('plan'), 'user_profile': profile['id'], 'start_date': today(), 'weeks': weeks,
+            'rationale': 'Initial plan generated', 'last_updated': now, 'created_at': now,
+            'changed': self.next_change(profile['id']),
+        }
+        self.add('plan', self.plans, plan, profile['id'])
+        schedule = self.build_schedule(profile, plan['start_date'], weeks)
+        for date, exercises in schedule:
+            self.create_session(plan['id'], profile['id'], date, exercises)
+        return {'plan_id': plan['id'], 'sessions': len(schedule)}
+
+    def regenerate_plan(self, profile, plan):
+        """Bring future planned sessions in line with the profile, like regenerate_workout_plan"""
+        schedule = dict(self.build_schedule(profile, plan['start_date'], plan['weeks']))
+        counts = {'created': 0, 'updated': 0, 'deleted': 0}
+        seen = set()
+        for session in list(self.plan_sessions.get(plan['id'], {}).values()):
+            seen.add(session['date'])
+            if session['date'] < today() or session['status'] != 'planned':
+                continue
+            exercises = schedule.get(session['date'])
+            if exercises is None:
+                self.delete_session(session)
+                counts['deleted'] += 1
+            elif exercises != session['exercises']:
+                session['exercises'] = exercises
+                self.touch_session(session)
+                counts['updated'] += 1
+        for date, exercises in schedule.items():
+            if date >= today() and date not in seen:
+                self.create_session(plan['id'], profile['id'], date, exercises)
+                counts['created'] += 1
+        if any(counts.values()):
+            plan['last_updated'] = timestamp()
+            plan['changed'] = self.next_change(profile['id'])
+        return {'plan_id': plan['id'], 'changes': counts}
+
+    def serialize_session(self, session):
+        data = {key: session[key] for key in (
+            'id', 'user_profile', 'plan', 'date', 'exercises', 'status', 'notes', 'created_at', 'updated_at'
+        )}
+        data['date'] = session['date'].isoformat()
+        return data
+
+    def serialize_plan(self, plan, sessions=True):
+        data = {key: plan[key] for key in (
+            'id', 'user_profile', 'start_date', 'weeks', 'rationale', 'last_updated', 'created_at'
+        )}
+        data['start_date'] = plan['start_date'].isoformat()
+        if sessions:
+            data['sessions'] = [
+                self.serialize_session(session)
+                for session in sorted(self.plan_sessions.get(plan['id'], {}).values(), key=lambda s: (s['date'], s['id']))
+            ]
+        return data
+
+    def run_job(self, profile, kind, params, handler):
+        now = timestamp()
+        job = {
+            'id': self.next_id('job'), 'profile_id': profile['id'], 'kind': kind, 'params': params,
+            'status': 'succeeded', 'result': handler(), 'error': '', 'created_at': now, 'started_at': now,
+            'finished_at': timestamp(),
+        }
+        self.add('job', self.jobs, job, profile['id'])
+        return job
+
+    def serialize_job(self, job):
+        return {key: job[key] for key in (
+            'id', 'kind', 'params', 'status', 'result', 'error', 'created_at', 'started_at', 'finished_at'
+        )}
+
+    def weekly_summaries(self, profile):
+        weeks = {}
+        for session in self.profile_sessions(profile):
+            monday = session['date'] - datetime.timedelta(days=session['date'].weekday())
+            week = weeks.setdefault(monday, {
+                'week_start': monday.isoformat(), 'planned': 0, 'completed': 0, 'missed': 0, 'rescheduled': 0,
+                'volume': 0, 'completed_volume': 0, 'updated_at': session['updated_at'],
+            })
+            volume = session_volume(session['exercises'])
+            week[session['status']] += 1
+            week['volume'] += volume
+            if session['status'] == 'completed':
+                week['completed_volume'] += volume
+            week['updated_at'] = max(week['updated_at'], session['updated_at'])
+        for week in weeks.values():
+            finished = week['completed'] + week['missed'] + week['rescheduled']
+            week['completion_rate'] = round(week['completed'] / finished, 3) if finished else None
+        return [weeks[monday] for monday in sorted(weeks)]
+
+
+class Request:
+    def __init__(self, handler, method, body):
+        parts = urlsplit(handler.path)
+        self.method = method
+        self.path = parts.path
+        self.query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        self.headers = handler.headers
+        self.base_url = f'http://{handler.headers.get("Host") or "localhost"}'
+        self.body = body
+        self.user = None
+        self.profile = None
+
+    def json(self):
+        if not self.body:
+            return {}
+        try:
+            return json.loads(self.body)
+        except ValueError as exc:
+            raise bad_request({'detail': f'JSON parse error - {exc}'})
+
+    def url(self, path):
+        return self.base_url + path
+
+
+class Response:
+    def __init__(self, data=None, status=HTTPStatus.OK, headers=None, body=None, content_type='application/json'):
+        self.status = status
+        self.headers = dict(headers or {})
+        self.content_type = content_type
+        if body is None and data is not None:
+            body = json.dumps(data, separators=(',', ':')).encode()
+        self.body = body or b''
+
+
+class MockAPI:
+    """Route table and handlers; every handler runs with the store lock held"""
+
+    def __init__(self, store):
+        self.store = store
+        # (pattern, {method: (handler, needs auth)})
+        self.routes = [(re.compile(f'^/api/{pattern}$'), methods) for pattern, methods in [
+            ('', {'GET': (self.api_root, False)}),
+            ('auth/login/', {'POST': (self.login, False)}),
+            ('auth/register/', {'POST': (self.register, False)}),
+            ('auth/verify/', {'GET': (self.verify, True)}),
+            ('auth/logout/', {'POST': (self.logout, True)}),
+            ('sync/', {'GET': (self.sync, True)}),
+            ('user-profile/', {'GET': (self.profile_detail, True), 'POST': (self.profile_create, True)}),
+            (r'user-profile/(?P<pk>\d+)/', {
+                'GET': (self.profile_detail, True), 'PUT': (self.profile_update, True),
+                'PATCH': (self.profile_update, True),
+            }),
+            ('workout-plans/', {'GET': (self.plan_list, True), 'POST': (self.plan_create, True)}),
+            (r'workout-plans/(?P<pk>\d+)/', {
+                'GET': (self.plan_detail, True), 'PUT': (self.plan_update, True),
+                'PATCH': (self.plan_update, True), 'DELETE': (self.plan_delete, True),
+            }),
+            (r'workout-plans/(?P<pk>\d+)/regenerate/', {'POST': (self.plan_regenerate, True)}),
+            ('workout-sessions/', {'GET': (self.session_list, True), 'POST': (self.session_create, True)}),
+            ('workout-sessions/bulk_update_status/', {'POST': (self.session_bulk_update_status, True)}),
+            ('workout-sessions/export/', {'GET': (self.session_export, True)}),
+            (r'workout-sessions/(?P<pk>\d+)/', {
+                'GET': (self.session_detail, True), 'PUT': (self.session_update, True),
+                'PATCH': (self.session_update, True), 'DELETE': (self.session_delete, True),
+            }),
+            (r'workout-sessions/(?P<pk>\d+)/update_status/', {'POST': (self.session_update_status, True)}),
+            ('jobs/', {'GET': (self.job_list, True)}),
+            (r'jobs/(?P<pk>\d+)/', {'GET': (self.job_detail, True)}),
+            ('fatigue/', {'GET': (self.fatigue_list, True), 'POST': (self.fatigue_create, True)}),
+            ('stats/weekly/', {'GET': (self.weekly_list, True)}),
+            (r'stats/weekly/(?P<week_start>\d{4}-\d{2}-\d{2})/', {'GET': (self.weekly_detail, True)}),
+            ('exercises/', {'GET': (self.exercise_list, True)}),
+            (r'exercises/(?P<pk>\d+)/', {'GET': (self.exercise_detail, True)}),
+        ]]
+
+    def dispatch(self, request):
+        for pattern, methods in self.routes:
+            match = pattern.match(request.path)
+            if match is None:
+                continue
+            if request.method not in methods:
+                raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, {'detail': f'Method "{request.method}" not allowed.'})
+            handler, needs_auth = methods[request.method]
+            with self.store.lock:
+                if needs_auth:
+                    self.authenticate(request)
+                return handler(request, **match.groupdict())
+        raise not_found()
+
+    def authenticate(self, request):
+        # "Token <key>" like DRF, or the "Bearer <key>" the frontend sends
+        auth = request.headers.get('Authorization', '').split()
+        if not auth or auth[0].lower() not in ('token', 'bearer'):
+            raise HttpError(HTTPStatus.UNAUTHORIZED, {'detail': 'Authentication credentials were not provided.'})
+        if len(auth) != 2:
+            raise HttpError(HTTPStatus.UNAUTHORIZED, {'detail': 'Invalid token header.'})
+        user_id = self.store.tokens.get(auth[1])
+        if user_id is None:
+            raise HttpError(HTTPStatus.UNAUTHORIZED, {'detail': 'Invalid token.'})
+        request.user = self.store.users[user_id]
+        request.profile = self.store.profiles.get(user_id)
+
+    def own(self, objects, pk, request):
+        obj = objects.get(int(pk))
+        if obj is None or obj.get('user_profile', obj.get('profile_id')) != request.profile['id']:
+            raise not_found()
+        return obj
+
+    def paginate(self, request, rows, page_size, max_page_size, serialize):
+        try:
+            size = min(int(request.query.get('page_size', page_size)), max_page_size)
+        except ValueError:
+            size = page_size
+        size = max(size, 1)
+        offset = decode_cursor(request.query['cursor']) if 'cursor' in request.query else 0
+
+        def link(position):
+            query = {**request.query, 'cursor': encode_cursor(position)}
+            return request.url(request.path) + '?' + '&'.join(f'{key}={value}' for key, value in query.items())
+
+        return {
+            'next': link(offset + size) if offset + size < len(rows) else None,
+            'previous': link(max(offset - size, 0)) if offset else None,
+            'results': [serialize(row) for row in rows[offset:offset + size]],
+        }
+
+    def filter_dates(self, request, rows):
+        for param, keep in (('date_from', lambda a, b: a >= b), ('date_to', lambda a, b: a <= b)):
+            if request.query.get(param):
+                bound = parse_date(request.query[param], param)
+                rows = [row for row in rows if keep(row['date'], bound)]
+        return rows
+
+    # Root and auth
+
+    def api_root(self, request):
+        names = ['user-profile', 'workout-plans', 'workout-sessions', 'jobs', 'fatigue', 'stats/weekly', 'exercises']
+        return Response({name: request.url(f'/api/{name}/') for name in names})
+
+    def auth_response(self, user):
+        profile = self.store.profiles[user['id']]
+        return Response({
+            'token': self.store.token_for(user),
+            'user': {'id': user['id'], 'email': user['email'], 'username': user['username'], 'name': profile['name']},
+        })
+
+    def register(self, request):
+        data = request.json()
+        errors = {}
+        for field in ('email', 'username', 'password'):
+            if not str(data.get(field) or '').strip():
+                errors[field] = ['This field is required.']
+        if 'email' not in errors and '@' not in str(data['email']):
+            errors['email'] = ['Enter a valid email address.']
+        if 'password' not in errors and len(str(data['password'])) < 8:
+            errors['password'] = ['Ensure this field has at least 8 characters.']
+        if errors:
+            raise bad_request(errors)
+        if str(data['email']).lower() in self.store.users_by_email:
+            raise bad_request({'message': 'Email already exists'})
+        if str(data['username']) in self.store.usernames:
+            raise bad_request({'message': 'Username already exists'})
+        user = self.store.create_user(str(data['email']).lower(), str(data['username']), str(data['password']))
+        return self.auth_response(user)
+
+    def login(self, request):
+        data = request.json()
+        errors = {field: ['This field is required.'] for field in ('email', 'password') if not data.get(field)}
+        if errors:
+            raise bad_request(errors)
+        user = self.store.users_by_email.get(str(data['email']).lower())
+        if user is None or user['password'] != hash_password(str(data['password'])):
+            raise HttpError(HTTPStatus.UNAUTHORIZED, {'message': 'Invalid credentials'})
+        return self.auth_response(user)
+
+    def verify(self, request):
+        user = request.user
+        return Response({
+            'id': user['id'], 'email': user['email'], 'username': user['username'], 'name': request.profile['name'],
+        })
+
+    def logout(self, request):
+        key = self.store.user_tokens.pop(request.user['id'], None)
+        self.store.tokens.pop(key, None)
+        return Response(status=HTTPStatus.NO_CONTENT)
+
+    def sync(self, request):
+        profile = request.profile
+        cursor = self.store.change_counters.get(profile['id'], 0)
+        since = None
+        if 'since' in request.query:
+            since = request.query['since']
+            if not since.isdigit() or int(since) > cursor:
+                raise bad_request({'error': 'Invalid cursor'})
+            since = int(since)
+        plans = self.store.of('plan', profile['id'])
+        sessions = self.store.profile_sessions(profile)
+        deleted = {'plans': [], 'sessions': []}
+        profile_data = None
+        if since is None:
+            profile_data = self.store.serialize_profile(profile)
+        else:
+            plans = [plan for plan in plans if plan['changed'] > since]
+            sessions = [session for session in sessions if session['changed'] > since]
+            if profile['changed'] > since:
+                profile_data = self.store.serialize_profile(profile)
+            for profile_id, kind, object_id, changed in self.store.tombstones:
+                if profile_id == profile['id'] and changed > since:
+                    deleted[f'{kind}s'].append(object_id)
+        return Response({
+            'cursor': str(cursor),
+            'full': since is None,
+            'profile': profile_data,
+            'plans': [self.store.serialize_plan(plan, sessions=False) for plan in plans],
+            'sessions': [self.store.serialize_session(session) for session in sessions],
+            'deleted': deleted,
+        })
+
+    # Profile
+
+    def profile_detail(self, request, pk=None):
+        # Like the API, every profile route shows the caller's own profile
+        return Response(self.store.serialize_profile(request.profile))
+
+    def profile_create(self, request):
+        raise bad_request({'error': 'Profile already exists'})
+
+    def profile_update(self, request, pk=None):
+        data = request.json()
+        profile = request.profile
+        if 'availability' in data:
+            validate_availability(data['availability'])
+        if 'equipment' in data and not isinstance(data['equipment'], list):
+            raise bad_request({'equipment': ['Value must be valid JSON.']})
+        if 'name' in data and not str(data['name']).strip():
+            raise bad_request({'name': ['This field may not be blank.']})
+        for field in ('name', 'availability', 'equipment'):
+            if field in data:
+                profile[field] = data[field]
+        self.store.touch_profile(profile)
+        return Response(self.store.serialize_profile(profile))
+
+    # Plans
+
+    def plan_list(self, request):
+        plans = self.store.of('plan', request.profile['id'])
+        return Response([self.store.serialize_plan(plan) for plan in plans])
+
+    def job_accepted(self, request, job):
+        data = self.store.serialize_job(job)
+        data['url'] = request.url(f'/api/jobs/{job["id"]}/')
+        return Response(data, status=HTTPStatus.ACCEPTED, headers={'Location': data['url']})
+
+    def plan_create(self, request):
+        try:
+            weeks = int(request.json().get('weeks', 4))
+        except (TypeError, ValueError):
+            weeks = 0
+        if not 1 <= weeks <= 52:
+            raise bad_request({'error': 'Invalid weeks'})
+        profile = request.profile
+        job = self.store.run_job(profile, 'generate_plan', {'weeks': weeks},
+                                 lambda: self.store.generate_plan(profile, weeks))
+        return self.job_accepted(request, job)
+
+    def plan_detail(self, request, pk):
+        return Response(self.store.serialize_plan(self.own(self.store.plans, pk, request)))
+
+    def plan_update(self, request, pk):
+        plan = self.own(self.store.plans, pk, request)
+        data = request.json()
+        partial = request.method == 'PATCH'
+        fields = {}
+        if 'start_date' in data or not partial:
+            fields['start_date'] = parse_date(data.get('start_date'), 'start_date')
+        if 'weeks' in data:
+            if not isinstance(data['weeks'], int) or isinstance(data['weeks'], bool):
+                raise bad_request({'weeks': ['A valid integer is required.']})
+            fields['weeks'] = data['weeks']
+        if 'rationale' in data:
+            fields['rationale'] = str(data['rationale'])
+        plan.update(fields)
+        plan['last_updated'] = timestamp()
+        plan['changed'] = self.store.next_change(plan['user_profile'])
+        return Response(self.store.serialize_plan(plan))
+
+    def plan_delete(self, request, pk):
+        plan = self.own(self.store.plans, pk, request)
+        for session in list(self.store.plan_sessions.get(plan['id'], {}).values()):
+            self.store.delete_session(session)
+        self.store.plan_sessions.pop(plan['id'], None)
+        del self.store.plans[plan['id']]
+        del self.store.owned[('plan', plan['user_profile'])][plan['id']]
+        self.store.tombstones.append(
+            (plan['user_profile'], 'plan', plan['id'], self.store.next_change(plan['user_profile']))
+        )
+        return Response(status=HTTPStatus.NO_CONTENT)
+
+    def plan_regenerate(self, request, pk):
+        plan = self.own(self.store.plans, pk, request)
+        job = self.store.run_job(request.profile, 'regenerate_plan', {'plan_id': plan['id']},
+                                 lambda: self.store.regenerate_plan(request.profile, plan))
+        return self.job_accepted(request, job)
+
+    # Sessions
+
+    def filtered_sessions(self, request):
+        sessions = self.filter_dates(request, self.store.profile_sessions(request.profile))
+        status = request.query.get('status')
+        if status:
+            if status not in SESSION_STATUSES:
+                raise bad_request({'status': 'Invalid status'})
+            sessions = [session for session in sessions if session['status'] == status]
+        return sessions
+
+    def session_list(self, request):
+        sessions = self.filtered_sessions(request)
+        return Response(self.paginate(request, sessions, 50, 500, self.store.serialize_session))
+
+    def session_fields(self, request, data, partial):
+        fields = {}
+        if 'plan' in data or not partial:
+            plan = self.store.plans.get(data.get('plan')) if isinstance(data.get('plan'), int) else None
+            if plan is None or plan['user_profile'] != request.profile['id']:
+                raise bad_request({'plan': ['Invalid pk - object does not exist.']})
+            fields['plan'] = plan['id']
+        if 'date' in data or not partial:
+            fields['date'] = parse_date(data.get('date'), 'date')
+        if 'exercises' in data:
+            if not isinstance(data['exercises'], list):
+                raise bad_request({'exercises': ['Expected a list of exercises']})
+            fields['exercises'] = data['exercises']
+        if 'status' in data:
+            if data['status'] not in SESSION_STATUSES:
+                raise bad_request({'status': [f'"{data["status"]}" is not a valid choice.']})
+            fields['status'] = data['status']
+        if 'notes' in data:
+            fields['notes'] = str(data['notes'])
+        return fields
+
+    def session_create(self, request):
+        fields = self.session_fields(request, request.json(), partial=False)
+        session = self.store.create_session(
+            fields['plan'], request.profile['id'], fields['date'], fields.get('exercises', []),
+            fields.get('status', 'planned'), fields.get('notes', ''),
+        )
+        return Response(self.store.serialize_session(session), status=HTTPStatus.CREATED)
+
+    def session_detail(self, request, pk):
+        return Response(self.store.serialize_session(self.own(self.store.sessions, pk, request)))
+
+    def session_update(self, request, pk):
+        session = self.own(self.store.sessions, pk, request)
+        session.update(self.session_fields(request, request.json(), partial=request.method == 'PATCH'))
+        self.store.touch_session(session)
+        return Response(self.store.serialize_session(session))
+
+    def session_delete(self, request, pk):
+        self.store.delete_session(self.own(self.store.sessions, pk, request))
+        return Response(status=HTTPStatus.NO_CONTENT)
+
+    def session_update_status(self, request, pk):
+        session = self.own(self.store.sessions, pk, request)
+        data = request.json()
+        if data.get('status') not in SESSION_STATUSES:
+            raise bad_request({'error': 'Invalid status'})
+        session['status'] = data['status']
+        if data.get('notes'):
+            session['notes'] = str(data['notes'])
+        self.store.touch_session(session)
+        return Response({'status': 'updated'})
+
+    def session_bulk_update_status(self, request):
+        updates = request.json()
+        if not isinstance(updates, list):
+            raise bad_request({'error': 'Expected a list of updates'})
+        if len(updates) > 500:
+            raise bad_request({'error': 'At most 500 updates per request'})
+        results = []
+        seen = set()
+        for update in updates:
+            if not isinstance(update, dict):
+                results.append({'id': None, 'error': 'Expected an object'})
+                continue
+            session_id = update.get('id')
+            session = self.store.sessions.get(session_id) if isinstance(session_id, int) else None
+            if not isinstance(session_id, int):
+                error = 'Invalid id'
+            elif update.get('status') not in SESSION_STATUSES:
+                error = 'Invalid status'
+            elif not isinstance(update.get('notes', ''), str):
+                error = 'Invalid notes'
+            elif session_id in seen:
+                error = 'Duplicate id'
+            elif session is None or session['user_profile'] != request.profile['id']:
+                error = 'Not found'
+            else:
+                error = None
+            seen.add(session_id)
+            if error:
+                results.append({'id': session_id, 'error': error})
+                continue
+            session['status'] = update['status']
+            if update.get('notes'):
+                session['notes'] = update['notes']
+            self.store.touch_session(session)
+            results.append({'id': session_id, 'status': 'updated'})
+        failed = sum(1 for result in results if 'error' in result)
+        return Response({'updated': len(results) - failed, 'failed': failed, 'results': results})
+
+    def session_export(self, request):
+        output = request.query.get('output', 'jsonl')
+        if output not in ('jsonl', 'csv'):
+            raise bad_request({'error': 'Invalid output'})
+        rows = [self.store.serialize_session(session) for session in self.filtered_sessions(request)]
+        if output == 'csv':
+            fields = ['id', 'user_profile', 'plan', 'date', 'exercises', 'status', 'notes', 'created_at', 'updated_at']
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(fields)
+            for row in rows:
+                row['exercises'] = json.dumps(row['exercises'])
+                writer.writerow([row[field] for field in fields])
+            body, content_type = buffer.getvalue().encode(), 'text/csv'
+        else:
+            body = b''.join(json.dumps(row, separators=(',', ':')).encode() + b'\n' for row in rows)
+            content_type = 'application/x-ndjson'
+        headers = {'Content-Disposition': f'attachment; filename="workout-sessions.{output}"'}
+        return Response(body=body, headers=headers, content_type=content_type)
+
+    # Jobs, fatigue, stats and exercises
+
+    def job_list(self, request):
+        jobs = self.store.of('job', request.profile['id'])[::-1]
+        return Response([self.store.serialize_job(job) for job in jobs])
+
+    def job_detail(self, request, pk):
+        return Response(self.store.serialize_job(self.own(self.store.jobs, pk, request)))
+
+    def fatigue_list(self, request):
+        entries = sorted(
+            self.store.of('fatigue', request.profile['id']),
+            key=lambda entry: (entry['date'], entry['id']),
+        )
+        entries = self.filter_dates(request, entries)
+        serialize = lambda entry: {
+            'id': entry['id'], 'date': entry['date'].isoformat(), 'level': entry['level'],
+            'created_at': entry['created_at'],
+        }
+        return Response(self.paginate(request, entries, 100, 1000, serialize))
+
+    def fatigue_create(self, request):
+        data = request.json()
+        level = data.get('level')
+        if not isinstance(level, int) or isinstance(level, bool) or not 1 <= level <= 10:
+            raise bad_request({'level': ['Ensure this value is between 1 and 10.']})
+        date = parse_date(data['date'], 'date') if data.get('date') else today()
+        entry = {'id': self.store.next_id('fatigue'), 'profile_id': request.profile['id'], 'date': date,
+                 'level': level, 'created_at': timestamp()}
+        self.store.add('fatigue', self.store.fatigue, entry, request.profile['id'])
+        self.store.touch_profile(request.profile)
+        return Response({'id': entry['id'], 'date': date.isoformat(), 'level': level,
+                         'created_at': entry['created_at']}, status=HTTPStatus.CREATED)
+
+    def weekly_list(self, request):
+        weeks = self.store.weekly_summaries(request.profile)
+        if request.query.get('date_from'):
+            start = parse_date(request.query['date_from'], 'date_from')
+            start -= datetime.timedelta(days=start.weekday())
+            weeks = [week for week in weeks if week['week_start'] >= start.isoformat()]
+        if request.query.get('date_to'):
+            end = parse_date(request.query['date_to'], 'date_to')
+            weeks = [week for week in weeks if week['week_start'] <= end.isoformat()]
+        return Response(weeks)
+
+    def weekly_detail(self, request, week_start):
+        for week in self.store.weekly_summaries(request.profile):
+            if week['week_start'] == week_start:
+                return Response(week)
+        raise not_found('No WeeklySummary matches the given query.')
+
+    @staticmethod
+    def serialize_exercise(exercise):
+        return {key: exercise[key] for key in (
+            'id', 'slug', 'name', 'category', 'equipment', 'default_sets', 'default_reps'
+        )}
+
+    def exercise_list(self, request):
+        if request.query.get('available') in ('1', 'true'):
+            exercises = available_exercises(request.profile['equipment'])
+        else:
+            exercises = EXERCISES
+        if request.query.get('category'):
+            exercises = [e for e in exercises if e['category'] == request.query['category']]
+        search = request.query.get('search', '').strip().lower()
+        if search:
+            exercises = [e for e in exercises if search in e['name'].lower()]
+        return Response([self.serialize_exercise(exercise) for exercise in exercises])
+
+    def exercise_detail(self, request, pk):
+        exercise = EXERCISES_BY_ID.get(int(pk))
+        if exercise is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, {'error': 'Exercise not found'})
+        return Response(self.serialize_exercise(exercise))
+
+
+class MockAPIHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open between requests; every response sets Content-Length
+    protocol_version = 'HTTP/1.1'
+    # Close keep-alive connections left idle this long, freeing their threads
+    timeout = 60
+    # Headers and body go out in separate writes; with Nagle on, the body
+    # waits for the client's delayed ACK (~40 ms) on every kept-alive request
+    disable_nagle_algorithm = True
+    api = None
+    origin = 'http://localhost:3000'
+    verbose = False
+
+    def do_OPTIONS(self):
+        """Handle CORS preflight requests"""
+        self.read_body()
+        self.send_response(HTTPStatus.OK)
+        self.send_cors_headers()
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, PATCH, DELETE, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization, If-None-Match')
+        self.send_header('Access-Control-Max-Age', '86400')
+        self.send_header('Content-Length', '0')
         self.end_headers()
-        self.wfile.write(json.dumps(response_data).encode())
-
-    def handle_get_workout_plans(self):
-        """Handle get workout plans"""
-        response_data = []
-        
-        self.send_response(200)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', 'http://localhost:3000')
-        self.send_header('Access-Control-Allow-Credentials', 'true')
+
+    def do_GET(self):
+        self.handle_api('GET')
+
+    def do_POST(self):
+        self.handle_api('POST')
+
+    def do_PUT(self):
+        self.handle_api('PUT')
+
+    def do_PATCH(self):
+        self.handle_api('PATCH')
+
+    def do_DELETE(self):
+        self.handle_api('DELETE')
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def handle_api(self, method):
+        # Always consume the body so the next request on the connection parses cleanly
+        request = Request(self, method, self.read_body())
+        try:
+            response = self.api.dispatch(request)
+        except HttpError as exc:
+            response = Response(exc.data, status=exc.status)
+        except Exception as exc:
+            self.log_error('%s %s failed: %r', method, self.path, exc)
+            response = Response({'detail': 'Internal server error'}, status=HTTPStatus.INTERNAL_SERVER_ERROR)
+
+        etag = None
+        if method == 'GET' and response.status == HTTPStatus.OK:
+            etag = '"%s"' % hashlib.md5(response.body, usedforsecurity=False).hexdigest()
+            if etag in self.headers.get('If-None-Match', ''):
+                response = Response(status=HTTPStatus.NOT_MODIFIED)
+
+        self.send_response(response.status)
+        self.send_cors_headers()
+        if response.body:
+            self.send_header('Content-Type', response.content_type)
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'private, no-cache')
+        for name, value in response.headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(response.body)))
         self.end_headers()
-        self.wfile.write(json.dumps(response_data).encode())
-
-    def handle_get_workout_sessions(self):
-        """Handle get workout sessions"""
-        response_data = []
-        
-        self.send_response(200)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', 'http://localhost:3000')
+        if response.body:
+            self.wfile.write(response.body)
+
+    def send_cors_headers(self):
+        self.send_header('Access-Control-Allow-Origin', self.origin)
         self.send_header('Access-Control-Allow-Credentials', 'true')
-        self.end_headers()
-        self.wfile.write(json.dumps(response_data).encode())
+        self.send_header('Access-Control-Expose-Headers', 'ETag, Location')
+        self.send_header('Vary', 'Origin')
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections under bursts of clients
+    request_queue_size = 1024
+
+
+def create_server(host='localhost', port=8000, origin='http://localhost:3000', verbose=False):
+    """A mock server with fresh state and a demo account, not yet serving"""
+    store = MockStore()
+    store.create_user(DEMO_EMAIL, 'demo', DEMO_PASSWORD)
+    handler = type('Handler', (MockAPIHandler,), {'api': MockAPI(store), 'origin': origin, 'verbose': verbose})
+    return MockServer((host, port), handler)
+
 
 def run_mock_server():
     """Run the mock server"""
-    server_address = ('localhost', 8000)
-    httpd = HTTPServer(server_address, MockAPIHandler)
-    print(f"Mock backend server running on http://localhost:8000")
-    print("This is a temporary solution for testing the frontend")
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--origin', default='http://localhost:3000', help='allowed CORS origin')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args()
+
+    httpd = create_server(args.host, args.port, args.origin, args.verbose)
+    print(f"Mock backend server running on http://{args.host}:{args.port}")
+    print(f"Log in as {DEMO_EMAIL} / {DEMO_PASSWORD} or register a new account")
     print("Press Ctrl+C to stop the server")
     try:
         httpd.serve_forever()
     except KeyboardInterrupt:
         print("\nServer stopped")
+    finally:
         httpd.server_close()
 
 if __name__ == '__main__':
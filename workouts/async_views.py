@@ -0,0 +1,132 @@
+"""
+Async (ASGI-native) handlers for the read-heavy GET endpoints.
+
+They serve the same URLs and payloads as the DRF views for profile fetch,
+plan list, session list and token verification, but authenticate and query
+through Django's async ORM so a worker is not tied up per connection. Enabled
+with the ASYNC_API_VIEWS setting; other methods on the same URLs are passed
+through to the regular DRF views. Responses are always JSON.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.request import Request
+from .authentication import CachedTokenAuthentication
+from .catalog import catalog_stale, get_catalog
+from .conditional import evaluate_conditions, set_validators
+from .fatigue import with_fatigue_summary
+from .models import UserProfile
+from .pagination import WorkoutSessionCursorPagination
+from .renderers import FastJSONRenderer
+from .serializers import UserProfileSerializer, WorkoutPlanSerializer, WorkoutSessionSerializer
+from .views import UserProfileViewSet, WorkoutPlanViewSet, WorkoutSessionViewSet, plan_queryset, session_queryset
+
+
+def json_response(data, status=200):
+    return HttpResponse(FastJSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def error_response(exc):
+    """Mirror DRF's default exception handler for the errors raised here"""
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    response = json_response(data, status=exc.status_code)
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response['WWW-Authenticate'] = CachedTokenAuthentication.keyword
+    return response
+
+
+def async_api_view(handler):
+    """Authenticate the request, then run ``handler(request, user, profile)``"""
+    async def view(request):
+        try:
+            result = await CachedTokenAuthentication().aauthenticate(request)
+            if result is None:
+                raise exceptions.NotAuthenticated()
+            request.user = user = result[0]
+            # What DRF negotiates for JSON clients; part of the ETag, so both paths agree
+            request.accepted_media_type = FastJSONRenderer.media_type
+            if catalog_stale():
+                # Serializers expand exercises from the catalog; load or refresh it off the event loop
+                await sync_to_async(get_catalog)()
+            try:
+                profile = user.profile
+            except UserProfile.DoesNotExist:
+                profile = None
+            return await handler(request, user, profile)
+        except exceptions.APIException as exc:
+            return error_response(exc)
+    return view
+
+
+def get_or_sync(async_get, sync_view):
+    """Route GETs to ``async_get`` and every other method to the DRF view"""
+    sync_view = sync_to_async(sync_view)
+
+    @csrf_exempt
+    async def view(request, *args, **kwargs):
+        if request.method == 'GET':
+            return await async_get(request)
+        return await sync_view(request, *args, **kwargs)
+    return view
+
+
+async def conditional_json(request, last_modified, fingerprint, build_data):
+    if fingerprint is None:
+        return json_response(await build_data())
+    etag, timestamp, not_modified = evaluate_conditions(request, last_modified, fingerprint)
+    if not_modified is not None:
+        return set_validators(not_modified, etag, timestamp)
+    return set_validators(json_response(await build_data()), etag, timestamp)
+
+
+@async_api_view
+async def profile_detail(request, user, profile):
+    profile = await with_fatigue_summary(UserProfile.objects.select_related('user')).filter(user_id=user.pk).afirst()
+    if profile is None:
+        return json_response({'detail': 'No UserProfile matches the given query.'}, status=404)
+    last_modified, fingerprint = UserProfileViewSet.profile_state(user, profile.updated_at)
+
+    async def build_data():
+        return UserProfileSerializer(profile).data
+    return await conditional_json(request, last_modified, fingerprint, build_data)
+
+
+@async_api_view
+async def plan_list(request, user, profile):
+    queryset = plan_queryset(profile.id if profile else None)
+    state = await queryset.aaggregate(**WorkoutPlanViewSet.conditional_aggregates)
+    last_modified, fingerprint = WorkoutPlanViewSet.conditional_state_from(state)
+
+    async def build_data():
+        plans = [plan async for plan in queryset]
+        return WorkoutPlanSerializer(plans, many=True).data
+    return await conditional_json(request, last_modified, fingerprint, build_data)
+
+
+@async_api_view
+async def session_list(request, user, profile):
+    queryset = session_queryset(profile.id if profile else None, request.GET)
+    state = await queryset.aaggregate(**WorkoutSessionViewSet.conditional_aggregates)
+    last_modified, fingerprint = WorkoutSessionViewSet.conditional_state_from(state)
+
+    async def build_data():
+        paginator = WorkoutSessionCursorPagination()
+        # CursorPagination evaluates the page slice itself; run that one query
+        # off the event loop the same way the async ORM does internally.
+        page = await sync_to_async(paginator.paginate_queryset)(queryset, Request(request))
+        return paginator.get_paginated_response(WorkoutSessionSerializer(page, many=True).data).data
+    return await conditional_json(request, last_modified, fingerprint, build_data)
+
+
+@async_api_view
+async def verify_token(request, user, profile):
+    if profile is None:
+        # Create profile if it doesn't exist
+        profile = await UserProfile.objects.acreate(user=user, name=user.get_full_name() or user.username)
+    return json_response({
+        'id': user.id,
+        'email': user.email,
+        'username': user.username,
+        'name': profile.name,
+    })
@@ -3,14 +3,17 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
-from django.contrib.auth import authenticate
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from .clients import client_address
+from .login import authenticate_login, login_throttle
 from .serializers import LoginSerializer, RegisterSerializer, UserSerializer, UserProfileSerializer
 from .models import UserProfile
 from django.conf import settings
 import base64
 import hashlib
+import math
 # from Crypto.Cipher import AES
 # from Crypto.Util.Padding import unpad
 
@@ -25,39 +28,41 @@ def decrypt_password(encrypted_password):
 def login_view(request):
     serializer = LoginSerializer(data=request.data)
     if serializer.is_valid():
-        email = serializer.validated_data['email']
-        password = decrypt_password(serializer.validated_data['password'])
-        
-        try:
-            user = User.objects.get(email=email)
-            user = authenticate(username=user.username, password=password)
-            
-            if user:
-                token, created = Token.objects.get_or_create(user=user)
-                user_profile, created = UserProfile.objects.get_or_create(
-                    user=user,
-                    defaults={'name': user.get_full_name() or user.username}
-                )
-                
-                return Response({
-                    'token': token.key,
-                    'user': {
-                        'id': user.id,
-                        'email': user.email,
-                        'username': user.username,
-                        'name': user_profile.name
-                    }
-                })
-            else:
-                return Response(
-                    {'message': 'Invalid credentials'}, 
-                    status=status.HTTP_401_UNAUTHORIZED
-                )
-        except User.DoesNotExist:
+        # Stored lowercased (see migration 0013), so the lookup is an exact match
+        email = serializer.validated_data['email'].lower()
+        address = client_address(request)
+
+        # Refuse throttled attempts before any query or password hashing
+        retry_after = login_throttle.retry_after(email, address)
+        if retry_after:
             return Response(
-                {'message': 'User not found'}, 
-                status=status.HTTP_401_UNAUTHORIZED
+                {'message': 'Too many failed login attempts, try again later'},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={'Retry-After': str(math.ceil(retry_after))},
             )
+
+        password = decrypt_password(serializer.validated_data['password'])
+        user, error = authenticate_login(email, password)
+        if user is None:
+            login_throttle.failure(email, address)
+            return Response({'message': error}, status=status.HTTP_401_UNAUTHORIZED)
+        login_throttle.success(email, address)
+
+        token, created = Token.objects.get_or_create(user=user)
+        try:
+            user_profile = user.profile
+        except UserProfile.DoesNotExist:
+            user_profile = UserProfile.objects.create(user=user, name=user.get_full_name() or user.username)
+
+        return Response({
+            'token': token.key,
+            'user': {
+                'id': user.id,
+                'email': user.email,
+                'username': user.username,
+                'name': user_profile.name
+            }
+        })
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['POST'])
@@ -65,54 +70,39 @@ def login_view(request):
 def register_view(request):
     serializer = RegisterSerializer(data=request.data)
     if serializer.is_valid():
-        email = serializer.validated_data['email']
-        username = serializer.validated_data['username']
+        # The unique constraint ignores case; storing one casing keeps lookups exact
+        email = serializer.validated_data['email'].lower()
+        username = User.normalize_username(serializer.validated_data['username'])
         password = decrypt_password(serializer.validated_data['password'])
-        
+
+        # Hash before opening the transaction so it only spans the inserts
+        user = User(username=username, email=email, password=make_password(password))
         try:
-            # Check if user already exists
-            if User.objects.filter(email=email).exists():
-                return Response(
-                    {'message': 'Email already exists'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            if User.objects.filter(username=username).exists():
-                return Response(
-                    {'message': 'Username already exists'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Create user
-            user = User.objects.create_user(
-                username=username,
-                email=email,
-                password=password
-            )
-            
-            # Create user profile
-            user_profile = UserProfile.objects.create(
-                user=user,
-                name=user.get_full_name() or username
-            )
-            
-            # Create token
-            token = Token.objects.create(user=user)
-            
-            return Response({
-                'token': token.key,
-                'user': {
-                    'id': user.id,
-                    'email': user.email,
-                    'username': user.username,
-                    'name': user_profile.name
-                }
-            })
-            
+            # The unique username and email constraints catch taken
+            # accounts, so there are no exists() checks up front
+            with transaction.atomic():
+                user.save()
+                user_profile = UserProfile.objects.create(user=user, name=username)
+                token = Token.objects.create(user=user)
         except IntegrityError:
-            return Response(
-                {'message': 'User already exists'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
+            # Only failed registrations pay for finding out which field clashed
+            if User.objects.filter(email=email).exists():
+                message = 'Email already exists'
+            elif User.objects.filter(username=username).exists():
+                message = 'Username already exists'
+            else:
+                message = 'User already exists'
+            return Response({'message': message}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'token': token.key,
+            'user': {
+                'id': user.id,
+                'email': user.email,
+                'username': user.username,
+                'name': user_profile.name
+            }
+        })
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['GET'])
@@ -139,3 +129,10 @@ def verify_token_view(request):
             'username': user.username,
             'name': user_profile.name
         })
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def logout_view(request):
+    # Deleting the token also evicts it from the auth cache (see signals.py)
+    Token.objects.filter(user=request.user).delete()
+    return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,201 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import exceptions
+from django.contrib.auth.models import User
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+from .models import UserProfile
+
+DEFAULT_TOKEN_CACHE = {
+    'MAX_SIZE': 10000,
+    # Seconds an entry is trusted in this process. Other processes only see a
+    # logout or password change once their copy expires, so keep it short.
+    'TTL': 5,
+    # Name of a Django cache alias shared by every process, or None. When set it
+    # is the only copy: each request reads it, and invalidations reach every
+    # process at once.
+    'CACHE_ALIAS': None,
+    # Seconds entries live in the shared cache
+    'SHARED_TTL': 300,
+}
+
+
+def token_cache_settings():
+    return {**DEFAULT_TOKEN_CACHE, **getattr(settings, 'AUTH_TOKEN_CACHE', {})}
+
+
+class TokenCache:
+    """
+    Token key -> (user, profile), in a shared Django cache when CACHE_ALIAS is
+    set and otherwise in a thread-safe per-process LRU with a short TTL
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._user_keys = {}
+        self._lock = threading.Lock()
+
+    def _shared(self):
+        alias = token_cache_settings()['CACHE_ALIAS']
+        return caches[alias] if alias else None
+
+    @staticmethod
+    def _shared_key(key):
+        return f'auth-token:{key}'
+
+    def get(self, key):
+        shared = self._shared()
+        if shared is not None:
+            # Never answer from a local copy another process may have invalidated
+            return shared.get(self._shared_key(key))
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, user, profile = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    return user, profile
+                self._discard(key)
+        return None
+
+    async def aget(self, key):
+        """get() for async views: a shared cache is read off the event loop"""
+        if self._shared() is None:
+            return self.get(key)
+        return await sync_to_async(self.get)(key)
+
+    def set(self, key, user, profile):
+        shared = self._shared()
+        if shared is not None:
+            shared.set(self._shared_key(key), (user, profile), token_cache_settings()['SHARED_TTL'])
+        else:
+            self._store(key, user, profile)
+
+    def _store(self, key, user, profile):
+        options = token_cache_settings()
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (time.monotonic() + options['TTL'], user, profile)
+            self._user_keys.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > options['MAX_SIZE']:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._user_keys.get(entry[1].pk)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._user_keys[entry[1].pk]
+
+    def invalidate(self, key):
+        with self._lock:
+            self._discard(key)
+        shared = self._shared()
+        if shared is not None:
+            shared.delete(self._shared_key(key))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            keys = set(self._user_keys.get(user_id, ()))
+            for key in keys:
+                self._discard(key)
+        shared = self._shared()
+        if shared is not None:
+            # Other processes may hold this user's token even if we do not
+            keys.update(Token.objects.filter(user_id=user_id).values_list('key', flat=True))
+            shared.delete_many([self._shared_key(key) for key in keys])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that caches token -> (user, profile), so most requests
+    authenticate without touching the database. Entries are dropped on logout,
+    user saves (password changes) and profile saves; see workouts/signals.py.
+    Other processes see those drops at once through a shared cache
+    (AUTH_TOKEN_CACHE['CACHE_ALIAS']), or else within AUTH_TOKEN_CACHE['TTL'].
+
+    Accepts both "Token <key>" and the "Bearer <key>" header the frontend sends.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is None:
+            self.keyword = 'Bearer'
+            try:
+                result = super().authenticate(request)
+            finally:
+                self.keyword = type(self).keyword
+        return result
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            try:
+                token = Token.objects.select_related('user__profile').get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed('Invalid token.')
+            cached = self._cache_token(key, token)
+        return self._user_from_cache(key, cached)
+
+    async def aauthenticate(self, request):
+        """Async counterpart of authenticate() for plain Django async views"""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() not in (b'token', b'bearer'):
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid token header. Token string should not contain invalid characters.')
+
+        cached = await token_cache.aget(key)
+        if cached is None:
+            try:
+                token = await Token.objects.select_related('user__profile').aget(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed('Invalid token.')
+            # May write to the shared cache
+            cached = await sync_to_async(self._cache_token)(key, token)
+        return self._user_from_cache(key, cached)
+
+    @staticmethod
+    def _cache_token(key, token):
+        user = token.user
+        try:
+            profile = user.profile
+        except UserProfile.DoesNotExist:
+            profile = None
+        if user.is_active:
+            token_cache.set(key, user, profile)
+        return user, profile
+
+    @staticmethod
+    def _user_from_cache(key, cached):
+        # Hand each request its own copies so cached instances are never mutated
+        user = copy.copy(cached[0])
+        if cached[1] is not None:
+            user.profile = copy.copy(cached[1])
+        else:
+            # Remember the missing profile so user.profile raises without a query
+            User.profile.related.set_cached_value(user, None)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return (user, key)
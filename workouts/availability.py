@@ -0,0 +1,132 @@
+"""
+Parsing and indexing of UserProfile.availability.
+
+The profile stores availability as free-form JSON, e.g.
+{"Monday": ["18:00-19:00"], "wed": ["06:30-07:15"]}. For queries it is
+normalized into AvailabilitySlot rows (weekday, start minute, end minute)
+and, for in-memory overlap checks, into a bitmask of weekly slots.
+"""
+from django.db import transaction
+from django.db.models import Q
+from .models import AvailabilitySlot, UserProfile
+from .services import WEEKDAYS
+
+MINUTES_PER_DAY = 24 * 60
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = MINUTES_PER_DAY // SLOT_MINUTES
+
+
+def parse_weekday(day):
+    return WEEKDAYS.get(str(day).strip().lower()[:3])
+
+
+def parse_minute(value):
+    """Minutes since midnight for "HH:MM" (24:00 allowed as an end time)"""
+    hours, minutes = value.strip().split(':')
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours <= 24 and 0 <= minutes < 60) or (hours == 24 and minutes):
+        raise ValueError(f'Invalid time {value!r}')
+    return hours * 60 + minutes
+
+
+def parse_range(value):
+    """(start, end) minutes for a "HH:MM-HH:MM" string"""
+    if not isinstance(value, str) or value.count('-') != 1:
+        raise ValueError(f'Invalid time range {value!r}')
+    start, end = (parse_minute(part) for part in value.split('-'))
+    if start >= end:
+        raise ValueError(f'Time range {value!r} must end after it starts')
+    return start, end
+
+
+def parse_availability(availability, strict=False):
+    """Normalize an availability dict into sorted, merged (weekday, start, end) intervals.
+
+    Unknown days and malformed ranges raise ValueError when ``strict``, and are
+    skipped otherwise.
+    """
+    by_day = {}
+    for day, ranges in (availability or {}).items():
+        weekday = parse_weekday(day)
+        if weekday is None or not isinstance(ranges, list):
+            if strict:
+                raise ValueError(f'Invalid day {day!r}')
+            continue
+        for value in ranges:
+            try:
+                by_day.setdefault(weekday, []).append(parse_range(value))
+            except ValueError:
+                if strict:
+                    raise
+
+    intervals = []
+    for weekday in sorted(by_day):
+        merged = []
+        for start, end in sorted(by_day[weekday]):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        intervals.extend((weekday, start, end) for start, end in merged)
+    return intervals
+
+
+def slot_mask(intervals):
+    """Bitmask of the SLOT_MINUTES slots of the week touched by ``intervals``"""
+    mask = 0
+    for weekday, start, end in intervals:
+        first = weekday * SLOTS_PER_DAY + start // SLOT_MINUTES
+        last = weekday * SLOTS_PER_DAY + (end - 1) // SLOT_MINUTES
+        mask |= ((1 << (last - first + 1)) - 1) << first
+    return mask
+
+
+def overlapping_slots(mask_a, mask_b):
+    """(weekday, start minute) of every slot two masks share"""
+    shared = mask_a & mask_b
+    slots = []
+    while shared:
+        low = shared & -shared
+        index = low.bit_length() - 1
+        slots.append((index // SLOTS_PER_DAY, index % SLOTS_PER_DAY * SLOT_MINUTES))
+        shared ^= low
+    return slots
+
+
+def build_slots(profiles):
+    return [
+        AvailabilitySlot(user_profile_id=profile.id, weekday=weekday, start_minute=start, end_minute=end)
+        for profile in profiles
+        for weekday, start, end in parse_availability(profile.availability)
+    ]
+
+
+def sync_availability_slots(profiles, batch_size=1000):
+    """Rewrite the AvailabilitySlot rows of ``profiles`` from their availability JSON"""
+    with transaction.atomic():
+        AvailabilitySlot.objects.filter(user_profile_id__in=[profile.id for profile in profiles]).delete()
+        AvailabilitySlot.objects.bulk_create(build_slots(profiles), batch_size=batch_size)
+
+
+def profile_mask(profile_id):
+    """Weekly slot bitmask of a profile, read from the index"""
+    return slot_mask(AvailabilitySlot.objects.filter(user_profile_id=profile_id).values_list(
+        'weekday', 'start_minute', 'end_minute'
+    ))
+
+
+def profiles_free_at(weekday, minute):
+    """Profiles with a slot covering ``minute`` (since midnight) on ``weekday``"""
+    return profiles_free_between(weekday, minute, minute + 1)
+
+
+def profiles_free_between(weekday, start, end):
+    """Profiles with one slot covering the whole [start, end) window on ``weekday``"""
+    slots = AvailabilitySlot.objects.filter(weekday=weekday, start_minute__lte=start, end_minute__gte=end)
+    return UserProfile.objects.filter(id__in=slots.values('user_profile_id'))
+
+
+def profiles_overlapping(weekday, start, end):
+    """Profiles with any availability overlapping the [start, end) window on ``weekday``"""
+    slots = AvailabilitySlot.objects.filter(Q(weekday=weekday) & Q(start_minute__lt=end) & Q(end_minute__gt=start))
+    return UserProfile.objects.filter(id__in=slots.values('user_profile_id'))
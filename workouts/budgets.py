@@ -0,0 +1,77 @@
+"""
+Declared query and latency budgets for the API routes.
+
+Each (URL name, method) in workouts/urls.py gets a ceiling on SQL queries
+and on wall time. Counts are for a cold token cache with realistic data
+volumes; none of them may grow with the number of rows. RouteBudgetTests in
+workouts/tests.py checks every route's query count against this table, and
+its wall time too when BUDGET_CHECK_TIMES=1 is set in the environment. In
+development, QUERY_BUDGET_MODE = 'log' or 'raise' makes
+RequestMetricsMiddleware warn about or fail requests that run too many
+queries; going over the time budget is only logged.
+"""
+import logging
+from collections import namedtuple
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+Budget = namedtuple('Budget', ['queries', 'ms'])
+
+# Password hashing dominates these; see PASSWORD_HASHERS
+SLOW_AUTH_MS = 2000
+
+ROUTE_BUDGETS = {
+    ('api-root', 'GET'): Budget(1, 250),
+    ('login', 'POST'): Budget(5, SLOW_AUTH_MS),
+    ('register', 'POST'): Budget(6, SLOW_AUTH_MS),
+    ('verify-token', 'GET'): Budget(1, 100),
+    ('logout', 'POST'): Budget(5, 100),
+    ('sync', 'GET'): Budget(4, 250),
+    ('user-profile-list', 'GET'): Budget(3, 100),
+    ('user-profile-detail', 'GET'): Budget(3, 100),
+    ('user-profile-detail', 'PATCH'): Budget(9, 150),
+    ('workout-plans-list', 'GET'): Budget(4, 250),
+    ('workout-plans-list', 'POST'): Budget(3, 100),
+    ('workout-plans-detail', 'GET'): Budget(4, 150),
+    ('workout-plans-detail', 'DELETE'): Budget(15, 250),
+    ('workout-plans-regenerate', 'POST'): Budget(3, 100),
+    ('workout-sessions-list', 'GET'): Budget(3, 150),
+    ('workout-sessions-detail', 'GET'): Budget(3, 100),
+    ('workout-sessions-detail', 'PATCH'): Budget(8, 100),
+    ('workout-sessions-detail', 'DELETE'): Budget(11, 100),
+    ('workout-sessions-update-status', 'POST'): Budget(9, 100),
+    ('workout-sessions-bulk-update-status', 'POST'): Budget(10, 250),
+    ('workout-sessions-export', 'GET'): Budget(2, 250),
+    ('jobs-list', 'GET'): Budget(2, 100),
+    ('jobs-detail', 'GET'): Budget(2, 100),
+    ('fatigue-list', 'GET'): Budget(2, 150),
+    ('fatigue-list', 'POST'): Budget(6, 100),
+    ('weekly-stats-list', 'GET'): Budget(3, 100),
+    ('weekly-stats-detail', 'GET'): Budget(3, 100),
+    ('exercises-list', 'GET'): Budget(1, 100),
+    ('exercises-detail', 'GET'): Budget(1, 100),
+}
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+def check_budget(route, method, queries, duration):
+    """Log or raise, per QUERY_BUDGET_MODE, when a request went over its route's budget"""
+    mode = getattr(settings, 'QUERY_BUDGET_MODE', 'off')
+    budget = ROUTE_BUDGETS.get((route, method))
+    if mode == 'off' or budget is None:
+        return
+
+    problems = []
+    if queries > budget.queries:
+        problems.append(f'{queries} queries (budget {budget.queries})')
+    if problems and mode == 'raise':
+        raise BudgetExceeded(f'{method} {route} went over budget: ' + ', '.join(problems))
+    # Wall time depends on the machine and its load, so it is only ever logged
+    if duration * 1000 > budget.ms:
+        problems.append(f'{duration * 1000:.0f} ms (budget {budget.ms} ms)')
+    if problems:
+        logger.warning('%s %s went over budget: %s', method, route, ', '.join(problems))
@@ -0,0 +1,200 @@
+"""
+In-memory exercise catalog.
+
+The Exercise table is small and read on every plan build and session
+serialization, so each process keeps the whole catalog in memory: it is
+loaded at startup (see warm_catalog) or on first use, and dropped whenever an
+Exercise is saved or deleted in this process. Other processes notice the
+change within EXERCISE_CATALOG['TTL'] seconds: they then compare a version
+kept in a shared cache (EXERCISE_CATALOG['CACHE_ALIAS']), or without one
+simply reload. Sessions store exercises as {"exercise": <id>, "sets": ..,
+"reps": ..}; the catalog adds the names back when they are serialized.
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, transaction
+from .models import Exercise
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG = {
+    # Seconds a process uses its copy before checking for changes made elsewhere
+    'TTL': 30,
+    # Name of a Django cache alias shared by every process, or None. When set,
+    # saves bump a generation there and the check is one cache read; without
+    # it the check reloads the table.
+    'CACHE_ALIAS': None,
+}
+
+GENERATION_KEY = 'exercise-catalog:generation'
+
+
+def catalog_settings():
+    return {**DEFAULT_CATALOG, **getattr(settings, 'EXERCISE_CATALOG', {})}
+
+
+def _shared():
+    alias = catalog_settings()['CACHE_ALIAS']
+    return caches[alias] if alias else None
+
+
+def normalize_equipment(equipment):
+    """Lowercased equipment names; "None" (no equipment) is dropped"""
+    names = {str(item).strip().lower() for item in equipment or []}
+    names.discard('none')
+    names.discard('')
+    return frozenset(names)
+
+
+class ExerciseCatalog:
+    def __init__(self, exercises, generation=None):
+        self.exercises = sorted(exercises, key=lambda exercise: (exercise.priority, exercise.id))
+        self.generation = generation
+        self.checked_at = time.monotonic()
+        # The same in every process holding the same exercises, so it can go
+        # into ETags; covers what expand() adds to API output
+        self.version = hashlib.md5(
+            repr(sorted((exercise.id, exercise.name) for exercise in self.exercises)).encode(),
+            usedforsecurity=False,
+        ).hexdigest()[:12]
+        self.by_id = {exercise.id: exercise for exercise in self.exercises}
+        self.by_name = {exercise.name.lower(): exercise for exercise in self.exercises}
+        # Equipment-requirement index: each distinct requirement set maps to
+        # its exercises, so matching a profile is a handful of subset checks
+        # rather than a pass over every exercise.
+        self.by_requirement = {}
+        for exercise in self.exercises:
+            self.by_requirement.setdefault(normalize_equipment(exercise.equipment), []).append(exercise)
+        self._available = {}
+        self._lock = threading.Lock()
+
+    def available(self, equipment):
+        """Exercises doable with ``equipment``, in priority order"""
+        have = normalize_equipment(equipment)
+        cached = self._available.get(have)
+        if cached is None:
+            cached = sorted(
+                (exercise for needs, exercises in self.by_requirement.items() if needs <= have
+                 for exercise in exercises),
+                key=lambda exercise: (exercise.priority, exercise.id),
+            )
+            with self._lock:
+                self._available[have] = cached
+        return cached
+
+    def session_template(self, equipment):
+        """One preferred exercise per category for a profile's equipment, in compact form"""
+        picked = {}
+        for exercise in self.available(equipment):
+            picked.setdefault(exercise.category, exercise)
+        return [
+            {'exercise': exercise.id, 'sets': exercise.default_sets, 'reps': exercise.default_reps}
+            for category, _ in Exercise.CATEGORY_CHOICES
+            if (exercise := picked.get(category)) is not None
+        ]
+
+    def compact(self, exercises):
+        """Replace catalog names with ids; unknown exercises are kept as they are"""
+        compacted = []
+        for item in exercises:
+            exercise = None
+            if isinstance(item, dict) and 'exercise' not in item and isinstance(item.get('name'), str):
+                exercise = self.by_name.get(item['name'].lower())
+            if exercise is None:
+                compacted.append(item)
+                continue
+            compacted.append({'exercise': exercise.id, **{k: v for k, v in item.items() if k != 'name'}})
+        return compacted
+
+    def expand(self, exercises):
+        """Add the catalog name to compact entries, for API output"""
+        if not isinstance(exercises, list):
+            return exercises
+        expanded = []
+        for item in exercises:
+            exercise = self.by_id.get(item.get('exercise')) if isinstance(item, dict) else None
+            if exercise is None:
+                expanded.append(item)
+            else:
+                expanded.append({'exercise': exercise.id, 'name': exercise.name,
+                                 **{k: v for k, v in item.items() if k != 'exercise'}})
+        return expanded
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    global _catalog
+    catalog = _catalog
+    if catalog is None or (catalog_stale() and not _on_event_loop()):
+        with _catalog_lock:
+            if _catalog is catalog:
+                _catalog = _refresh(catalog)
+            catalog = _catalog
+    return catalog
+
+
+def _refresh(catalog):
+    shared = _shared()
+    generation = None
+    if shared is not None:
+        # Read before the rows: a save committing in between bumps it again
+        generation = shared.get(GENERATION_KEY)
+        if generation is None:
+            shared.add(GENERATION_KEY, uuid.uuid4().hex, None)
+            generation = shared.get(GENERATION_KEY)
+        elif catalog is not None and generation == catalog.generation:
+            catalog.checked_at = time.monotonic()
+            return catalog
+    return ExerciseCatalog(list(Exercise.objects.all()), generation)
+
+
+def _on_event_loop():
+    # Async views refresh through catalog_stale() before they start; never block the loop here
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def catalog_stale():
+    """Whether the next get_catalog() outside the event loop will check for changes"""
+    catalog = _catalog
+    return catalog is None or time.monotonic() - catalog.checked_at > catalog_settings()['TTL']
+
+
+def catalog_version():
+    """Version of the catalog that serializes the response, for ETags of responses that expand exercises"""
+    return get_catalog().version
+
+
+def invalidate_catalog(**kwargs):
+    global _catalog
+    _catalog = None
+    # Again once the change is visible, in case this process reloaded in between
+    transaction.on_commit(_publish_change)
+
+
+def _publish_change():
+    global _catalog
+    _catalog = None
+    shared = _shared()
+    if shared is not None:
+        shared.set(GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def warm_catalog():
+    """Load the catalog at process start; a missing table (before migrate) is not fatal"""
+    try:
+        get_catalog()
+    except DatabaseError:
+        logger.warning('Exercise catalog not loaded; has the database been migrated?')
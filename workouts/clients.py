@@ -0,0 +1,23 @@
+"""
+The client address behind reverse proxies.
+
+REMOTE_ADDR is the proxy's address when the app runs behind one, so every
+client would share one login throttle bucket and one metrics allowance.
+Set CLIENT_ADDRESS_HEADER to the header the proxies fill in (as a META
+key, e.g. 'HTTP_X_FORWARDED_FOR') and TRUSTED_PROXY_COUNT to how many of
+them append to it. Clients can send the header too, so only the entries
+added by the trusted proxies are believed: the one TRUSTED_PROXY_COUNT
+from the right is the address the outermost proxy saw.
+"""
+from django.conf import settings
+
+
+def client_address(request):
+    """The address the request came from, or None when unknown"""
+    address = request.META.get('REMOTE_ADDR')
+    header = settings.CLIENT_ADDRESS_HEADER
+    if header:
+        hops = [hop.strip() for hop in request.META.get(header, '').split(',') if hop.strip()]
+        if hops:
+            address = hops[-min(settings.TRUSTED_PROXY_COUNT, len(hops))]
+    return address or None
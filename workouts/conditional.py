@@ -0,0 +1,87 @@
+import hashlib
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def get_etag(request, fingerprint):
+    # The same URL serves different users and renderers, so both are part of the tag
+    key = '|'.join([
+        str(request.user.pk),
+        request.get_full_path(),
+        getattr(request, 'accepted_media_type', '') or '',
+        fingerprint,
+    ])
+    return quote_etag(hashlib.md5(key.encode(), usedforsecurity=False).hexdigest())
+
+
+def evaluate_conditions(request, last_modified, fingerprint):
+    """
+    Return (etag, timestamp, not_modified) for a response whose rows last
+    changed at ``last_modified``. ``not_modified`` is a 304 response when the
+    request's If-None-Match / If-Modified-Since headers still match, else None.
+    """
+    etag = get_etag(request, fingerprint)
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return etag, timestamp, get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def set_validators(response, etag, timestamp):
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    # Let browsers keep the body but revalidate it on every use
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Answer list/retrieve GETs with ETag and Last-Modified headers computed from
+    aggregate timestamps, and return 304 before anything is serialized when
+    the client's copy is still current.
+
+    Viewsets either set conditional_aggregates (aggregate expressions run on
+    the response's queryset) and implement conditional_state_from(state), or
+    override get_conditional_state(queryset). Both produce the latest change
+    time of the rows in the response and a fingerprint string that also
+    changes when rows are deleted (e.g. including a row count).
+    """
+    conditional_aggregates = None
+
+    @staticmethod
+    def conditional_state_from(state):
+        raise NotImplementedError
+
+    def get_conditional_state(self, queryset):
+        return self.conditional_state_from(queryset.aggregate(**self.conditional_aggregates))
+
+    def conditional_response(self, request, queryset, build_response):
+        last_modified, fingerprint = self.get_conditional_state(queryset)
+        if fingerprint is None:
+            return build_response()
+
+        etag, timestamp, response = evaluate_conditions(request, last_modified, fingerprint)
+        if response is None:
+            response = build_response()
+            if response.status_code != 200:
+                return response
+        return set_validators(response, etag, timestamp)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(
+            request, queryset, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (TypeError, ValueError, ValidationError):
+            # Malformed lookup values are left to get_object() to turn into a 404
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(
+            request, queryset, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        )
@@ -0,0 +1,46 @@
+"""
+Rolling fatigue aggregates over the append-only FatigueEntry series.
+
+Profiles only expose a summary (latest entry and the average of the last
+FATIGUE_WINDOW_DAYS days). Views annotate it onto the profile queryset with
+index-backed subqueries, so reading a profile costs the same however long
+the history grows.
+"""
+import datetime
+from django.db.models import Avg, Count, OuterRef, Subquery
+from django.utils import timezone
+from .models import FatigueEntry, UserProfile
+
+FATIGUE_WINDOW_DAYS = 7
+
+
+def with_fatigue_summary(queryset, today=None):
+    """Annotate profiles with fatigue_latest_level/_date and fatigue_window_avg/_count"""
+    if today is None:
+        today = timezone.localdate()
+    entries = FatigueEntry.objects.filter(user_profile=OuterRef('pk'))
+    latest = entries.order_by('-date', '-id')
+    # Group by profile so each subquery returns one aggregate row
+    window = entries.filter(
+        date__gt=today - datetime.timedelta(days=FATIGUE_WINDOW_DAYS), date__lte=today
+    ).values('user_profile')
+    return queryset.annotate(
+        fatigue_latest_level=Subquery(latest.values('level')[:1]),
+        fatigue_latest_date=Subquery(latest.values('date')[:1]),
+        fatigue_window_avg=Subquery(window.annotate(value=Avg('level')).values('value')),
+        fatigue_window_count=Subquery(window.annotate(value=Count('id')).values('value')),
+    )
+
+
+def fatigue_summary(profile):
+    """The fatigue summary of a profile, from its annotations when the queryset added them"""
+    if not hasattr(profile, 'fatigue_window_avg'):
+        profile = with_fatigue_summary(UserProfile.objects.filter(pk=profile.pk)).get()
+    average = profile.fatigue_window_avg
+    return {
+        'latest_level': profile.fatigue_latest_level,
+        'latest_date': profile.fatigue_latest_date.isoformat() if profile.fatigue_latest_date else None,
+        'window_days': FATIGUE_WINDOW_DAYS,
+        'window_average': round(average, 2) if average is not None else None,
+        'window_count': profile.fatigue_window_count or 0,
+    }
@@ -0,0 +1,132 @@
+"""
+Background jobs for plan generation and regeneration.
+
+Every job is a Job row, so its status can be read from /api/jobs/<id>/ no
+matter which backend runs it. The backend is chosen with the JOB_BACKEND
+setting:
+
+- ThreadPoolBackend (default) runs jobs on an in-process thread pool.
+- DatabaseBackend only leaves the row queued; `manage.py run_jobs` workers
+  claim and run queued rows, so no external broker is needed. They also
+  requeue jobs left running longer than JOB_TIMEOUT, e.g. by a worker that
+  crashed mid-job.
+- ImmediateBackend runs jobs inline, which is handy in tests and scripts.
+"""
+import datetime
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import Job, WorkoutPlan
+from .services import generate_workout_plan, regenerate_workout_plan
+
+logger = logging.getLogger(__name__)
+
+
+def generate_plan(job):
+    plan, sessions = generate_workout_plan(job.user_profile, weeks=job.params['weeks'])
+    return {'plan_id': plan.id, 'sessions': len(sessions)}
+
+
+def regenerate_plan(job):
+    plan = WorkoutPlan.objects.select_related('user_profile').get(
+        id=job.params['plan_id'], user_profile_id=job.user_profile_id
+    )
+    return {'plan_id': plan.id, 'changes': regenerate_workout_plan(plan)}
+
+
+JOB_HANDLERS = {
+    'generate_plan': generate_plan,
+    'regenerate_plan': regenerate_plan,
+}
+
+
+def run_job(job_id):
+    """Claim a queued job and run it, recording the result or the error.
+
+    Returns False when another worker claimed the job first.
+    """
+    # started_at identifies this claim, so a run that was requeued as stale can't record its outcome later
+    started_at = timezone.now()
+    claimed = Job.objects.filter(id=job_id, status='queued').update(status='running', started_at=started_at)
+    if not claimed:
+        return False
+
+    job = Job.objects.select_related('user_profile').get(id=job_id)
+    try:
+        job.result = JOB_HANDLERS[job.kind](job)
+        job.status = 'succeeded'
+    except Exception:
+        logger.exception('Job %s (%s) failed', job.id, job.kind)
+        job.status = 'failed'
+        job.error = traceback.format_exc()
+    job.finished_at = timezone.now()
+    recorded = Job.objects.filter(id=job_id, status='running', started_at=started_at).update(
+        status=job.status, result=job.result, error=job.error, finished_at=job.finished_at
+    )
+    if not recorded:
+        logger.warning('Job %s (%s) was requeued while running; its outcome is dropped', job.id, job.kind)
+    return True
+
+
+def requeue_stale_jobs(timeout):
+    """Put jobs that have been running for over ``timeout`` seconds back in the queue.
+
+    Returns how many were requeued. A worker that dies mid-job never finishes
+    its row, so without this the job would stay 'running' forever.
+    """
+    cutoff = timezone.now() - datetime.timedelta(seconds=timeout)
+    return Job.objects.filter(status='running', started_at__lt=cutoff).update(status='queued', started_at=None)
+
+
+class ImmediateBackend:
+    def submit(self, job_id):
+        run_job(job_id)
+
+
+class DatabaseBackend:
+    def submit(self, job_id):
+        # The row is already queued; a run_jobs worker will pick it up
+        pass
+
+
+class ThreadPoolBackend:
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'JOB_WORKERS', 4), thread_name_prefix='workouts-job'
+        )
+
+    def submit(self, job_id):
+        self._executor.submit(self._run, job_id)
+
+    @staticmethod
+    def _run(job_id):
+        close_old_connections()
+        try:
+            run_job(job_id)
+        finally:
+            # Worker threads open their own connections; don't leak them
+            close_old_connections()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = import_string(getattr(settings, 'JOB_BACKEND', 'workouts.jobs.ThreadPoolBackend'))()
+        return _backend
+
+
+def enqueue(user_profile, kind, **params):
+    """Record a job and hand it to the backend once the row is committed"""
+    job = Job.objects.create(user_profile=user_profile, kind=kind, params=params)
+    transaction.on_commit(lambda: get_backend().submit(job.id))
+    return job
@@ -0,0 +1,106 @@
+"""
+Password login: one indexed lookup, and a throttle that runs before hashing.
+
+authenticate_login() finds the user by email (indexed by migration 0010)
+with the profile joined in, and checks the password once. Each check costs
+a full run of the first PASSWORD_HASHERS entry. LoginThrottle counts recent
+failures per email and client address pair, and per client address (see
+workouts/clients.py). Once either is over its limit, login_view answers 429
+without touching the database or the hasher, so a flood of guesses can't tie
+up CPU that real logins need. Emails are only counted together with the
+address, so nobody can lock an account's owner out by failing on purpose.
+Counts are kept per process.
+"""
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+
+DEFAULT_LOGIN_THROTTLE = {
+    # Failed attempts allowed per email from one address, and per address, in WINDOW seconds
+    'MAX_FAILURES': 5,
+    'MAX_FAILURES_PER_ADDRESS': 50,
+    'WINDOW': 300,
+    # Most (email and address, or address) keys remembered; the least recently failed go first
+    'MAX_SIZE': 100000,
+}
+
+
+def login_throttle_settings():
+    return {**DEFAULT_LOGIN_THROTTLE, **getattr(settings, 'LOGIN_THROTTLE', {})}
+
+
+class LoginThrottle:
+    """Thread-safe fixed-window counts of failed logins per email and address, and per address"""
+
+    def __init__(self):
+        self._failures = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(email, address):
+        options = login_throttle_settings()
+        keys = [(('email', email.strip().lower(), address), options['MAX_FAILURES'])]
+        if address:
+            keys.append((('address', address), options['MAX_FAILURES_PER_ADDRESS']))
+        return keys
+
+    def retry_after(self, email, address):
+        """Seconds until another attempt is allowed, or 0 when it is allowed now"""
+        now = time.monotonic()
+        wait = 0
+        with self._lock:
+            for key, limit in self._keys(email, address):
+                entry = self._failures.get(key)
+                if entry is None:
+                    continue
+                expires, count = entry
+                if expires <= now:
+                    del self._failures[key]
+                elif count >= limit:
+                    wait = max(wait, expires - now)
+        return wait
+
+    def failure(self, email, address):
+        options = login_throttle_settings()
+        now = time.monotonic()
+        with self._lock:
+            for key, _ in self._keys(email, address):
+                entry = self._failures.pop(key, None)
+                if entry is None or entry[0] <= now:
+                    entry = (now + options['WINDOW'], 0)
+                self._failures[key] = (entry[0], entry[1] + 1)
+            while len(self._failures) > options['MAX_SIZE']:
+                self._failures.popitem(last=False)
+
+    def success(self, email, address):
+        with self._lock:
+            self._failures.pop(('email', email.strip().lower(), address), None)
+
+    def clear(self):
+        with self._lock:
+            self._failures.clear()
+
+
+login_throttle = LoginThrottle()
+
+
+def authenticate_login(email, password):
+    """
+    Return (user, None) for a matching active user, else (None, message).
+
+    Stands in for authenticate(), which would look the user up a second time
+    by username. Like ModelBackend, it hashes the password even when the email
+    is unknown, and the message is the same either way, so neither the
+    response nor its timing gives away which emails are registered.
+    """
+    user = User.objects.select_related('profile').filter(email=email).order_by('id').first()
+    if user is None:
+        make_password(password)
+        return None, 'Invalid credentials'
+    # check_password re-hashes with the preferred hasher when that changed
+    if not user.check_password(password) or not user.is_active:
+        return None, 'Invalid credentials'
+    return user, None
@@ -0,0 +1,42 @@
+import sqlite3
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the SQLite default database onto every SQLite replica in DB_REPLICAS, using the '
+        'online backup API, so the read-replica setup can be tried locally. With --interval it '
+        'keeps refreshing, which behaves like a replica lagging by up to that many seconds.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Seconds between copies; 0 copies once and exits')
+
+    def handle(self, *args, **options):
+        source = connections['default'].settings_dict
+        if source['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('The default database is not SQLite')
+        replicas = [
+            connections[alias].settings_dict['NAME'] for alias in connections
+            if alias != 'default' and connections[alias].settings_dict['ENGINE'] == 'django.db.backends.sqlite3'
+        ]
+        if not replicas:
+            raise CommandError('No SQLite replicas configured; set DB_REPLICAS')
+
+        while True:
+            started = time.monotonic()
+            with sqlite3.connect(source['NAME']) as primary:
+                for name in replicas:
+                    # The backup is a consistent snapshot even while the primary takes writes
+                    with sqlite3.connect(name) as replica:
+                        primary.backup(replica)
+                    replica.close()
+            primary.close()
+            self.stdout.write(f'Copied {source["NAME"]} to {len(replicas)} replica(s) '
+                              f'in {(time.monotonic() - started) * 1000:.0f} ms')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,172 @@
+import csv
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+from django.utils.module_loading import import_string
+from rest_framework.authtoken.models import Token
+from workouts.models import UserProfile
+
+
+def hash_passwords(hasher_path, passwords):
+    """Hash a batch of passwords (None gives an unusable password) without needing Django settings"""
+    hasher = import_string(hasher_path)()
+    return [
+        make_password(None) if password is None else hasher.encode(password, hasher.salt())
+        for password in passwords
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Create users, with profiles and optionally API tokens, from a CSV file with columns '
+        'email, username and optionally name and password. Rows without a password get an '
+        'unusable one. Each batch is checked for taken emails and usernames with two queries, '
+        'its passwords are hashed in worker processes, and it is written with bulk inserts in '
+        'one transaction. Invalid or taken rows are reported and skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', type=Path)
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users per transaction')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Worker processes hashing passwords (0 hashes in this process)')
+        parser.add_argument('--tokens', action='store_true', help='Also create an API token for every user')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        if not options['csv_file'].exists():
+            raise CommandError(f"{options['csv_file']} does not exist")
+        self.hasher_path = settings.PASSWORD_HASHERS[0]
+        self.seen_emails = set()
+        self.seen_usernames = set()
+        self.created = self.skipped = 0
+
+        executor = ProcessPoolExecutor(max_workers=options['workers']) if options['workers'] > 0 else None
+        started = time.monotonic()
+        try:
+            # Hash the next batches while the current one is written
+            pending = deque()
+            window = max(1, options['workers']) * 2
+            for batch in self.read_batches(options['csv_file'], options['batch_size']):
+                batch = self.drop_taken(batch)
+                if not batch:
+                    continue
+                pending.append((batch, self.submit(executor, [row['password'] for row in batch])))
+                if len(pending) >= window:
+                    self.finish(pending.popleft(), options['tokens'], started)
+            while pending:
+                self.finish(pending.popleft(), options['tokens'], started)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(f'Done: {self.created} users created, {self.skipped} rows skipped'))
+
+    def read_batches(self, path, size):
+        """Yield lists of valid rows, reporting and skipping the rest"""
+        with path.open(newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            missing = {'email', 'username'} - set(reader.fieldnames or [])
+            if missing:
+                raise CommandError(f"Missing CSV columns: {', '.join(sorted(missing))}")
+            batch = []
+            for line, raw in enumerate(reader, start=2):
+                row = self.clean_row(line, raw)
+                if row is not None:
+                    batch.append(row)
+                if len(batch) >= size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+    def clean_row(self, line, raw):
+        # Lowercased whole, like register and login; the unique constraint ignores case
+        email = (raw.get('email') or '').strip().lower()
+        username = User.normalize_username((raw.get('username') or '').strip())
+        try:
+            validate_email(email)
+        except ValidationError:
+            return self.skip(line, f'invalid email {email!r}')
+        if not username or len(username) > 150:
+            return self.skip(line, f'invalid username {username!r}')
+        if email in self.seen_emails or username in self.seen_usernames:
+            return self.skip(line, 'email or username repeated in the file')
+        self.seen_emails.add(email)
+        self.seen_usernames.add(username)
+        return {
+            'line': line, 'email': email, 'username': username,
+            'name': (raw.get('name') or '').strip()[:100] or username,
+            'password': raw.get('password') or None,
+        }
+
+    def skip(self, line, reason):
+        self.skipped += 1
+        self.stderr.write(f'line {line}: skipped, {reason}')
+        return None
+
+    def drop_taken(self, batch):
+        taken_emails = set(
+            User.objects.alias(email_lower=Lower('email')).filter(email_lower__in=[row['email'] for row in batch])
+            .values_list(Lower('email'), flat=True)
+        )
+        taken_usernames = set(
+            User.objects.filter(username__in=[row['username'] for row in batch]).values_list('username', flat=True)
+        )
+        kept = []
+        for row in batch:
+            if row['email'] in taken_emails:
+                self.skip(row['line'], f"email {row['email']} already exists")
+            elif row['username'] in taken_usernames:
+                self.skip(row['line'], f"username {row['username']} already exists")
+            else:
+                kept.append(row)
+        return kept
+
+    def submit(self, executor, passwords):
+        if executor is None:
+            return hash_passwords(self.hasher_path, passwords)
+        return executor.submit(hash_passwords, self.hasher_path, passwords)
+
+    def finish(self, item, tokens, started):
+        batch, result = item
+        hashes = result if isinstance(result, list) else result.result()
+        users = [
+            User(username=row['username'], email=row['email'], password=password)
+            for row, password in zip(batch, hashes)
+        ]
+        try:
+            with transaction.atomic():
+                self.insert(batch, users, tokens)
+        except IntegrityError:
+            # Someone registered one of these since drop_taken(); retry row by row
+            for row, user in zip(batch, users):
+                user.pk = None
+                try:
+                    with transaction.atomic():
+                        self.insert([row], [user], tokens)
+                except IntegrityError:
+                    self.skip(row['line'], 'email or username already exists')
+                    continue
+                self.created += 1
+        else:
+            self.created += len(users)
+        elapsed = time.monotonic() - started
+        self.stdout.write(f'{self.created} users created | {self.created / elapsed if elapsed else 0:.0f} users/s')
+
+    @staticmethod
+    def insert(rows, users, tokens):
+        User.objects.bulk_create(users)
+        UserProfile.objects.bulk_create([UserProfile(user=user, name=row['name']) for row, user in zip(rows, users)])
+        if tokens:
+            Token.objects.bulk_create([Token(user=user, key=Token.generate_key()) for user in users])
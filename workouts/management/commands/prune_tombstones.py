@@ -0,0 +1,36 @@
+import datetime
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from workouts.models import Tombstone, UserProfile
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete tombstones older than --days (SYNC_TOMBSTONE_DAYS by default). Each affected '
+        'profile remembers the newest change number pruned, and /api/sync/ answers older cursors '
+        'with a full snapshot instead of a delta that would miss the deletions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.SYNC_TOMBSTONE_DAYS,
+                            help='Keep tombstones at most this many days old')
+
+    def handle(self, *args, **options):
+        if options['days'] < 0:
+            raise CommandError('--days must not be negative')
+        cutoff = timezone.now() - datetime.timedelta(days=options['days'])
+        old = Tombstone.objects.filter(deleted_at__lt=cutoff)
+        newest_pruned = old.filter(user_profile_id=OuterRef('id')).values('user_profile_id').annotate(
+            seq=Max('change_seq')
+        ).values('seq')
+        with transaction.atomic():
+            # Raised in the same transaction as the delete, so no sync sees the deletions gone but not this
+            profiles = UserProfile.objects.filter(id__in=old.values('user_profile_id')).update(
+                pruned_seq=Greatest('pruned_seq', Subquery(newest_pruned))
+            )
+            deleted, _ = old.delete()
+        self.stdout.write(f'Pruned {deleted} tombstone(s) of {profiles} profile(s) older than {cutoff:%Y-%m-%d %H:%M}')
@@ -0,0 +1,156 @@
+import datetime
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from workouts.models import UserProfile, WorkoutPlan, WorkoutSession
+from workouts.services import apply_schedule_diffs, compute_plan_diffs, plan_exercises
+
+
+class Command(BaseCommand):
+    help = (
+        'Regenerate the future planned sessions of every plan, e.g. after the exercise '
+        'template changes. Schedules are computed in worker processes and written back '
+        'in batches, one transaction per chunk of profiles.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Worker processes computing schedules (0 computes in this process)')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Profiles per chunk')
+        parser.add_argument('--checkpoint', type=Path,
+                            help='File recording the last finished profile id; an existing file resumes the run')
+        parser.add_argument('--start-after', type=int, default=0, help='Skip profiles with an id up to this one')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        checkpoint = options['checkpoint']
+        start_after = options['start_after']
+        if checkpoint and checkpoint.exists():
+            start_after = max(start_after, int(checkpoint.read_text().strip() or 0))
+            self.stdout.write(f'Resuming after profile {start_after}')
+
+        today = datetime.date.today()
+        total = UserProfile.objects.filter(id__gt=start_after).count()
+        chunks = self.chunk_ids(start_after, options['chunk_size'])
+
+        executor = ProcessPoolExecutor(max_workers=options['workers']) if options['workers'] > 0 else None
+        done = 0
+        totals = defaultdict(int)
+        started = time.monotonic()
+        try:
+            # Keep a bounded number of chunks in flight so memory stays flat
+            pending = deque()
+            window = max(1, options['workers']) * 2
+            for chunk in chunks:
+                payload = self.load_chunk(chunk, today)
+                pending.append((chunk, payload, self.submit(executor, payload, today)))
+                if len(pending) >= window:
+                    done += self.finish(pending.popleft(), checkpoint, totals)
+                    self.report(done, total, totals, started)
+            while pending:
+                done += self.finish(pending.popleft(), checkpoint, totals)
+                self.report(done, total, totals, started)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        if checkpoint and checkpoint.exists():
+            checkpoint.unlink()
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {done} profiles, {totals['plans']} plans changed, {totals['created']} sessions created, "
+            f"{totals['updated']} updated, {totals['deleted']} deleted, "
+            f"{totals['skipped']} skipped as their sessions changed meanwhile (run again to retry them)"
+        ))
+
+    @staticmethod
+    def chunk_ids(start_after, size):
+        """Yield profile ids in ascending chunks, paging by id rather than holding a cursor open"""
+        last_id = start_after
+        while True:
+            chunk = list(
+                UserProfile.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:size]
+            )
+            if not chunk:
+                return
+            yield chunk
+            last_id = chunk[-1]
+
+    @staticmethod
+    def load_chunk(profile_ids, today):
+        """Read the chunk's still-running plans and their sessions as plain tuples"""
+        plans = [
+            (plan_id, profile_id, availability, plan_exercises(equipment), start_date, weeks)
+            for plan_id, profile_id, availability, equipment, start_date, weeks in WorkoutPlan.objects.filter(
+                user_profile_id__in=profile_ids
+            ).values_list(
+                'id', 'user_profile_id', 'user_profile__availability', 'user_profile__equipment', 'start_date', 'weeks'
+            )
+            if start_date + datetime.timedelta(weeks=weeks) > today
+        ]
+        existing = defaultdict(list)
+        sessions = WorkoutSession.objects.filter(plan_id__in=[plan[0] for plan in plans]).values_list(
+            'plan_id', 'id', 'date', 'status', 'exercises'
+        )
+        for plan_id, *row in sessions:
+            existing[plan_id].append(tuple(row))
+        return [(*plan, existing[plan[0]]) for plan in plans]
+
+    @staticmethod
+    def submit(executor, payload, today):
+        if executor is None:
+            return compute_plan_diffs(payload, today)
+        return executor.submit(compute_plan_diffs, payload, today)
+
+    @staticmethod
+    def drop_changed(diffs, payload):
+        """Lock the sessions of the diffs' plans and keep the diffs whose sessions are still as loaded.
+
+        Chunks are applied a while after they were read, and a session marked
+        completed in between must not be moved or deleted by a stale diff.
+        """
+        loaded = {plan[0]: sorted(plan[-1]) for plan in payload}
+        current = defaultdict(list)
+        sessions = WorkoutSession.objects.filter(plan_id__in=[diff[0] for diff in diffs]).select_for_update().values_list(
+            'plan_id', 'id', 'date', 'status', 'exercises'
+        )
+        for plan_id, *row in sessions:
+            current[plan_id].append(tuple(row))
+        return [diff for diff in diffs if sorted(current[diff[0]]) == loaded[diff[0]]]
+
+    def finish(self, item, checkpoint, totals):
+        chunk, payload, result = item
+        computed = result if isinstance(result, list) else result.result()
+        with transaction.atomic():
+            diffs = self.drop_changed(computed, payload)
+            apply_schedule_diffs(diffs)
+            # The profile rows stay locked until commit, so their counters still hold the allocated numbers
+            WorkoutPlan.objects.filter(id__in=[diff[0] for diff in diffs]).update(
+                last_updated=timezone.now(),
+                change_seq=Subquery(
+                    UserProfile.objects.filter(id=OuterRef('user_profile_id')).values('change_counter')[:1]
+                ),
+            )
+        totals['skipped'] += len(computed) - len(diffs)
+        for _, _, creates, updates, deletes in diffs:
+            totals['plans'] += 1
+            totals['created'] += len(creates)
+            totals['updated'] += len(updates)
+            totals['deleted'] += len(deletes)
+        if checkpoint:
+            # Chunks finish in id order, so this is a safe place to resume from
+            checkpoint.write_text(str(chunk[-1]))
+        return len(chunk)
+
+    def report(self, done, total, totals, started):
+        elapsed = time.monotonic() - started
+        rate = done / elapsed if elapsed else 0
+        self.stdout.write(
+            f"{done}/{total} profiles ({done / total:.1%}) | {totals['plans']} plans changed | "
+            f"{rate:.0f} profiles/s"
+        )
@@ -0,0 +1,33 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from workouts.jobs import requeue_stale_jobs, run_job
+from workouts.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs from the database (for JOB_BACKEND = DatabaseBackend)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when idle')
+        parser.add_argument('--timeout', type=float, default=settings.JOB_TIMEOUT,
+                            help='Requeue jobs that have been running for longer than this many seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = requeue_stale_jobs(options['timeout'])
+            if requeued:
+                self.stdout.write(f'requeued {requeued} stale job(s)')
+            job_ids = list(
+                Job.objects.filter(status='queued').order_by('created_at').values_list('id', flat=True)[:50]
+            )
+            for job_id in job_ids:
+                # run_job claims atomically, so several workers can share the queue
+                if run_job(job_id):
+                    job = Job.objects.only('kind', 'status').get(id=job_id)
+                    self.stdout.write(f'job {job_id} {job.kind}: {job.status}')
+            if not job_ids:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
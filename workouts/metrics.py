@@ -0,0 +1,292 @@
+"""
+Per-route request metrics in Prometheus text format.
+
+RequestMetricsMiddleware opens a RequestStats for every request. The DB
+execute wrapper installed on each connection, the serializers and
+FastJSONRenderer add to it while the request runs. It is kept in a context
+variable, so queries run by the async ORM in executor threads are counted
+too. Streamed bodies are produced after the view returns, so track_stream()
+keeps the stats current while they are sent. When the request finishes its
+wall time, query count, query time, serialization time and encoding time go
+into histograms labelled by route and method, which /metrics serves.
+"""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from django.conf import settings
+from django.http import HttpResponse
+from .clients import client_address
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+DEFAULT_REQUEST_METRICS = {
+    'ENABLED': True,
+    # Share of sync requests run under cProfile; 0 disables profiling
+    'PROFILE_SAMPLE_RATE': 0.0,
+    # Profiled requests slower than this are dumped to PROFILE_DIR
+    'PROFILE_SLOW_MS': 500,
+    'PROFILE_DIR': 'profiles',
+    # When set, /metrics requires "Authorization: Bearer <token>". Without
+    # one it is only served with DEBUG on or to ALLOWED_ADDRESSES (client
+    # addresses, see workouts/clients.py).
+    'TOKEN': None,
+    'ALLOWED_ADDRESSES': [],
+}
+
+
+def metrics_settings():
+    return {**DEFAULT_REQUEST_METRICS, **getattr(settings, 'REQUEST_METRICS', {})}
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Histograms and counters keyed by metric name and label values"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._histograms = {}
+        self._counters = {}
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def observe(self, name, labels, value, buckets=TIME_BUCKETS):
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self):
+        with self._lock:
+            histograms = {key: (list(h.counts), h.sum, h.count, h.buckets) for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+
+        lines = []
+        seen = set()
+        for (name, labels), value in sorted(counters.items()):
+            self._header(lines, seen, name, 'counter')
+            lines.append(f'{name}{format_labels(labels)} {value}')
+        for (name, labels), (counts, total, count, buckets) in sorted(histograms.items()):
+            self._header(lines, seen, name, 'histogram')
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{format_labels(labels + (("le", format_value(bound)),))} {cumulative}')
+            lines.append(f'{name}_bucket{format_labels(labels + (("le", "+Inf"),))} {count}')
+            lines.append(f'{name}_sum{format_labels(labels)} {format_value(total)}')
+            lines.append(f'{name}_count{format_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def _header(self, lines, seen, name, kind):
+        if name in seen:
+            return
+        seen.add(name)
+        if name in self._help:
+            lines.append(f'# HELP {name} {self._help[name]}')
+        lines.append(f'# TYPE {name} {kind}')
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+registry = MetricsRegistry()
+registry.describe('http_requests_total', 'Requests by route, method and status code.')
+registry.describe('http_request_duration_seconds', 'Wall time of requests.')
+registry.describe('http_request_db_queries', 'SQL queries run per request.')
+registry.describe('http_request_db_duration_seconds', 'Time spent in SQL per request.')
+registry.describe('http_response_serialize_duration_seconds',
+                  'Time spent in serializers building response data per request, including their queries.')
+registry.describe('http_response_render_duration_seconds', 'Time spent encoding response bodies per request.')
+
+
+class RequestStats:
+    __slots__ = ('queries', 'query_time', 'serialize_time', 'render_time', 'serializing')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.serialize_time = 0.0
+        self.render_time = 0.0
+        self.serializing = False
+
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+
+def start_request():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper that charges the query to the current request, if any"""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_time += time.perf_counter() - start
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    # connection_created fires on every reconnect of the same wrapper object
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+@contextmanager
+def timed_render():
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.render_time += time.perf_counter() - start
+
+
+@contextmanager
+def timed_serialization():
+    """Charge the block to serialization time, unless an enclosing block (a parent serializer) already is"""
+    stats = _current.get()
+    if stats is None or stats.serializing:
+        yield
+        return
+    stats.serializing = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serializing = False
+        stats.serialize_time += time.perf_counter() - start
+
+
+class TrackedStream:
+    """
+    A streamed response body that makes ``stats`` current while each chunk is
+    produced, and calls ``on_done`` once, when it is exhausted or closed
+    """
+
+    def __init__(self, content, stats, on_done):
+        self.content = content
+        self.stats = stats
+        self.on_done = on_done
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        token = _current.set(self.stats)
+        try:
+            return next(self.content)
+        except StopIteration:
+            self.close()
+            raise
+        finally:
+            _current.reset(token)
+
+    def close(self):
+        on_done, self.on_done = self.on_done, None
+        if on_done is not None:
+            on_done()
+
+
+class AsyncTrackedStream(TrackedStream):
+    # Django picks sync or async iteration by the presence of __aiter__
+    __iter__ = __next__ = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        token = _current.set(self.stats)
+        try:
+            return await anext(self.content)
+        except StopAsyncIteration:
+            self.close()
+            raise
+        finally:
+            _current.reset(token)
+
+
+def track_stream(response, stats, on_done):
+    """Charge the work done while ``response`` streams to ``stats``; see TrackedStream"""
+    if response.is_async:
+        stream = AsyncTrackedStream(aiter(response.streaming_content), stats, on_done)
+    else:
+        stream = TrackedStream(iter(response.streaming_content), stats, on_done)
+    # Django closes the stream with the response, so a body never read still records the request
+    response.streaming_content = stream
+
+
+def record_request(route, method, status_code, duration, stats):
+    labels = (('route', route), ('method', method))
+    registry.inc('http_requests_total', labels + (('status', str(status_code)),))
+    registry.observe('http_request_duration_seconds', labels, duration)
+    registry.observe('http_request_db_queries', labels, stats.queries, COUNT_BUCKETS)
+    registry.observe('http_request_db_duration_seconds', labels, stats.query_time)
+    registry.observe('http_response_serialize_duration_seconds', labels, stats.serialize_time)
+    registry.observe('http_response_render_duration_seconds', labels, stats.render_time)
+
+
+def metrics_view(request):
+    options = metrics_settings()
+    token = options['TOKEN']
+    if token:
+        if request.headers.get('Authorization') != f'Bearer {token}':
+            return HttpResponse(status=401)
+    elif not settings.DEBUG and client_address(request) not in options['ALLOWED_ADDRESSES']:
+        return HttpResponse(status=403)
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
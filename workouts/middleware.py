@@ -0,0 +1,195 @@
+import cProfile
+import logging
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+from rest_framework.exceptions import AuthenticationFailed
+from .authentication import CachedTokenAuthentication
+from .budgets import check_budget
+from .metrics import end_request, metrics_settings, record_request, start_request, track_stream
+from .routers import SAFE_METHODS, replica_pins, replica_reads
+
+logger = logging.getLogger(__name__)
+
+# Only one cProfile session can be active at a time (sys.monitoring on 3.12+)
+_profile_lock = threading.Lock()
+
+
+def route_label(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    # URL names keep the label set small and stable; fall back to the pattern
+    return match.view_name if match.url_name else match.route
+
+
+class RequestMetricsMiddleware:
+    """
+    Record wall time, SQL query count/time, serialization and rendering time per route
+    (see workouts/metrics.py) and check them against the route's budget
+    (workouts/budgets.py). With REQUEST_METRICS['PROFILE_SAMPLE_RATE'] > 0
+    a sample of sync requests runs under cProfile, and those slower than
+    PROFILE_SLOW_MS are written to PROFILE_DIR as .prof files. Async requests
+    share the event loop thread, so they are never profiled.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = metrics_settings()
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.config['ENABLED']:
+            return self.get_response(request)
+
+        stats, token = start_request()
+        profiler = self.start_profiler()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            duration = time.perf_counter() - started
+            if profiler is not None:
+                profiler.disable()
+                _profile_lock.release()
+            end_request(token)
+        self.finish_or_track(request, response, started, duration, stats, profiler)
+        return response
+
+    async def __acall__(self, request):
+        if not self.config['ENABLED']:
+            return await self.get_response(request)
+
+        stats, token = start_request()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            duration = time.perf_counter() - started
+            end_request(token)
+        self.finish_or_track(request, response, started, duration, stats, None)
+        return response
+
+    def start_profiler(self):
+        rate = self.config['PROFILE_SAMPLE_RATE']
+        if not rate or random.random() >= rate or not _profile_lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) is already active
+            _profile_lock.release()
+            return None
+        return profiler
+
+    def finish_or_track(self, request, response, started, duration, stats, profiler):
+        if not response.streaming:
+            self.finish(request, response, duration, stats, profiler)
+            return
+        # A streamed body runs its queries and serializers as it is sent, so record the request after that
+        track_stream(response, stats, lambda: self.finish(
+            request, response, time.perf_counter() - started, stats, profiler,
+        ))
+
+    def finish(self, request, response, duration, stats, profiler):
+        route = route_label(request)
+        record_request(route, request.method, response.status_code, duration, stats)
+        if profiler is not None and duration * 1000 >= self.config['PROFILE_SLOW_MS']:
+            self.dump_profile(profiler, route, duration)
+        check_budget(route, request.method, stats.queries, duration)
+
+    def dump_profile(self, profiler, route, duration):
+        directory = Path(self.config['PROFILE_DIR'])
+        if not directory.is_absolute():
+            directory = Path(settings.BASE_DIR) / directory
+        directory.mkdir(parents=True, exist_ok=True)
+        name = re.sub(r'[^A-Za-z0-9_.-]+', '_', route).strip('_') or 'root'
+        path = directory / f'{time.strftime("%Y%m%d-%H%M%S")}-{name}-{duration * 1000:.0f}ms.prof'
+        profiler.dump_stats(path)
+        logger.warning('Slow request to %s took %.0f ms; profile written to %s', route, duration * 1000, path)
+
+
+class ReadReplicaMiddleware:
+    """
+    Read from the replicas while serving safe requests from users that
+    haven't written in the last REPLICA_PIN_SECONDS (see workouts/routers.py).
+
+    Reads find the user from the request's token before the view runs,
+    through the token cache, so the view's own authentication reuses the
+    entry. That lookup reads from 'default', so a token created moments ago
+    is found. Writes pin the user the view authenticated.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if request.method in SAFE_METHODS:
+            user_id = self.user_id(request)
+            if user_id is None or not replica_pins.is_pinned(user_id):
+                with replica_reads():
+                    return self.get_response(request)
+            return self.get_response(request)
+        response = self.get_response(request)
+        user_id = self.writer_id(request)
+        if user_id is not None:
+            replica_pins.pin(user_id)
+        return response
+
+    async def __acall__(self, request):
+        if request.method in SAFE_METHODS:
+            user_id = await self.auser_id(request)
+            if user_id is None or not await replica_pins.ais_pinned(user_id):
+                with replica_reads():
+                    return await self.get_response(request)
+            return await self.get_response(request)
+        response = await self.get_response(request)
+        user_id = self.writer_id(request)
+        if user_id is not None:
+            await replica_pins.apin(user_id)
+        return response
+
+    @staticmethod
+    def user_id(request):
+        """The id of the user whose token the request carries, or None"""
+        try:
+            result = CachedTokenAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return None
+        return result[0].pk if result else None
+
+    @staticmethod
+    async def auser_id(request):
+        try:
+            result = await CachedTokenAuthentication().aauthenticate(request)
+        except AuthenticationFailed:
+            return None
+        return result[0].pk if result else None
+
+    @staticmethod
+    def writer_id(request):
+        """The id of the user DRF authenticated while serving the request, or None"""
+        user = getattr(request, 'user', None)
+        # Left unevaluated by AuthenticationMiddleware when no DRF view ran
+        if user is None or isinstance(user, SimpleLazyObject) or not user.is_authenticated:
+            return None
+        return user.pk
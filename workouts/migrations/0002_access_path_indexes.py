@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workoutplan',
+            index=models.Index(fields=['user_profile', 'start_date'], name='plan_profile_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutsession',
+            index=models.Index(fields=['user_profile', 'date'], name='session_profile_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutsession',
+            index=models.Index(fields=['user_profile', 'status', 'date'], name='session_profile_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutsession',
+            index=models.Index(fields=['plan', 'date'], name='session_plan_date_idx'),
+        ),
+    ]
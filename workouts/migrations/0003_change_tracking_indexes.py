@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0002_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workoutplan',
+            index=models.Index(fields=['user_profile', 'last_updated'], name='plan_profile_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutsession',
+            index=models.Index(fields=['user_profile', 'updated_at'], name='session_profile_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0003_change_tracking_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('plan', 'Workout plan'), ('session', 'Workout session')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+                ('user_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tombstones', to='workouts.userprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user_profile', 'deleted_at'], name='tombstone_profile_deleted_idx')],
+            },
+        ),
+    ]
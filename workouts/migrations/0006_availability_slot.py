@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Frozen copy of the lenient workouts.availability.parse_availability() as of
+# this migration, so later changes there can't alter what it backfills
+WEEKDAYS = {'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6}
+
+
+def parse_minute(value):
+    hours, minutes = value.strip().split(':')
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours <= 24 and 0 <= minutes < 60) or (hours == 24 and minutes):
+        raise ValueError(f'Invalid time {value!r}')
+    return hours * 60 + minutes
+
+
+def parse_range(value):
+    if not isinstance(value, str) or value.count('-') != 1:
+        raise ValueError(f'Invalid time range {value!r}')
+    start, end = (parse_minute(part) for part in value.split('-'))
+    if start >= end:
+        raise ValueError(f'Time range {value!r} must end after it starts')
+    return start, end
+
+
+def parse_availability(availability):
+    by_day = {}
+    for day, ranges in (availability or {}).items():
+        weekday = WEEKDAYS.get(str(day).strip().lower()[:3])
+        if weekday is None or not isinstance(ranges, list):
+            continue
+        for value in ranges:
+            try:
+                by_day.setdefault(weekday, []).append(parse_range(value))
+            except ValueError:
+                continue
+
+    intervals = []
+    for weekday in sorted(by_day):
+        merged = []
+        for start, end in sorted(by_day[weekday]):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        intervals.extend((weekday, start, end) for start, end in merged)
+    return intervals
+
+
+def backfill_slots(apps, schema_editor):
+    UserProfile = apps.get_model('workouts', 'UserProfile')
+    AvailabilitySlot = apps.get_model('workouts', 'AvailabilitySlot')
+    profiles = UserProfile.objects.only('id', 'availability').iterator(chunk_size=1000)
+    AvailabilitySlot.objects.bulk_create([
+        AvailabilitySlot(user_profile_id=profile.id, weekday=weekday, start_minute=start, end_minute=end)
+        for profile in profiles
+        for weekday, start, end in parse_availability(profile.availability)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0005_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvailabilitySlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField()),
+                ('start_minute', models.PositiveSmallIntegerField()),
+                ('end_minute', models.PositiveSmallIntegerField()),
+                ('user_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_slots', to='workouts.userprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['weekday', 'start_minute', 'end_minute'], name='slot_weekday_start_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_slots, migrations.RunPython.noop),
+    ]
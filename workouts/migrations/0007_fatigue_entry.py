@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.dateparse import parse_date
+
+
+def copy_fatigue_log(apps, schema_editor):
+    UserProfile = apps.get_model('workouts', 'UserProfile')
+    FatigueEntry = apps.get_model('workouts', 'FatigueEntry')
+    entries = []
+    for profile_id, log in UserProfile.objects.values_list('id', 'fatigue_log').iterator(chunk_size=1000):
+        for item in log or []:
+            try:
+                date, level = parse_date(item['date']), int(item['level'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            # Levels outside the 1-10 scale the API accepts are as unusable as malformed ones
+            if date is not None and 1 <= level <= 10:
+                entries.append(FatigueEntry(user_profile_id=profile_id, date=date, level=level))
+        # Write as we go so memory stays flat however long the logs are
+        if len(entries) >= 1000:
+            FatigueEntry.objects.bulk_create(entries, batch_size=1000)
+            entries = []
+    FatigueEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0006_availability_slot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FatigueEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('level', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fatigue_entries', to='workouts.userprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user_profile', 'date'], name='fatigue_profile_date_idx')],
+            },
+        ),
+        migrations.RunPython(copy_fatigue_log, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='fatigue_log',
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:39
+
+import datetime
+import django.db.models.deletion
+from collections import Counter, defaultdict
+from django.db import migrations, models
+
+
+# Frozen copies of workouts.stats as of this migration, so later changes there
+# can't alter what it backfills
+def week_start(date):
+    return date - datetime.timedelta(days=date.weekday())
+
+
+def session_volume(exercises):
+    volume = 0
+    for exercise in exercises or []:
+        try:
+            volume += int(exercise.get('sets', 0)) * int(exercise.get('reps', 0))
+        except (AttributeError, TypeError, ValueError):
+            continue
+    return volume
+
+
+def contribution(status, exercises):
+    volume = session_volume(exercises)
+    fields = Counter({status: 1, 'volume': volume})
+    if status == 'completed':
+        fields['completed_volume'] = volume
+    return fields
+
+
+def backfill_summaries(apps, schema_editor):
+    WorkoutSession = apps.get_model('workouts', 'WorkoutSession')
+    WeeklySummary = apps.get_model('workouts', 'WeeklySummary')
+    totals = defaultdict(Counter)
+    sessions = WorkoutSession.objects.values_list('user_profile_id', 'date', 'status', 'exercises')
+    for profile_id, date, status, exercises in sessions.iterator(chunk_size=2000):
+        totals[(profile_id, week_start(date))].update(contribution(status, exercises))
+    WeeklySummary.objects.bulk_create([
+        WeeklySummary(user_profile_id=profile_id, week_start=week, **fields)
+        for (profile_id, week), fields in totals.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0007_fatigue_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeeklySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week_start', models.DateField()),
+                ('planned', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('missed', models.IntegerField(default=0)),
+                ('rescheduled', models.IntegerField(default=0)),
+                ('volume', models.IntegerField(default=0)),
+                ('completed_volume', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weekly_summaries', to='workouts.userprofile')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user_profile', 'week_start'), name='summary_profile_week_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
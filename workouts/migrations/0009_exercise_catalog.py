@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:42
+
+from django.db import migrations, models
+
+# (slug, name, category, required equipment, sets, reps, priority)
+CATALOG = [
+    ('barbell-back-squat', 'Barbell Back Squat', 'legs', ['barbell', 'squat rack'], 5, 5, 10),
+    ('goblet-squat', 'Goblet Squat', 'legs', ['dumbbells'], 3, 10, 20),
+    ('kettlebell-goblet-squat', 'Kettlebell Goblet Squat', 'legs', ['kettlebell'], 3, 10, 30),
+    ('squat', 'Squat', 'legs', [], 3, 10, 100),
+    ('barbell-bench-press', 'Barbell Bench Press', 'push', ['barbell', 'bench'], 5, 5, 10),
+    ('dumbbell-bench-press', 'Dumbbell Bench Press', 'push', ['dumbbells', 'bench'], 3, 10, 20),
+    ('dumbbell-shoulder-press', 'Dumbbell Shoulder Press', 'push', ['dumbbells'], 3, 10, 30),
+    ('push-up', 'Push-up', 'push', [], 3, 12, 100),
+    ('pull-up', 'Pull-up', 'pull', ['pull-up bar'], 3, 8, 10),
+    ('dumbbell-row', 'Dumbbell Row', 'pull', ['dumbbells'], 3, 10, 20),
+    ('band-row', 'Resistance Band Row', 'pull', ['resistance bands'], 3, 15, 30),
+    ('superman', 'Superman', 'pull', [], 3, 12, 100),
+    ('deadlift', 'Deadlift', 'hinge', ['barbell'], 5, 5, 10),
+    ('kettlebell-swing', 'Kettlebell Swing', 'hinge', ['kettlebell'], 3, 15, 20),
+    ('dumbbell-romanian-deadlift', 'Dumbbell Romanian Deadlift', 'hinge', ['dumbbells'], 3, 10, 30),
+    ('glute-bridge', 'Glute Bridge', 'hinge', [], 3, 15, 100),
+    ('hanging-knee-raise', 'Hanging Knee Raise', 'core', ['pull-up bar'], 3, 10, 10),
+    ('dead-bug', 'Dead Bug', 'core', [], 3, 10, 100),
+]
+
+
+def seed_catalog(apps, schema_editor):
+    Exercise = apps.get_model('workouts', 'Exercise')
+    WorkoutSession = apps.get_model('workouts', 'WorkoutSession')
+    exercises = Exercise.objects.bulk_create([
+        Exercise(slug=slug, name=name, category=category, equipment=equipment,
+                 default_sets=sets, default_reps=reps, priority=priority)
+        for slug, name, category, equipment, sets, reps, priority in CATALOG
+    ])
+    by_name = {exercise.name.lower(): exercise.id for exercise in exercises}
+
+    # Point existing sessions at the catalog instead of repeating the names
+    changed = []
+    for session in WorkoutSession.objects.only('id', 'exercises').iterator(chunk_size=2000):
+        compacted = []
+        for item in session.exercises or []:
+            exercise_id = by_name.get(str(item.get('name', '')).lower()) if isinstance(item, dict) else None
+            if exercise_id is None or 'exercise' in item:
+                compacted.append(item)
+            else:
+                compacted.append({'exercise': exercise_id, **{k: v for k, v in item.items() if k != 'name'}})
+        if compacted != session.exercises:
+            session.exercises = compacted
+            changed.append(session)
+        if len(changed) >= 1000:
+            WorkoutSession.objects.bulk_update(changed, ['exercises'])
+            changed = []
+    if changed:
+        WorkoutSession.objects.bulk_update(changed, ['exercises'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0008_weekly_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Exercise',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(max_length=60, unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('category', models.CharField(choices=[('legs', 'Legs'), ('push', 'Push'), ('pull', 'Pull'), ('hinge', 'Hinge'), ('core', 'Core')], max_length=10)),
+                ('equipment', models.JSONField(default=list)),
+                ('default_sets', models.PositiveSmallIntegerField(default=3)),
+                ('default_reps', models.PositiveSmallIntegerField(default=10)),
+                ('priority', models.PositiveSmallIntegerField(default=100)),
+            ],
+        ),
+        migrations.RunPython(seed_catalog, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:05
+
+from django.db import migrations, models
+
+# auth.User belongs to django.contrib.auth, so its index is created here
+EMAIL_INDEX = models.Index(fields=['email'], name='auth_user_email_idx')
+
+
+def create_email_index(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    schema_editor.add_index(User, EMAIL_INDEX)
+
+
+def drop_email_index(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    schema_editor.remove_index(User, EMAIL_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('workouts', '0009_exercise_catalog'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_email_index, drop_email_index),
+    ]
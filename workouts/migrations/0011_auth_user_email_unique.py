@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:20
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+# Registration relies on this to reject taken emails without a pre-check
+# query. Blank emails (e.g. from createsuperuser) stay allowed.
+EMAIL_UNIQUE = models.UniqueConstraint(fields=['email'], condition=~Q(email=''), name='auth_user_email_uniq')
+
+
+def create_email_constraint(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    duplicates = list(
+        User.objects.exclude(email='').values('email').annotate(count=Count('id')).filter(count__gt=1)
+        .values_list('email', flat=True)[:10]
+    )
+    if duplicates:
+        raise RuntimeError(
+            'Cannot make auth_user.email unique, these emails belong to more than one user: '
+            + ', '.join(duplicates)
+        )
+    schema_editor.add_constraint(User, EMAIL_UNIQUE)
+
+
+def drop_email_constraint(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    schema_editor.remove_constraint(User, EMAIL_UNIQUE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0010_auth_user_email_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_email_constraint, drop_email_constraint),
+    ]
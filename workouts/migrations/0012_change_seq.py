@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0011_auth_user_email_unique'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='tombstone',
+            name='tombstone_profile_deleted_idx',
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='change_seq',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='change_counter',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='change_seq',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='pruned_seq',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workoutplan',
+            name='change_seq',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workoutsession',
+            name='change_seq',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['user_profile', 'change_seq'], name='tombstone_profile_change_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutplan',
+            index=models.Index(fields=['user_profile', 'change_seq'], name='plan_profile_change_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutsession',
+            index=models.Index(fields=['user_profile', 'change_seq'], name='session_profile_change_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:00
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import Lower
+
+# Emails are stored lowercased from now on, and the constraint compares them
+# case-insensitively so differently cased copies of one address can't both exist
+OLD_EMAIL_UNIQUE = models.UniqueConstraint(fields=['email'], condition=~Q(email=''), name='auth_user_email_uniq')
+EMAIL_UNIQUE = models.UniqueConstraint(Lower('email'), condition=~Q(email=''), name='auth_user_email_lower_uniq')
+
+
+def lowercase_emails(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    duplicates = list(
+        User.objects.exclude(email='').values(lowered=Lower('email')).annotate(count=Count('id'))
+        .filter(count__gt=1).values_list('lowered', flat=True)[:10]
+    )
+    if duplicates:
+        raise RuntimeError(
+            'Cannot make auth_user.email unique ignoring case, these emails belong to more than one user: '
+            + ', '.join(duplicates)
+        )
+    schema_editor.remove_constraint(User, OLD_EMAIL_UNIQUE)
+    User.objects.exclude(email=Lower('email')).update(email=Lower('email'))
+    schema_editor.add_constraint(User, EMAIL_UNIQUE)
+
+
+def restore_case_sensitive_constraint(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    schema_editor.remove_constraint(User, EMAIL_UNIQUE)
+    schema_editor.add_constraint(User, OLD_EMAIL_UNIQUE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0012_change_seq'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, restore_case_sensitive_constraint),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth.models import User
 from django.conf import settings
 import json
@@ -10,11 +11,72 @@ class UserProfile(models.Model):
     name = models.CharField(max_length=100)
     availability = models.JSONField(default=dict)  # e.g., {"mon": ["18:00-19:00"], "wed": ["19:00-20:00"]}
     equipment = models.JSONField(default=list)     # e.g., ["dumbbells", "barbell"]
-    fatigue_log = models.JSONField(default=list)  # e.g., [{"date": "2025-09-20", "level": 7}]
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Change numbers behind the /api/sync/ cursor; see allocate_change_seqs()
+    change_counter = models.BigIntegerField(default=0)  # the last number handed out
+    change_seq = models.BigIntegerField(default=0)  # the number of this row's last change
+    pruned_seq = models.BigIntegerField(default=0)  # tombstones up to this number were pruned
 
-class WorkoutPlan(models.Model):
+    # Only ever written as UPDATE ... SET x = x + 1 or GREATEST(x, ...), never from an instance
+    COUNTER_FIELDS = {'change_counter', 'change_seq', 'pruned_seq'}
+
+    def save(self, *args, **kwargs):
+        if self._state.adding or kwargs.get('force_insert'):
+            return super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            deferred = self.get_deferred_fields()
+            update_fields = {
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred
+            }
+        # Stamp the change in the same statement, so the row lock orders it like allocate_change_seqs()
+        kwargs['update_fields'] = (set(update_fields) - self.COUNTER_FIELDS) | {'change_counter', 'change_seq'}
+        self.change_counter = F('change_counter') + 1
+        self.change_seq = F('change_counter') + 1
+        super().save(*args, **kwargs)
+        # The new values are in the database only; reload them on first access
+        del self.change_counter, self.change_seq
+
+
+def profile_change_stamp():
+    """Keyword arguments for UserProfile.objects.filter(...).update() that record a change of the profile row"""
+    return {'change_counter': F('change_counter') + 1, 'change_seq': F('change_counter') + 1}
+
+
+def allocate_change_seqs(profile_ids):
+    """
+    Hand out the next change number of each profile, as {profile_id: number}.
+
+    Call inside the writing transaction and stamp the rows it writes with the
+    number. Bumping the counter locks the profile row until commit, so one
+    profile's changes commit in number order: once /api/sync/ reads a
+    counter value, every row stamped with it or a lower number is visible.
+    """
+    profile_ids = set(profile_ids)
+    if not profile_ids:
+        return {}
+    UserProfile.objects.filter(id__in=profile_ids).update(change_counter=F('change_counter') + 1)
+    return dict(UserProfile.objects.filter(id__in=profile_ids).values_list('id', 'change_counter'))
+
+
+class ProfileChange(models.Model):
+    """A row of a profile that /api/sync/ reports; save() stamps it with the profile's next change number"""
+    change_seq = models.BigIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        # No savepoint: an error here aborts the caller's transaction anyway
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            self.change_seq = allocate_change_seqs([self.user_profile_id])[self.user_profile_id]
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'change_seq'}
+            super().save(*args, **kwargs)
+
+class WorkoutPlan(ProfileChange):
     user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='plans')
     start_date = models.DateField()
     weeks = models.IntegerField(default=4)
@@ -22,7 +84,14 @@ class WorkoutPlan(models.Model):
     last_updated = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
-class WorkoutSession(models.Model):
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_profile', 'start_date'], name='plan_profile_start_idx'),
+            models.Index(fields=['user_profile', 'last_updated'], name='plan_profile_updated_idx'),
+            models.Index(fields=['user_profile', 'change_seq'], name='plan_profile_change_idx'),
+        ]
+
+class WorkoutSession(ProfileChange):
     STATUS_CHOICES = [
         ('planned', 'Planned'),
         ('completed', 'Completed'),
@@ -38,3 +107,124 @@ class WorkoutSession(models.Model):
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Match the viewset access paths: a user's sessions by date, optionally
+        # narrowed by status, and a plan's sessions in date order.
+        indexes = [
+            models.Index(fields=['user_profile', 'date'], name='session_profile_date_idx'),
+            models.Index(fields=['user_profile', 'status', 'date'], name='session_profile_status_idx'),
+            models.Index(fields=['plan', 'date'], name='session_plan_date_idx'),
+            # Latest-change lookups for ETag/Last-Modified
+            models.Index(fields=['user_profile', 'updated_at'], name='session_profile_updated_idx'),
+            # Delta sync
+            models.Index(fields=['user_profile', 'change_seq'], name='session_profile_change_idx'),
+        ]
+
+class Tombstone(ProfileChange):
+    """Record of a deleted plan or session, so /api/sync/ can report deletions"""
+    KIND_CHOICES = [
+        ('plan', 'Workout plan'),
+        ('session', 'Workout session'),
+    ]
+
+    user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='tombstones')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_profile', 'change_seq'], name='tombstone_profile_change_idx'),
+            # Pruning removes the oldest across all profiles
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+
+class Job(models.Model):
+    """A unit of background work (plan generation or regeneration) and its outcome"""
+    KIND_CHOICES = [
+        ('generate_plan', 'Generate plan'),
+        ('regenerate_plan', 'Regenerate plan'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='jobs')
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The database backend's workers poll for the oldest queued job
+            models.Index(fields=['status', 'created_at'], name='job_status_created_idx'),
+        ]
+
+class AvailabilitySlot(models.Model):
+    """One normalized availability window of a profile, derived from UserProfile.availability"""
+    user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='availability_slots')
+    weekday = models.PositiveSmallIntegerField()  # date.weekday(): 0 is Monday
+    start_minute = models.PositiveSmallIntegerField()  # minutes since midnight
+    end_minute = models.PositiveSmallIntegerField()  # exclusive, up to 1440
+
+    class Meta:
+        indexes = [
+            # "Who is free on <weekday> at <time>" scans one weekday's windows
+            models.Index(fields=['weekday', 'start_minute', 'end_minute'], name='slot_weekday_start_idx'),
+        ]
+
+class FatigueEntry(models.Model):
+    """One self-reported fatigue level; entries are only ever appended"""
+    user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='fatigue_entries')
+    date = models.DateField()
+    level = models.PositiveSmallIntegerField()  # 1 = very tired, 10 = very energetic
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_profile', 'date'], name='fatigue_profile_date_idx'),
+        ]
+
+class WeeklySummary(models.Model):
+    """Per-profile session counts and volume for one week, kept current as sessions change"""
+    user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='weekly_summaries')
+    week_start = models.DateField()  # the Monday of the week
+    planned = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    missed = models.IntegerField(default=0)
+    rescheduled = models.IntegerField(default=0)
+    volume = models.IntegerField(default=0)  # sets x reps over all sessions of the week
+    completed_volume = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user_profile', 'week_start'], name='summary_profile_week_uniq'),
+        ]
+
+class Exercise(models.Model):
+    """A catalog exercise; sessions refer to it by id instead of repeating its details"""
+    CATEGORY_CHOICES = [
+        ('legs', 'Legs'),
+        ('push', 'Push'),
+        ('pull', 'Pull'),
+        ('hinge', 'Hinge'),
+        ('core', 'Core'),
+    ]
+
+    slug = models.SlugField(max_length=60, unique=True)
+    name = models.CharField(max_length=100)
+    category = models.CharField(max_length=10, choices=CATEGORY_CHOICES)
+    equipment = models.JSONField(default=list)  # all required, e.g. ["barbell", "bench"]; [] is bodyweight
+    default_sets = models.PositiveSmallIntegerField(default=3)
+    default_reps = models.PositiveSmallIntegerField(default=10)
+    priority = models.PositiveSmallIntegerField(default=100)  # lower is preferred within a category
@@ -0,0 +1,17 @@
+from rest_framework.pagination import CursorPagination
+
+
+class WorkoutSessionCursorPagination(CursorPagination):
+    """Keyset pagination over (date, id), stable while sessions are inserted"""
+    ordering = ('date', 'id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class FatigueEntryCursorPagination(CursorPagination):
+    """Keyset pagination over a profile's fatigue series in date order"""
+    ordering = ('date', 'id')
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
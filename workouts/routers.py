@@ -0,0 +1,82 @@
+"""
+Read-replica routing.
+
+When DB_REPLICAS is set, settings add a 'replicaN' database per replica and
+install ReadReplicaRouter and ReadReplicaMiddleware. The middleware marks
+safe (GET/HEAD/OPTIONS) requests. The router sends their reads to a random
+replica; other requests, writes and migrations use 'default'. Replicas lag
+behind the primary, so after a user writes, their requests read from
+'default' for REPLICA_PIN_SECONDS, so they see their own changes. The pins
+are kept by user id in the REPLICA_PIN_CACHE_ALIAS cache: point it at a
+cache every process shares (e.g. Redis), since a write served by one worker
+must pin the reads served by the others.
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import caches
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != 'default']
+
+
+@contextmanager
+def replica_reads():
+    """Send reads in this block (and in executor threads it starts) to the replicas"""
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _use_replica.get():
+            return None
+        replicas = replica_aliases()
+        return random.choice(replicas) if replicas else None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema by replication (or copy_sqlite_replica)
+        return db == 'default'
+
+
+class ReplicaPins:
+    """Users who wrote recently; the cache expires each pin after REPLICA_PIN_SECONDS"""
+
+    @staticmethod
+    def _cache():
+        return caches[settings.REPLICA_PIN_CACHE_ALIAS]
+
+    @staticmethod
+    def _key(user_id):
+        return f'replica-pin:{user_id}'
+
+    def pin(self, user_id):
+        self._cache().set(self._key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+    async def apin(self, user_id):
+        await self._cache().aset(self._key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+    def is_pinned(self, user_id):
+        return self._cache().get(self._key(user_id), False)
+
+    async def ais_pinned(self, user_id):
+        return await self._cache().aget(self._key(user_id), False)
+
+
+replica_pins = ReplicaPins()
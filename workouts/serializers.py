@@ -1,34 +1,107 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
-from .models import UserProfile, WorkoutPlan, WorkoutSession
+from .availability import parse_availability
+from .catalog import get_catalog
+from .fatigue import fatigue_summary
+from .metrics import timed_serialization
+from .models import Exercise, FatigueEntry, Job, UserProfile, WeeklySummary, WorkoutPlan, WorkoutSession
 
-class UserSerializer(serializers.ModelSerializer):
+class TimedSerializerMixin:
+    """Charge to_representation() to the request's serialization time; nested serializers count once"""
+
+    def to_representation(self, instance):
+        with timed_serialization():
+            return super().to_representation(instance)
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
+    # Rolling aggregates only; the full history is paged from /api/fatigue/
+    fatigue = serializers.SerializerMethodField()
     
     class Meta:
         model = UserProfile
-        fields = ['id', 'user', 'name', 'availability', 'equipment', 'fatigue_log', 'created_at', 'updated_at']
+        fields = ['id', 'user', 'name', 'availability', 'equipment', 'fatigue', 'created_at', 'updated_at']
+
+    def get_fatigue(self, obj):
+        return fatigue_summary(obj)
+
+    def validate_availability(self, value):
+        # The slot index is built from this, so reject what it can't parse
+        if not isinstance(value, dict):
+            raise serializers.ValidationError('Expected an object of day -> ["HH:MM-HH:MM", ...]')
+        try:
+            parse_availability(value, strict=True)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+        return value
+
+class FatigueEntrySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    date = serializers.DateField(required=False)
+    level = serializers.IntegerField(min_value=1, max_value=10)
+
+    class Meta:
+        model = FatigueEntry
+        fields = ['id', 'date', 'level', 'created_at']
+
+class ExerciseSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Exercise
+        fields = ['id', 'slug', 'name', 'category', 'equipment', 'default_sets', 'default_reps']
+
+class WorkoutSessionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = WorkoutSession
+        fields = ['id', 'user_profile', 'plan', 'date', 'exercises', 'status', 'notes', 'created_at', 'updated_at']
 
-class WorkoutPlanSerializer(serializers.ModelSerializer):
-    sessions = serializers.SerializerMethodField()
+    def validate_exercises(self, value):
+        if not isinstance(value, list):
+            raise serializers.ValidationError('Expected a list of exercises')
+        # Catalog exercises are stored by id only
+        return get_catalog().compact(value)
+
+    def to_representation(self, instance):
+        with timed_serialization():
+            data = super().to_representation(instance)
+            data['exercises'] = get_catalog().expand(data['exercises'])
+        return data
+
+class WorkoutPlanSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    # Reads plan.sessions.all(), so a prefetch on the queryset is reused
+    sessions = WorkoutSessionSerializer(many=True, read_only=True)
     
     class Meta:
         model = WorkoutPlan
         fields = ['id', 'user_profile', 'start_date', 'weeks', 'rationale', 'last_updated', 'created_at', 'sessions']
-    
-    def get_sessions(self, obj):
-        return WorkoutSessionSerializer(obj.sessions.all(), many=True).data
 
-class WorkoutSessionSerializer(serializers.ModelSerializer):
+class WorkoutPlanSummarySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    # Plan fields without the nested sessions, for delta sync
     class Meta:
-        model = WorkoutSession
-        fields = ['id', 'user_profile', 'plan', 'date', 'exercises', 'status', 'notes', 'created_at', 'updated_at']
+        model = WorkoutPlan
+        fields = ['id', 'user_profile', 'start_date', 'weeks', 'rationale', 'last_updated', 'created_at']
+
+class JobSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'params', 'status', 'result', 'error', 'created_at', 'started_at', 'finished_at']
+
+class WeeklySummarySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    completion_rate = serializers.SerializerMethodField()
+
+    class Meta:
+        model = WeeklySummary
+        fields = ['week_start', 'planned', 'completed', 'missed', 'rescheduled', 'volume', 'completed_volume',
+                  'completion_rate', 'updated_at']
+
+    def get_completion_rate(self, obj):
+        # Share of the week's sessions that are done, out of those no longer planned
+        finished = obj.completed + obj.missed + obj.rescheduled
+        return round(obj.completed / finished, 3) if finished else None
 
 class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -1,21 +1,322 @@
 import datetime
-from .models import WorkoutPlan, WorkoutSession
-
-def generate_workout_plan(user, weeks=4):
-    plan = WorkoutPlan.objects.create(user=user, start_date=datetime.date.today(), weeks=weeks, rationale="Initial plan generated")
-    days = sorted(user.availability.keys())
-    session_dates = []
-    current_date = plan.start_date
-    for week in range(weeks):
-        for day in days:
-            session_dates.append(current_date)
-            current_date += datetime.timedelta(days=2)
-    for date in session_dates:
-        WorkoutSession.objects.create(
-            user=user,
-            plan=plan,
-            date=date,
-            exercises=[{"name": "Squat", "sets": 3, "reps": 10}],
-            status='planned'
+import json
+from collections import defaultdict
+from django.db import transaction
+from django.utils import timezone
+from .catalog import get_catalog
+from .models import WorkoutPlan, WorkoutSession, allocate_change_seqs
+from .signals import batched_tombstones
+from .stats import SummaryDelta
+
+# Weekday index (date.weekday()) keyed by the lowercase three-letter prefix, so
+# both the "mon" keys in the model docs and the "Monday" keys sent by the
+# frontend resolve to the same day.
+WEEKDAYS = {'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6}
+
+# Used when the exercise catalog is empty
+DEFAULT_EXERCISES = [{"name": "Squat", "sets": 3, "reps": 10}]
+
+
+def available_weekdays(availability):
+    """Return the sorted weekday indexes that have at least one time slot"""
+    weekdays = set()
+    for day, slots in (availability or {}).items():
+        weekday = WEEKDAYS.get(str(day).strip().lower()[:3])
+        if weekday is not None and slots:
+            weekdays.add(weekday)
+    return sorted(weekdays)
+
+
+def plan_exercises(equipment):
+    """The exercises of each session for a profile's equipment, from the catalog"""
+    return get_catalog().session_template(equipment) or DEFAULT_EXERCISES
+
+
+def build_schedule(availability, start_date, weeks, exercises=None):
+    """Compute the (date, exercises) pairs for a plan entirely in memory.
+
+    Every available weekday gets one session per week, starting on or after
+    ``start_date`` and ending before ``start_date + weeks``.
+    """
+    if exercises is None:
+        exercises = DEFAULT_EXERCISES
+    weekdays = available_weekdays(availability)
+    schedule = []
+    for offset in range(weeks * 7):
+        date = start_date + datetime.timedelta(days=offset)
+        if date.weekday() in weekdays:
+            schedule.append((date, [dict(exercise) for exercise in exercises]))
+    return schedule
+
+
+def generate_workout_plan(user_profile, weeks=4, start_date=None, rationale="Initial plan generated"):
+    """Create a plan and all of its sessions in a single transaction.
+
+    Sessions are written with one ``bulk_create``. Returns ``(plan, sessions)``
+    with the sessions in date order, so callers that need them don't have to
+    query them back.
+    """
+    if start_date is None:
+        start_date = datetime.date.today()
+    exercises = plan_exercises(user_profile.equipment)
+    schedule = build_schedule(user_profile.availability, start_date, weeks, exercises)
+
+    with transaction.atomic():
+        plan = WorkoutPlan.objects.create(
+            user_profile=user_profile,
+            start_date=start_date,
+            weeks=weeks,
+            rationale=rationale,
+        )
+        # bulk_create skips save(), so stamp the sessions with the plan's change number
+        sessions = WorkoutSession.objects.bulk_create([
+            WorkoutSession(
+                user_profile=user_profile,
+                plan=plan,
+                date=date,
+                exercises=exercises,
+                status='planned',
+                change_seq=plan.change_seq,
+            )
+            for date, exercises in schedule
+        ])
+        delta = SummaryDelta()
+        for session in sessions:
+            delta.add_session(session)
+        delta.apply()
+    return plan, sessions
+
+
+def diff_schedule(schedule, existing, today):
+    """Work out the minimal changes that turn ``existing`` into ``schedule``.
+
+    ``existing`` holds ``(id, date, status, exercises)`` tuples for a plan's
+    sessions. Only future ``planned`` sessions are touched: dates already
+    taken by history (past or non-planned sessions) are never rescheduled.
+    Returns ``(creates, updates, deletes)`` where ``creates`` is a list of
+    ``(date, exercises)``, ``updates`` a list of ``(id, date, exercises)`` and
+    ``deletes`` a list of ids.
+    """
+    occupied = set()
+    planned = []
+    for session_id, date, status, exercises in existing:
+        if status == 'planned' and date >= today:
+            planned.append((date, session_id, exercises))
+        else:
+            occupied.add(date)
+    planned.sort()
+
+    by_date = {}
+    leftover = []
+    for date, session_id, exercises in planned:
+        if date in by_date:
+            leftover.append((date, session_id, exercises))
+        else:
+            by_date[date] = (session_id, exercises)
+
+    updates = []
+    unmatched = []
+    for date, exercises in schedule:
+        if date < today or date in occupied:
+            continue
+        match = by_date.pop(date, None)
+        if match is None:
+            unmatched.append((date, exercises))
+        elif match[1] != exercises:
+            updates.append((match[0], date, exercises))
+
+    leftover.extend((date, session_id, exercises) for date, (session_id, exercises) in by_date.items())
+    leftover.sort()
+
+    # Move surplus sessions onto the new dates before inserting anything
+    for (date, exercises), (_, session_id, _) in zip(unmatched, leftover):
+        updates.append((session_id, date, exercises))
+    creates = unmatched[len(leftover):]
+    deletes = [session_id for _, session_id, _ in leftover[len(unmatched):]]
+    return creates, updates, deletes
+
+
+def apply_schedule_diff(plan, creates, updates, deletes):
+    """Write a diff from ``diff_schedule`` with one statement per kind of change"""
+    return apply_schedule_diffs([(plan.id, plan.user_profile_id, creates, updates, deletes)])
+
+
+def apply_schedule_diffs(diffs, batch_size=1000):
+    """Write ``(plan_id, profile_id, creates, updates, deletes)`` diffs for many plans at once.
+
+    Updates that set the same date and exercises (the common case after a
+    template change) are grouped into one ``UPDATE ... WHERE id IN`` each; the
+    rest go through a single ``bulk_update``. All inserts go through one
+    ``bulk_create`` and all removals through one delete, each split into
+    ``batch_size`` rows per statement. Call inside a transaction. Returns the
+    change number each profile's rows were stamped with.
+    """
+    now = timezone.now()
+    seqs = allocate_change_seqs(diff[1] for diff in diffs)
+    grouped = defaultdict(list)
+    created = []
+    deleted = []
+    delta = SummaryDelta()
+    for plan_id, profile_id, creates, updates, deletes in diffs:
+        for session_id, date, exercises in updates:
+            grouped[(seqs[profile_id], date, json.dumps(exercises, sort_keys=True))].append(session_id)
+            delta.add(profile_id, date, 'planned', exercises)
+        for date, exercises in creates:
+            created.append(WorkoutSession(
+                user_profile_id=profile_id,
+                plan_id=plan_id,
+                date=date,
+                exercises=exercises,
+                status='planned',
+                change_seq=seqs[profile_id],
+            ))
+            delta.add(profile_id, date, 'planned', exercises)
+        deleted.extend(deletes)
+
+    # Take the replaced and removed sessions out of their weeks' summaries
+    touched = [session_id for session_ids in grouped.values() for session_id in session_ids] + deleted
+    for start in range(0, len(touched), batch_size):
+        old_rows = WorkoutSession.objects.filter(id__in=touched[start:start + batch_size]).values_list(
+            'user_profile_id', 'date', 'status', 'exercises'
         )
-    return plan
+        for row in old_rows:
+            delta.remove(*row)
+
+    scattered = []
+    for (seq, date, exercises), session_ids in grouped.items():
+        if len(session_ids) == 1:
+            scattered.append(WorkoutSession(
+                id=session_ids[0], date=date, exercises=json.loads(exercises), updated_at=now, change_seq=seq,
+            ))
+            continue
+        for start in range(0, len(session_ids), batch_size):
+            WorkoutSession.objects.filter(id__in=session_ids[start:start + batch_size]).update(
+                date=date, exercises=json.loads(exercises), updated_at=now, change_seq=seq,
+            )
+    if scattered:
+        # bulk_update skips auto_now, so updated_at is set explicitly
+        WorkoutSession.objects.bulk_update(
+            scattered, ['date', 'exercises', 'updated_at', 'change_seq'], batch_size=batch_size
+        )
+    if created:
+        WorkoutSession.objects.bulk_create(created, batch_size=batch_size)
+    with batched_tombstones(seqs):
+        for start in range(0, len(deleted), batch_size):
+            WorkoutSession.objects.filter(id__in=deleted[start:start + batch_size]).delete()
+    delta.apply()
+    return seqs
+
+
+def compute_plan_diffs(plans, today):
+    """Diff many plans without touching the database.
+
+    ``plans`` holds ``(plan_id, profile_id, availability, exercises,
+    start_date, weeks, existing)`` tuples, with ``exercises`` the session
+    template and ``existing`` as passed to ``diff_schedule``.
+    Returns ``(plan_id, profile_id, creates, updates, deletes)`` for the plans
+    that need changes. Only plain data goes in and out, so this can run in a
+    worker process.
+    """
+    diffs = []
+    for plan_id, profile_id, availability, exercises, start_date, weeks, existing in plans:
+        schedule = build_schedule(availability, start_date, weeks, exercises)
+        creates, updates, deletes = diff_schedule(schedule, existing, today)
+        if creates or updates or deletes:
+            diffs.append((plan_id, profile_id, creates, updates, deletes))
+    return diffs
+
+
+def regenerate_workout_plan(plan, today=None):
+    """Bring a plan's future planned sessions in line with the current profile.
+
+    Completed, missed and rescheduled sessions, and anything dated before
+    ``today``, are left untouched. Returns a dict of change counts.
+    """
+    if today is None:
+        today = datetime.date.today()
+    exercises = plan_exercises(plan.user_profile.equipment)
+    schedule = build_schedule(plan.user_profile.availability, plan.start_date, plan.weeks, exercises)
+
+    with transaction.atomic():
+        # Locked, so a session completed meanwhile can't be rescheduled by the diff
+        existing = list(
+            WorkoutSession.objects.filter(plan=plan).select_for_update().values_list('id', 'date', 'status', 'exercises')
+        )
+        creates, updates, deletes = diff_schedule(schedule, existing, today)
+        if creates or updates or deletes:
+            seqs = apply_schedule_diff(plan, creates, updates, deletes)
+            # Same change number as the sessions, rather than allocating another through save()
+            plan.last_updated = timezone.now()
+            plan.change_seq = seqs[plan.user_profile_id]
+            WorkoutPlan.objects.filter(id=plan.id).update(last_updated=plan.last_updated, change_seq=plan.change_seq)
+
+    # Any sessions cached on the instance are stale now
+    getattr(plan, '_prefetched_objects_cache', {}).pop('sessions', None)
+    return {'created': len(creates), 'updated': len(updates), 'deleted': len(deletes)}
+
+
+def update_session_statuses(sessions, updates):
+    """Apply a batch of ``{'id', 'status', 'notes'}`` updates in one transaction.
+
+    ``sessions`` is the queryset the caller is allowed to edit. Items are
+    validated independently and results come back in request order, each
+    either ``{'id', 'status': 'updated'}`` or ``{'id', 'error'}``. Only
+    sessions that actually change are written, with a single ``bulk_update``
+    limited to the changed columns.
+    """
+    valid_statuses = dict(WorkoutSession.STATUS_CHOICES)
+    results = [None] * len(updates)
+    wanted = {}
+    for index, item in enumerate(updates):
+        if not isinstance(item, dict):
+            results[index] = {'id': None, 'error': 'Expected an object'}
+            continue
+        session_id = item.get('id')
+        if not isinstance(session_id, int) or isinstance(session_id, bool):
+            error = 'Invalid id'
+        elif item.get('status') not in valid_statuses:
+            error = 'Invalid status'
+        elif not isinstance(item.get('notes', ''), str):
+            error = 'Invalid notes'
+        elif session_id in wanted:
+            error = 'Duplicate id'
+        else:
+            wanted[session_id] = (index, item)
+            continue
+        results[index] = {'id': session_id, 'error': error}
+
+    with transaction.atomic():
+        found = sessions.filter(id__in=wanted).only(
+            'id', 'user_profile_id', 'date', 'status', 'exercises', 'notes'
+        ).select_for_update().in_bulk()
+        now = timezone.now()
+        changed = []
+        fields = set()
+        delta = SummaryDelta()
+        for session_id, (index, item) in wanted.items():
+            session = found.get(session_id)
+            if session is None:
+                results[index] = {'id': session_id, 'error': 'Not found'}
+                continue
+            results[index] = {'id': session_id, 'status': 'updated'}
+            dirty = False
+            if session.status != item['status']:
+                delta.add_session(session, sign=-1)
+                session.status = item['status']
+                delta.add_session(session)
+                fields.add('status')
+                dirty = True
+            if 'notes' in item and session.notes != item['notes']:
+                session.notes = item['notes']
+                fields.add('notes')
+                dirty = True
+            if dirty:
+                session.updated_at = now
+                changed.append(session)
+        if changed:
+            seqs = allocate_change_seqs(session.user_profile_id for session in changed)
+            for session in changed:
+                session.change_seq = seqs[session.user_profile_id]
+            WorkoutSession.objects.bulk_update(changed, sorted(fields) + ['updated_at', 'change_seq'])
+        delta.apply()
+    return results
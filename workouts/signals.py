@@ -0,0 +1,112 @@
+import threading
+from contextlib import contextmanager
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .authentication import token_cache
+from .catalog import invalidate_catalog
+from .metrics import install_query_wrapper
+from .models import Exercise, Tombstone, UserProfile, WorkoutPlan, WorkoutSession, allocate_change_seqs
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_tokens(sender, instance, **kwargs):
+    # Covers password changes, deactivation and any other user edit
+    token_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_tokens(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.user_id)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+
+
+# Count and time every query for the request metrics
+connection_created.connect(install_query_wrapper, dispatch_uid='install_query_wrapper')
+
+post_save.connect(invalidate_catalog, sender=Exercise, dispatch_uid='invalidate_catalog_save')
+post_delete.connect(invalidate_catalog, sender=Exercise, dispatch_uid='invalidate_catalog_delete')
+
+
+# Profiles whose deletion is in progress on this thread. Their plans and
+# sessions are removed by the cascade, so no tombstones are written for them.
+_deleting_profiles = threading.local()
+
+
+def _profiles_being_deleted():
+    if not hasattr(_deleting_profiles, 'ids'):
+        _deleting_profiles.ids = set()
+    return _deleting_profiles.ids
+
+
+@receiver(pre_delete, sender=UserProfile)
+def mark_profile_deleting(sender, instance, **kwargs):
+    _profiles_being_deleted().add(instance.pk)
+
+
+@receiver(post_delete, sender=UserProfile)
+def unmark_profile_deleting(sender, instance, **kwargs):
+    _profiles_being_deleted().discard(instance.pk)
+
+
+# Tombstones collected by batched_tombstones() on this thread, if active
+_tombstone_batch = threading.local()
+
+
+@contextmanager
+def batched_tombstones(seqs=None):
+    """Write the tombstones of the deletes run inside the block with one bulk_create.
+
+    Use inside the deleting transaction: a cascade otherwise inserts one row
+    per deleted session. ``seqs`` maps profile ids to the change number the
+    caller already allocated for this write; other profiles get a new one.
+    Blocks may nest: the outermost one writes the tombstones of all of them.
+    """
+    depth = getattr(_tombstone_batch, 'depth', 0)
+    if depth:
+        _tombstone_batch.seqs.update(seqs or {})
+        _tombstone_batch.depth = depth + 1
+        try:
+            yield
+        finally:
+            _tombstone_batch.depth = depth
+        return
+
+    pending = _tombstone_batch.pending = []
+    _tombstone_batch.seqs = dict(seqs or {})
+    _tombstone_batch.depth = 1
+    try:
+        yield
+    finally:
+        seqs = _tombstone_batch.seqs
+        del _tombstone_batch.pending, _tombstone_batch.seqs
+        _tombstone_batch.depth = 0
+    if not pending:
+        return
+    seqs.update(allocate_change_seqs({tombstone.user_profile_id for tombstone in pending} - seqs.keys()))
+    for tombstone in pending:
+        tombstone.change_seq = seqs[tombstone.user_profile_id]
+    Tombstone.objects.bulk_create(pending, batch_size=1000)
+
+
+@receiver(post_delete, sender=WorkoutPlan)
+@receiver(post_delete, sender=WorkoutSession)
+def record_tombstone(sender, instance, **kwargs):
+    if instance.user_profile_id in _profiles_being_deleted():
+        return
+    kind = 'plan' if sender is WorkoutPlan else 'session'
+    tombstone = Tombstone(user_profile_id=instance.user_profile_id, kind=kind, object_id=instance.pk)
+    pending = getattr(_tombstone_batch, 'pending', None)
+    if pending is not None:
+        pending.append(tombstone)
+    else:
+        # Written inside the deleting transaction, so it commits or rolls back with it
+        tombstone.save()
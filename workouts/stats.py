@@ -0,0 +1,93 @@
+"""
+Weekly training summaries.
+
+WeeklySummary rows are maintained incrementally: every code path that
+creates, moves, re-statuses or deletes sessions records the old and new
+contribution of each touched session in a SummaryDelta and applies it in the
+same transaction, so the stats endpoint reads a handful of rows instead of
+scanning the session history.
+"""
+import datetime
+from collections import Counter, defaultdict
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import WeeklySummary, WorkoutSession
+
+
+def week_start(date):
+    return date - datetime.timedelta(days=date.weekday())
+
+
+def session_volume(exercises):
+    """Total sets x reps of a session's exercises, ignoring malformed entries"""
+    volume = 0
+    for exercise in exercises or []:
+        try:
+            volume += int(exercise.get('sets', 0)) * int(exercise.get('reps', 0))
+        except (AttributeError, TypeError, ValueError):
+            continue
+    return volume
+
+
+def contribution(status, exercises):
+    """The summary fields one session adds to its week"""
+    volume = session_volume(exercises)
+    fields = Counter({status: 1, 'volume': volume})
+    if status == 'completed':
+        fields['completed_volume'] = volume
+    return fields
+
+
+class SummaryDelta:
+    """Accumulated changes to WeeklySummary rows, written with one UPDATE per distinct change"""
+
+    def __init__(self):
+        self.changes = defaultdict(Counter)
+
+    def add(self, profile_id, date, status, exercises, sign=1):
+        counter = self.changes[(profile_id, week_start(date))]
+        for field, value in contribution(status, exercises).items():
+            counter[field] += sign * value
+
+    def remove(self, profile_id, date, status, exercises):
+        self.add(profile_id, date, status, exercises, sign=-1)
+
+    def add_session(self, session, sign=1):
+        self.add(session.user_profile_id, session.date, session.status, session.exercises, sign)
+
+    def apply(self, batch_size=500):
+        grouped = defaultdict(list)
+        for key, counter in self.changes.items():
+            fields = tuple(sorted((field, value) for field, value in counter.items() if value))
+            if fields:
+                grouped[fields].append(key)
+        self.changes.clear()
+        if not grouped:
+            return
+
+        keys = [key for group in grouped.values() for key in group]
+        WeeklySummary.objects.bulk_create(
+            [WeeklySummary(user_profile_id=profile_id, week_start=week) for profile_id, week in keys],
+            batch_size=batch_size, ignore_conflicts=True,
+        )
+        now = timezone.now()
+        # Regeneration shifts many weeks by the same amounts; those share a statement
+        for fields, group in grouped.items():
+            changes = {field: F(field) + value for field, value in fields}
+            for start in range(0, len(group), batch_size):
+                match = Q()
+                for profile_id, week in group[start:start + batch_size]:
+                    match |= Q(user_profile_id=profile_id, week_start=week)
+                WeeklySummary.objects.filter(match).update(updated_at=now, **changes)
+
+
+def rebuild_weekly_summaries(profile_ids):
+    """Recompute the summaries of ``profile_ids`` from their sessions"""
+    delta = SummaryDelta()
+    sessions = WorkoutSession.objects.filter(user_profile_id__in=profile_ids).values_list(
+        'user_profile_id', 'date', 'status', 'exercises'
+    )
+    for profile_id, date, status, exercises in sessions.iterator(chunk_size=2000):
+        delta.add(profile_id, date, status, exercises)
+    WeeklySummary.objects.filter(user_profile_id__in=profile_ids).delete()
+    delta.apply()
@@ -0,0 +1,75 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from .fatigue import with_fatigue_summary
+from .models import Tombstone, UserProfile, WorkoutPlan, WorkoutSession
+from .serializers import UserProfileSerializer, WorkoutPlanSummarySerializer, WorkoutSessionSerializer
+
+
+def decode_cursor(cursor):
+    """Return the change number in a cursor, or None when it is malformed"""
+    if not isinstance(cursor, str) or not cursor.isdigit():
+        return None
+    return int(cursor)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sync_view(request):
+    """
+    Return what changed for the caller since ?since=<cursor>.
+
+    The cursor is the profile's change counter (see allocate_change_seqs()),
+    so it does not depend on clocks. Without a cursor, or with one older than
+    the last tombstone pruning, everything is returned and ``full`` is true:
+    the client should then drop what it has. The response carries the cursor
+    to send next time, the profile if it changed, changed plans (without
+    nested sessions) and sessions, and the ids of deleted plans and sessions.
+    """
+    since = None
+    if 'since' in request.query_params:
+        since = decode_cursor(request.query_params['since'])
+        if since is None:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # The cached profile on request.user may lag behind, so read the row
+    profile = with_fatigue_summary(UserProfile.objects.select_related('user')).filter(
+        user_id=request.user.id
+    ).first()
+    if profile is None:
+        return Response({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    cursor = profile.change_counter
+    if since is not None and since > cursor:
+        return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+    # Deletions before the pruning point are gone, so a delta could miss them
+    full = since is None or since < profile.pruned_seq
+
+    # Only changes up to the counter read above: anything later is picked up next time
+    plans = WorkoutPlan.objects.filter(user_profile_id=profile.id, change_seq__lte=cursor)
+    sessions = WorkoutSession.objects.filter(user_profile_id=profile.id, change_seq__lte=cursor)
+    deleted = {'plans': [], 'sessions': []}
+    profile_data = None
+
+    if full:
+        profile_data = UserProfileSerializer(profile).data
+    else:
+        plans = plans.filter(change_seq__gt=since)
+        sessions = sessions.filter(change_seq__gt=since)
+        if profile.change_seq > since:
+            profile_data = UserProfileSerializer(profile).data
+        tombstones = Tombstone.objects.filter(
+            user_profile_id=profile.id, change_seq__gt=since, change_seq__lte=cursor
+        ).values_list('kind', 'object_id')
+        for kind, object_id in tombstones:
+            deleted[f'{kind}s'].append(object_id)
+
+    return Response({
+        'cursor': str(cursor),
+        'full': full,
+        'profile': profile_data,
+        'plans': WorkoutPlanSummarySerializer(plans.order_by('id'), many=True).data,
+        'sessions': WorkoutSessionSerializer(sessions.order_by('date', 'id'), many=True).data,
+        'deleted': deleted,
+    })
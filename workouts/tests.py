@@ -1,3 +1,1432 @@
-from django.test import TestCase
+import csv
+import datetime
+import decimal
+import io
+import json
+import os
+import pathlib
+import re
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest import mock, skipIf
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from .authentication import TokenCache, token_cache, token_cache_settings
+from . import async_views, catalog, jobs, urls
+from .management.commands.regenerate_all_plans import Command as RegenerateAllPlansCommand
+from .availability import overlapping_slots, parse_availability, profiles_free_at, slot_mask
+from .budgets import ROUTE_BUDGETS, BudgetExceeded, check_budget
+from .catalog import get_catalog
+from .clients import client_address
+from .login import login_throttle
+from .metrics import registry
+from .middleware import ReadReplicaMiddleware
+from .models import Exercise, FatigueEntry, Job, Tombstone, UserProfile, WeeklySummary, WorkoutSession
+from .parsers import FastJSONParser
+from .renderers import FastJSONRenderer, orjson
+from .routers import ReadReplicaRouter, replica_pins
+from .serializers import WorkoutSessionSerializer
+from .signals import batched_tombstones
+from .services import generate_workout_plan, regenerate_workout_plan, update_session_statuses
+from .stats import rebuild_weekly_summaries, session_volume
+from .views import WorkoutSessionViewSet
 
-# Create your tests here.
+
+class WorkoutPlanQueryCountTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('runner', 'runner@example.com', 'password123')
+        self.profile = UserProfile.objects.create(
+            user=self.user,
+            name='Runner',
+            availability={'Monday': ['18:00-19:00'], 'Thursday': ['07:00-08:00']},
+        )
+        self.client.force_authenticate(self.user)
+
+    def add_plans(self, count):
+        for _ in range(count):
+            generate_workout_plan(self.profile, weeks=4, start_date=datetime.date(2025, 1, 6))
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_generate_writes_the_schedule_with_bulk_inserts(self):
+        get_catalog()
+        with CaptureQueriesContext(connection) as context:
+            plan, sessions = generate_workout_plan(self.profile, weeks=4, start_date=datetime.date(2025, 1, 6))
+        # The change number, plan, sessions, then the weekly summaries (insert missing rows, add the counts)
+        sql = [query['sql'].split()[0] for query in context.captured_queries]
+        self.assertEqual(sql, ['SAVEPOINT', 'UPDATE', 'SELECT', 'INSERT', 'INSERT', 'INSERT', 'UPDATE', 'RELEASE'])
+        self.assertEqual([session.date.isoformat() for session in sessions], [
+            '2025-01-06', '2025-01-09', '2025-01-13', '2025-01-16',
+            '2025-01-20', '2025-01-23', '2025-01-27', '2025-01-30',
+        ])
+        self.assertEqual(list(plan.sessions.order_by('date').values_list('id', flat=True)),
+                         [session.id for session in sessions])
+
+    def test_plan_list_query_count_does_not_grow_with_plans(self):
+        self.add_plans(1)
+        baseline = self.count_queries('/api/workout-plans/')
+        self.add_plans(9)
+        self.assertEqual(self.count_queries('/api/workout-plans/'), baseline)
+
+    def test_plan_detail_loads_sessions_with_prefetch(self):
+        self.add_plans(1)
+        plan = self.profile.plans.get()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f'/api/workout-plans/{plan.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['sessions']), 8)
+        # ETag aggregate, plan, prefetched sessions
+        self.assertEqual(len(context.captured_queries), 3)
+
+
+class PlanRegenerationTests(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user('hiker', 'hiker@example.com', 'password123')
+        self.profile = UserProfile.objects.create(
+            user=user, name='Hiker', availability={'Monday': ['18:00-19:00'], 'Thursday': ['07:00-08:00']},
+        )
+        # Mondays and Thursdays from 6 to 30 January
+        self.plan, _ = generate_workout_plan(self.profile, weeks=4, start_date=datetime.date(2025, 1, 6))
+        self.plan.sessions.filter(date=datetime.date(2025, 1, 16)).update(status='completed')
+        self.today = datetime.date(2025, 1, 13)
+        get_catalog()
+
+    def sessions(self):
+        return list(self.plan.sessions.order_by('date').values_list('id', 'date', 'status', 'updated_at'))
+
+    def set_availability(self, availability):
+        self.profile.availability = availability
+        self.profile.save()
+
+    def test_surplus_sessions_are_moved_then_deleted(self):
+        before = {session[1]: session for session in self.sessions()}
+        self.set_availability({'Tuesday': ['18:00-19:00']})
+        with CaptureQueriesContext(connection) as context:
+            changes = regenerate_workout_plan(self.plan, today=self.today)
+        self.assertEqual(changes, {'created': 0, 'updated': 3, 'deleted': 2})
+        # Read the sessions, allocate the change number, read the rows being replaced,
+        # one UPDATE for the moves, one DELETE (with its tombstones), the weekly
+        # summaries and last_updated
+        self.assertEqual(len(context.captured_queries), 13)
+
+        after = self.sessions()
+        self.assertEqual([(session[1].isoformat(), session[2]) for session in after], [
+            ('2025-01-06', 'planned'), ('2025-01-09', 'planned'), ('2025-01-14', 'planned'),
+            ('2025-01-16', 'completed'), ('2025-01-21', 'planned'), ('2025-01-28', 'planned'),
+        ])
+        # History keeps its rows untouched; the earliest future sessions are the ones moved
+        for day in (6, 9, 16):
+            self.assertIn(before[datetime.date(2025, 1, day)], after)
+        self.assertEqual([session[0] for session in after if session[1] > self.today and session[2] == 'planned'],
+                         [before[datetime.date(2025, 1, day)][0] for day in (13, 20, 23)])
+
+    def test_new_days_are_created_and_matches_left_alone(self):
+        before = self.sessions()
+        self.set_availability({day: ['18:00-19:00'] for day in ('Monday', 'Tuesday', 'Thursday', 'Friday')})
+        changes = regenerate_workout_plan(self.plan, today=self.today)
+        self.assertEqual(changes, {'created': 6, 'updated': 0, 'deleted': 0})
+        after = self.sessions()
+        self.assertEqual(len(after), 14)
+        self.assertTrue(set(before) <= set(after))
+
+        with self.assertNumQueries(3):
+            self.assertEqual(regenerate_workout_plan(self.plan, today=self.today),
+                             {'created': 0, 'updated': 0, 'deleted': 0})
+
+
+
+class RegenerateAllPlansTests(APITestCase):
+    def setUp(self):
+        self.profiles = []
+        for name in ('first', 'second', 'third'):
+            user = User.objects.create_user(name, f'{name}@example.com', 'password123')
+            profile = UserProfile.objects.create(user=user, name=name, availability={'Monday': ['18:00-19:00']})
+            generate_workout_plan(profile, weeks=2)
+            profile.availability = {'Tuesday': ['18:00-19:00']}
+            profile.save()
+            self.profiles.append(profile)
+        get_catalog()
+
+    def weekdays(self, profile):
+        return sorted(WorkoutSession.objects.filter(user_profile=profile).values_list('date__week_day', flat=True))
+
+    def run_command(self, **options):
+        out = io.StringIO()
+        call_command('regenerate_all_plans', workers=0, chunk_size=2, stdout=out, **options)
+        return out.getvalue()
+
+    def test_every_plan_is_regenerated(self):
+        out = self.run_command()
+        # Two sessions per plan moved from Monday (week_day 2) to Tuesday (3)
+        for profile in self.profiles:
+            self.assertEqual(self.weekdays(profile), [3, 3])
+        self.assertIn('3/3 profiles', out)
+        self.assertIn('Done: 3 profiles, 3 plans changed, 0 sessions created, 6 updated, 0 deleted', out)
+        # A second run has nothing left to do
+        self.assertIn('0 plans changed', self.run_command())
+
+    def test_resumes_from_the_checkpoint(self):
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = pathlib.Path(directory) / 'checkpoint'
+            checkpoint.write_text(str(self.profiles[0].id))
+            out = self.run_command(checkpoint=checkpoint)
+            self.assertIn(f'Resuming after profile {self.profiles[0].id}', out)
+            self.assertIn('Done: 2 profiles, 2 plans changed', out)
+            # Finished runs leave no checkpoint behind
+            self.assertFalse(checkpoint.exists())
+        self.assertEqual([self.weekdays(profile) for profile in self.profiles], [[2, 2], [3, 3], [3, 3]])
+
+    def test_checkpoint_is_written_after_each_chunk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = pathlib.Path(directory) / 'checkpoint'
+            written = []
+            write_text = pathlib.Path.write_text
+
+            def record(path, text):
+                written.append(text)
+                return write_text(path, text)
+
+            with mock.patch.object(pathlib.Path, 'write_text', record):
+                self.run_command(checkpoint=checkpoint)
+        self.assertEqual(written, [str(self.profiles[1].id), str(self.profiles[2].id)])
+
+    def test_sessions_completed_after_loading_are_left_alone(self):
+        completed = WorkoutSession.objects.filter(user_profile=self.profiles[0]).order_by('date').first()
+        load_chunk = RegenerateAllPlansCommand.load_chunk
+
+        def load_then_complete(profile_ids, today):
+            payload = load_chunk(profile_ids, today)
+            # The user finishes a workout while the chunk waits to be applied
+            WorkoutSession.objects.filter(id=completed.id).update(status='completed')
+            return payload
+
+        with mock.patch.object(RegenerateAllPlansCommand, 'load_chunk', staticmethod(load_then_complete)):
+            out = self.run_command()
+        self.assertIn('Done: 3 profiles, 2 plans changed', out)
+        self.assertIn('1 skipped', out)
+        completed.refresh_from_db()
+        self.assertEqual(completed.status, 'completed')
+        self.assertEqual([self.weekdays(profile) for profile in self.profiles], [[2, 2], [3, 3], [3, 3]])
+
+class SessionListTests(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user('skier', 'skier@example.com', 'password123')
+        self.profile = UserProfile.objects.create(
+            user=user, name='Skier', availability={'Monday': ['18:00-19:00'], 'Thursday': ['07:00-08:00']},
+        )
+        self.plan, _ = generate_workout_plan(self.profile, weeks=4, start_date=datetime.date(2025, 1, 6))
+        self.other_plan, _ = generate_workout_plan(self.profile, weeks=1, start_date=datetime.date(2025, 1, 6))
+        self.client.force_authenticate(user)
+
+    def walk(self, params):
+        """Follow next links from the first page, returning (id, date) per page"""
+        pages = []
+        response = self.client.get('/api/workout-sessions/', params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append([(session['id'], session['date']) for session in response.data['results']])
+            if not response.data['next']:
+                return pages
+            if len(pages) == 1:
+                # An insert before the cursor must not shift later pages
+                WorkoutSession.objects.create(user_profile=self.profile, plan=self.plan,
+                                              date=datetime.date(2025, 1, 6), exercises=[])
+            response = self.client.get(response.data['next'])
+
+    def test_cursor_pages_are_stable_and_ordered(self):
+        expected = list(WorkoutSession.objects.filter(user_profile=self.profile).order_by('date', 'id').values_list(
+            'id', 'date'
+        ))
+        pages = self.walk({'page_size': 3})
+        self.assertEqual([len(page) for page in pages], [3, 3, 3, 1])
+        self.assertEqual([row for page in pages for row in page],
+                         [(session_id, date.isoformat()) for session_id, date in expected])
+
+    def test_filters(self):
+        self.plan.sessions.filter(date=datetime.date(2025, 1, 16)).update(status='completed')
+
+        def dates(params):
+            return [session['date'] for session in self.client.get('/api/workout-sessions/', params).data['results']]
+
+        self.assertEqual(dates({'date_from': '2025-01-20', 'date_to': '2025-01-27'}),
+                         ['2025-01-20', '2025-01-23', '2025-01-27'])
+        self.assertEqual(dates({'status': 'completed'}), ['2025-01-16'])
+        self.assertEqual(dates({'plan': self.other_plan.id}), ['2025-01-06', '2025-01-09'])
+        self.assertEqual(dates({'plan': self.other_plan.id, 'date_from': '2025-01-07'}), ['2025-01-09'])
+        for params in ({'status': 'skipped'}, {'date_from': '2025-13-01'}, {'plan': 'abc'}):
+            self.assertEqual(self.client.get('/api/workout-sessions/', params).status_code, 400)
+
+
+class SessionExportTests(APITestCase):
+    def setUp(self):
+        availability = {'Monday': ['18:00-19:00'], 'Thursday': ['07:00-08:00']}
+        user = User.objects.create_user('rider', 'rider@example.com', 'password123')
+        self.profile = UserProfile.objects.create(user=user, name='Rider', availability=availability)
+        generate_workout_plan(self.profile, weeks=2, start_date=datetime.date(2025, 1, 6))
+        other = User.objects.create_user('other', 'other@example.com', 'password123')
+        generate_workout_plan(UserProfile.objects.create(user=other, name='Other', availability=availability),
+                              weeks=2, start_date=datetime.date(2025, 1, 6))
+        WorkoutSession.objects.filter(user_profile=self.profile, date=datetime.date(2025, 1, 9)).update(
+            status='completed', notes='Felt, "strong"\nall session'
+        )
+        self.client.force_authenticate(user)
+
+    def export(self, **params):
+        response = self.client.get('/api/workout-sessions/export/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_jsonl(self):
+        response, body = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="workout-sessions.jsonl"')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['date'] for row in rows], ['2025-01-06', '2025-01-09', '2025-01-13', '2025-01-16'])
+        self.assertEqual({row['user_profile'] for row in rows}, {self.profile.id})
+        # Same shape as the list endpoint
+        listed = self.client.get('/api/workout-sessions/').data['results']
+        self.assertEqual(rows, json.loads(JSONRenderer().render(listed)))
+
+    def test_csv_with_filters(self):
+        response, body = self.export(output='csv', date_from='2025-01-07', date_to='2025-01-13')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="workout-sessions.csv"')
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(list(rows[0]), WorkoutSessionSerializer.Meta.fields)
+        self.assertEqual([(row['date'], row['status']) for row in rows],
+                         [('2025-01-09', 'completed'), ('2025-01-13', 'planned')])
+        self.assertEqual(rows[0]['notes'], 'Felt, "strong"\nall session')
+        self.assertIsInstance(json.loads(rows[0]['exercises']), list)
+
+        _, body = self.export(output='csv', status='completed')
+        self.assertEqual(len(body.splitlines()), 3)
+        self.assertEqual(self.client.get('/api/workout-sessions/export/', {'output': 'xml'}).status_code, 400)
+
+
+
+
+class BulkStatusUpdateTests(APITestCase):
+    def setUp(self):
+        availability = {'Monday': ['18:00-19:00'], 'Thursday': ['07:00-08:00']}
+        user = User.objects.create_user('skier', 'skier@example.com', 'password123')
+        self.profile = UserProfile.objects.create(user=user, name='Skier', availability=availability)
+        _, self.plan_sessions = generate_workout_plan(self.profile, weeks=2, start_date=datetime.date(2025, 1, 6))
+        other = User.objects.create_user('other', 'other@example.com', 'password123')
+        _, self.other_sessions = generate_workout_plan(
+            UserProfile.objects.create(user=other, name='Other', availability=availability),
+            weeks=2, start_date=datetime.date(2025, 1, 6),
+        )
+        self.client.force_authenticate(user)
+
+    def bulk_update(self, updates):
+        return self.client.post('/api/workout-sessions/bulk_update_status/', updates, format='json')
+
+    def statuses(self, sessions):
+        return list(WorkoutSession.objects.filter(id__in=[session.id for session in sessions])
+                    .order_by('date').values_list('status', 'notes'))
+
+    def test_items_succeed_or_fail_independently(self):
+        first, second, third, _ = self.plan_sessions
+        foreign = self.other_sessions[0]
+        response = self.bulk_update([
+            {'id': first.id, 'status': 'completed', 'notes': 'Easy'},
+            {'id': second.id, 'status': 'skipped'},
+            {'id': foreign.id, 'status': 'completed'},
+            {'id': 999999, 'status': 'completed'},
+            {'id': first.id, 'status': 'missed'},
+            {'id': '1', 'status': 'completed'},
+            {'id': third.id, 'status': 'missed', 'notes': 5},
+            'completed',
+            {'id': third.id, 'status': 'missed'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(response.data['failed'], 7)
+        self.assertEqual(response.data['results'], [
+            {'id': first.id, 'status': 'updated'},
+            {'id': second.id, 'error': 'Invalid status'},
+            # Another profile's session looks the same as one that doesn't exist
+            {'id': foreign.id, 'error': 'Not found'},
+            {'id': 999999, 'error': 'Not found'},
+            {'id': first.id, 'error': 'Duplicate id'},
+            {'id': '1', 'error': 'Invalid id'},
+            {'id': third.id, 'error': 'Invalid notes'},
+            {'id': None, 'error': 'Expected an object'},
+            {'id': third.id, 'status': 'updated'},
+        ])
+        self.assertEqual(self.statuses(self.plan_sessions), [
+            ('completed', 'Easy'), ('planned', ''), ('missed', ''), ('planned', ''),
+        ])
+        self.assertEqual(self.statuses([foreign]), [('planned', '')])
+
+    def test_changes_are_written_with_one_bulk_update(self):
+        updates = [{'id': session.id, 'status': 'completed'} for session in self.plan_sessions[:3]]
+        unchanged = self.plan_sessions[3]
+        updates.append({'id': unchanged.id, 'status': 'planned'})
+        with CaptureQueriesContext(connection) as context:
+            response = self.bulk_update(updates)
+        self.assertEqual(response.data['updated'], 4)
+        session_updates = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "workouts_workoutsession"')
+        ]
+        self.assertEqual(len(session_updates), 1)
+        # The unchanged session is reported but not rewritten
+        self.assertEqual(WorkoutSession.objects.get(id=unchanged.id).updated_at, unchanged.updated_at)
+        self.assertEqual(WeeklySummary.objects.get(user_profile=self.profile, week_start='2025-01-06').completed, 2)
+
+    def test_request_limits(self):
+        self.assertEqual(self.bulk_update({'id': 1, 'status': 'completed'}).status_code, 400)
+        too_many = [{'id': self.plan_sessions[0].id, 'status': 'completed'}] * 501
+        response = self.bulk_update(too_many)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'At most 500 updates per request'})
+        self.assertEqual(self.statuses(self.plan_sessions[:1]), [('planned', '')])
+
+        response = self.bulk_update(too_many[:500])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['updated'], response.data['failed']), (1, 499))
+
+class SyncTests(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user('rower', 'rower@example.com', 'password123')
+        self.profile = UserProfile.objects.create(
+            user=user, name='Rower', availability={'Monday': ['18:00-19:00'], 'Thursday': ['07:00-08:00']},
+        )
+        self.plan, self.plan_sessions = generate_workout_plan(
+            self.profile, weeks=2, start_date=datetime.date(2025, 1, 6)
+        )
+        other = User.objects.create_user('other', 'other@example.com', 'password123')
+        generate_workout_plan(UserProfile.objects.create(user=other, name='Other', availability={'Monday': ['18:00-19:00']}))
+        self.client.force_authenticate(user)
+
+    def sync(self, since=None):
+        response = self.client.get('/api/sync/', {} if since is None else {'since': since})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_initial_sync_returns_everything(self):
+        data = self.sync()
+        self.assertTrue(data['full'])
+        self.assertEqual(data['profile']['id'], self.profile.id)
+        self.assertEqual([plan['id'] for plan in data['plans']], [self.plan.id])
+        self.assertEqual([session['id'] for session in data['sessions']],
+                         [session.id for session in self.plan_sessions])
+        self.assertEqual(data['deleted'], {'plans': [], 'sessions': []})
+
+        # Nothing changed since
+        data = self.sync(data['cursor'])
+        self.assertFalse(data['full'])
+        self.assertEqual((data['profile'], data['plans'], data['sessions']), (None, [], []))
+
+    def test_incremental_sync_after_an_update_and_a_delete(self):
+        cursor = self.sync()['cursor']
+        updated, deleted = self.plan_sessions[:2]
+        response = self.client.post(f'/api/workout-sessions/{updated.id}/update_status/', {'status': 'completed'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.delete(f'/api/workout-sessions/{deleted.id}/').status_code, 204)
+
+        data = self.sync(cursor)
+        self.assertFalse(data['full'])
+        self.assertIsNone(data['profile'])
+        self.assertEqual(data['plans'], [])
+        self.assertEqual([(session['id'], session['status']) for session in data['sessions']],
+                         [(updated.id, 'completed')])
+        self.assertEqual(data['deleted'], {'plans': [], 'sessions': [deleted.id]})
+
+        # Profile changes, including a new fatigue entry, bring the profile along
+        self.assertEqual(self.client.post('/api/fatigue/', {'level': 4}).status_code, 201)
+        data = self.sync(data['cursor'])
+        self.assertEqual(data['profile']['fatigue']['latest_level'], 4)
+        self.assertEqual((data['sessions'], data['deleted']), ([], {'plans': [], 'sessions': []}))
+
+        self.client.delete(f'/api/workout-plans/{self.plan.id}/')
+        data = self.sync(data['cursor'])
+        self.assertEqual(data['deleted']['plans'], [self.plan.id])
+        self.assertEqual(len(data['deleted']['sessions']), len(self.plan_sessions) - 1)
+
+    def test_nested_tombstone_batches_write_once(self):
+        first, second, third = self.plan_sessions[:3]
+        ids = [first.id, second.id]
+        with transaction.atomic():
+            with batched_tombstones():
+                with batched_tombstones():
+                    first.delete()
+                self.assertFalse(Tombstone.objects.exists())
+                second.delete()
+            self.assertEqual(sorted(Tombstone.objects.values_list('object_id', flat=True)), ids)
+        # Outside a batch deletes write their tombstone at once again
+        third.delete()
+        self.assertEqual(Tombstone.objects.count(), 3)
+
+    def test_malformed_cursor(self):
+        cursor = int(self.sync()['cursor'])
+        for since in ('abc', '-1', '1.5', '', str(cursor + 1)):
+            response = self.client.get('/api/sync/', {'since': since})
+            self.assertEqual(response.status_code, 400, since)
+            self.assertEqual(response.data, {'error': 'Invalid cursor'})
+
+    def test_cursor_older_than_pruned_tombstones_gets_everything(self):
+        cursor = self.sync()['cursor']
+        self.client.delete(f'/api/workout-sessions/{self.plan_sessions[0].id}/')
+        newer = self.sync(cursor)['cursor']
+        self.client.delete(f'/api/workout-sessions/{self.plan_sessions[1].id}/')
+        Tombstone.objects.filter(object_id=self.plan_sessions[0].id).update(
+            deleted_at=timezone.now() - datetime.timedelta(days=91)
+        )
+        call_command('prune_tombstones', stdout=io.StringIO())
+        self.assertEqual(list(Tombstone.objects.values_list('object_id', flat=True)), [self.plan_sessions[1].id])
+
+        data = self.sync(cursor)
+        self.assertTrue(data['full'])
+        self.assertEqual(data['deleted'], {'plans': [], 'sessions': []})
+        self.assertEqual(len(data['sessions']), len(self.plan_sessions) - 2)
+        # A cursor taken after the pruned deletion still gets a delta
+        data = self.sync(newer)
+        self.assertFalse(data['full'])
+        self.assertEqual(data['deleted']['sessions'], [self.plan_sessions[1].id])
+
+
+class JobTests(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user('climber', 'climber@example.com', 'password123')
+        self.profile = UserProfile.objects.create(user=user, name='Climber', availability={'Monday': ['18:00-19:00']})
+        self.client.force_authenticate(user)
+
+    def use_backend(self, backend):
+        patcher = mock.patch.object(jobs, '_backend', backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_generate_answers_202_with_the_job(self):
+        self.use_backend(jobs.DatabaseBackend())
+        response = self.client.post('/api/workout-plans/', {'weeks': 2})
+        self.assertEqual(response.status_code, 202)
+        job = Job.objects.get()
+        self.assertEqual((job.kind, job.params, job.status), ('generate_plan', {'weeks': 2}, 'queued'))
+        self.assertEqual(response.data['id'], job.id)
+        self.assertEqual(response.data['status'], 'queued')
+        self.assertEqual(response['Location'], f'http://testserver/api/jobs/{job.id}/')
+        self.assertEqual(response.data['url'], response['Location'])
+        self.assertEqual(self.client.get(response['Location']).data['status'], 'queued')
+        self.assertEqual(self.client.post('/api/workout-plans/', {'weeks': 53}).status_code, 400)
+
+    def test_immediate_backend_runs_on_commit(self):
+        self.use_backend(jobs.ImmediateBackend())
+        plan, _ = generate_workout_plan(self.profile, weeks=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/workout-plans/{plan.id}/regenerate/')
+        self.assertEqual(response.status_code, 202)
+        job = self.client.get(response['Location']).data
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['result'], {'plan_id': plan.id, 'changes': {'created': 0, 'updated': 0, 'deleted': 0}})
+
+    def test_database_backend_leaves_jobs_to_run_jobs(self):
+        self.use_backend(jobs.DatabaseBackend())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/workout-plans/', {'weeks': 2})
+        job = Job.objects.get()
+        self.assertEqual(job.status, 'queued')
+        call_command('run_jobs', once=True, stdout=io.StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(job.result, {'plan_id': self.profile.plans.get().id, 'sessions': 2})
+
+    def test_thread_pool_backend_runs_jobs_off_the_request_thread(self):
+        backend = jobs.ThreadPoolBackend()
+        with mock.patch.object(jobs, 'run_job') as run_job:
+            backend.submit(7)
+            backend._executor.shutdown(wait=True)
+        run_job.assert_called_once_with(7)
+
+    def test_failures_are_recorded(self):
+        job = Job.objects.create(user_profile=self.profile, kind='regenerate_plan', params={'plan_id': 999999})
+        with self.assertLogs('workouts.jobs', 'ERROR'):
+            self.assertTrue(jobs.run_job(job.id))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('DoesNotExist', job.error)
+
+    def test_a_job_is_claimed_once(self):
+        job = Job.objects.create(user_profile=self.profile, kind='generate_plan', params={'weeks': 1})
+        real_generate = jobs.JOB_HANDLERS['generate_plan']
+        claims = []
+
+        def generate_racing_another_worker(job):
+            # A second worker picks the same id while the first is running it
+            claims.append(jobs.run_job(job.id))
+            return real_generate(job)
+
+        with mock.patch.dict(jobs.JOB_HANDLERS, generate_plan=generate_racing_another_worker):
+            self.assertTrue(jobs.run_job(job.id))
+        self.assertEqual(claims, [False])
+        self.assertFalse(jobs.run_job(job.id))
+        self.assertEqual(self.profile.plans.count(), 1)
+
+    def test_stale_running_jobs_are_requeued(self):
+        job = Job.objects.create(user_profile=self.profile, kind='generate_plan', params={'weeks': 1})
+        Job.objects.filter(id=job.id).update(status='running', started_at=timezone.now() - datetime.timedelta(hours=1))
+        fresh = Job.objects.create(user_profile=self.profile, kind='generate_plan', params={'weeks': 1},
+                                   status='running', started_at=timezone.now())
+        out = io.StringIO()
+        call_command('run_jobs', once=True, timeout=600, stdout=out)
+        self.assertIn('requeued 1 stale job(s)', out.getvalue())
+        job.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((job.status, fresh.status), ('succeeded', 'running'))
+
+    def test_a_requeued_run_does_not_record_its_outcome(self):
+        job = Job.objects.create(user_profile=self.profile, kind='generate_plan', params={'weeks': 1})
+        real_generate = jobs.JOB_HANDLERS['generate_plan']
+
+        def generate_then_get_requeued(job):
+            result = real_generate(job)
+            self.assertEqual(jobs.requeue_stale_jobs(-1), 1)
+            return result
+
+        with mock.patch.dict(jobs.JOB_HANDLERS, generate_plan=generate_then_get_requeued), \
+                self.assertLogs('workouts.jobs', 'WARNING'):
+            jobs.run_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), ('queued', None))
+
+class CachedTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user('lifter', 'lifter@example.com', 'password123')
+        self.profile = UserProfile.objects.create(user=self.user, name='Lifter')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token.key}')
+
+    def test_verify_runs_no_queries_once_cached(self):
+        self.assertEqual(self.client.get('/api/auth/verify/').status_code, 200)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/auth/verify/')
+        self.assertEqual(response.data['name'], 'Lifter')
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_profile_edit_invalidates_cache(self):
+        self.client.get('/api/auth/verify/')
+        self.client.patch(f'/api/user-profile/{self.profile.id}/', {'name': 'Renamed'}, format='json')
+        self.assertEqual(self.client.get('/api/auth/verify/').data['name'], 'Renamed')
+
+    def test_password_change_and_logout_invalidate_cache(self):
+        self.client.get('/api/auth/verify/')
+        self.user.set_password('new-password123')
+        self.user.save()
+        self.assertIsNone(token_cache.get(self.token.key))
+
+        self.client.get('/api/auth/verify/')
+        self.assertEqual(self.client.post('/api/auth/logout/').status_code, 204)
+        self.assertEqual(self.client.get('/api/auth/verify/').status_code, 401)
+
+    @override_settings(
+        CACHES={alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': alias}
+                for alias in ('default', 'tokens')},
+        AUTH_TOKEN_CACHE={'CACHE_ALIAS': 'tokens'},
+    )
+    def test_logout_reaches_other_workers_through_the_shared_cache(self):
+        # Stands in for the cache of another worker process
+        other_worker = TokenCache()
+        self.client.get('/api/auth/verify/')
+        self.assertEqual(other_worker.get(self.token.key)[0].pk, self.user.pk)
+        self.client.post('/api/auth/logout/')
+        self.assertIsNone(other_worker.get(self.token.key))
+
+    def test_other_workers_drop_local_copies_after_the_ttl(self):
+        other_worker = TokenCache()
+        other_worker.set(self.token.key, self.user, self.profile)
+        self.client.post('/api/auth/logout/')
+        later = time.monotonic() + token_cache_settings()['TTL']
+        with mock.patch('workouts.authentication.time.monotonic', return_value=later):
+            self.assertIsNone(other_worker.get(self.token.key))
+
+
+class FastJSONTests(SimpleTestCase):
+    data = {
+        'id': 2 ** 40, 'ok': True, 'none': None, 'name': 'Łódź — “quoted”\u2028line', 'tags': ['a', 'b'],
+        'weights': [0.0001, 62.5, 1 / 3, -0.0, 1e15], 'nested': {'1': [{'x': 1}]},
+        'at': datetime.datetime(2025, 3, 3, 18, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        'day': datetime.date(2025, 3, 3), 'volume': decimal.Decimal('1234.50'),
+    }
+
+    def test_matches_json_renderer(self):
+        self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+        # Too big for orjson, so rendered by the stdlib path
+        self.assertEqual(FastJSONRenderer().render({'big': 2 ** 70}), b'{"big":1180591620717411303424}')
+
+    @skipIf(orjson is None, 'orjson is not installed')
+    def test_documented_float_differences(self):
+        for value, fast, stdlib in ((1e20, b'1e20', b'1e+20'), (1e-5, b'0.00001', b'1e-05'), (1e16, b'1e16', b'1e+16')):
+            self.assertEqual((FastJSONRenderer().render(value), JSONRenderer().render(value)), (fast, stdlib))
+            self.assertEqual(json.loads(fast), value)
+        self.assertEqual(FastJSONRenderer().render([float('nan'), float('inf')]), b'[null,null]')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render([float('nan')])
+
+    def test_stdlib_fallback(self):
+        with mock.patch('workouts.renderers.orjson', None), mock.patch('workouts.parsers.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+            with self.assertRaises(ValueError):
+                FastJSONRenderer().render([float('nan')])
+            self.assertEqual(self.parse(b'{"a": [1, 2.5]}'), {'a': [1, 2.5]})
+
+    def parse(self, body, encoding='utf-8'):
+        return FastJSONParser().parse(io.BytesIO(body), parser_context={'encoding': encoding})
+
+    def test_parser(self):
+        body = JSONRenderer().render(self.data)
+        self.assertEqual(self.parse(body), JSONParser().parse(io.BytesIO(body)))
+        self.assertEqual(self.parse('{"name": "café"}'.encode('latin-1'), encoding='latin-1'), {'name': 'café'})
+        for invalid in (b'{"a": NaN}', b'{"a": 1', b'\xff'):
+            with self.assertRaises(ParseError):
+                self.parse(invalid)
+
+
+@override_settings(LOGIN_THROTTLE={'MAX_FAILURES': 3})
+class LoginThrottleTests(APITestCase):
+    def setUp(self):
+        login_throttle.clear()
+        self.user = User.objects.create_user('sprinter', 'sprinter@example.com', 'password123')
+        UserProfile.objects.create(user=self.user, name='Sprinter')
+
+    def login(self, password, email='sprinter@example.com', **extra):
+        return self.client.post('/api/auth/login/', {'email': email, 'password': password}, format='json', **extra)
+
+    def test_login_is_one_lookup(self):
+        Token.objects.create(user=self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.login('password123')
+        self.assertEqual(response.data['user']['name'], 'Sprinter')
+        # The user (with its profile) and the token
+        self.assertEqual(len(context.captured_queries), 2)
+
+    def test_failures_are_refused_before_hashing(self):
+        self.assertEqual(self.login('wrong').status_code, 401)
+        self.assertEqual(self.login('password123').status_code, 200)
+        for _ in range(3):
+            self.assertEqual(self.login('wrong').status_code, 401)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.login('password123')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_failures_elsewhere_do_not_lock_the_owner_out(self):
+        for _ in range(3):
+            self.login('wrong', REMOTE_ADDR='10.0.0.66')
+        self.assertEqual(self.login('password123', REMOTE_ADDR='10.0.0.66').status_code, 429)
+        self.assertEqual(self.login('password123', REMOTE_ADDR='10.0.0.1').status_code, 200)
+
+    @override_settings(CLIENT_ADDRESS_HEADER='HTTP_X_FORWARDED_FOR', TRUSTED_PROXY_COUNT=1)
+    def test_client_address_comes_from_the_trusted_proxy(self):
+        # All requests arrive from the proxy; entries the client made up are ignored
+        for i in range(3):
+            self.login('wrong', HTTP_X_FORWARDED_FOR=f'192.0.2.{i}, 10.0.0.66')
+        self.assertEqual(self.login('password123', HTTP_X_FORWARDED_FOR='10.0.0.66').status_code, 429)
+        self.assertEqual(self.login('password123', HTTP_X_FORWARDED_FOR='10.0.0.1').status_code, 200)
+
+        factory = RequestFactory()
+        self.assertEqual(client_address(factory.get('/', HTTP_X_FORWARDED_FOR='1.2.3.4, 5.6.7.8')), '5.6.7.8')
+        self.assertEqual(client_address(factory.get('/')), '127.0.0.1')
+        with self.settings(TRUSTED_PROXY_COUNT=2):
+            self.assertEqual(client_address(factory.get('/', HTTP_X_FORWARDED_FOR='1.2.3.4, 5.6.7.8')), '1.2.3.4')
+            self.assertEqual(client_address(factory.get('/', HTTP_X_FORWARDED_FOR='5.6.7.8')), '5.6.7.8')
+
+    def test_unknown_email_gets_the_same_answer(self):
+        unknown = self.login('wrong', email='nobody@example.com')
+        wrong = self.login('wrong')
+        self.assertEqual((unknown.status_code, unknown.data), (wrong.status_code, wrong.data))
+
+
+class RegistrationTests(APITestCase):
+    def register(self, email, username):
+        return self.client.post('/api/auth/register/', {'email': email, 'username': username, 'password': 'password123'},
+                                format='json')
+
+    def test_register_writes_in_one_transaction(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.register('new@example.com', 'newbie')
+        self.assertEqual(response.status_code, 200)
+        user = User.objects.select_related('profile').get(username='newbie')
+        self.assertEqual(user.profile.name, 'newbie')
+        self.assertEqual(Token.objects.get(user=user).key, response.data['token'])
+        # No pre-check queries: the three inserts between opening and closing the transaction
+        sql = [query['sql'].split()[0] for query in context.captured_queries]
+        self.assertEqual(sql[1:], ['INSERT', 'INSERT', 'INSERT', 'RELEASE'])
+
+    def test_conflicts_are_mapped_from_constraints(self):
+        self.register('new@example.com', 'newbie')
+        self.assertEqual(self.register('new@example.com', 'other').data, {'message': 'Email already exists'})
+        self.assertEqual(self.register('other@example.com', 'newbie').data, {'message': 'Username already exists'})
+        self.assertEqual(User.objects.count(), 1)
+        self.assertEqual(UserProfile.objects.count(), 1)
+
+    def test_emails_ignore_case(self):
+        self.assertEqual(self.register('New@Example.com', 'newbie').data['user']['email'], 'new@example.com')
+        self.assertEqual(self.register('NEW@example.COM', 'other').data, {'message': 'Email already exists'})
+        # The constraint holds for writes that skip the API too
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create_user('sneaky', 'NEW@EXAMPLE.COM', 'password123')
+        response = self.client.post('/api/auth/login/', {'email': 'nEw@example.com', 'password': 'password123'},
+                                    format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_imported_emails_ignore_case(self):
+        self.register('taken@example.com', 'taken')
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory) / 'users.csv'
+            path.write_text(
+                'email,username,password\n'
+                'John.Doe@Corp.com,john,password123\n'
+                'JOHN.DOE@corp.com,johnny,password123\n'
+                'Taken@Example.com,other,password123\n'
+            )
+            err = io.StringIO()
+            call_command('import_users', path, workers=0, stdout=io.StringIO(), stderr=err)
+        self.assertIn('line 3: skipped, email or username repeated in the file', err.getvalue())
+        self.assertIn('line 4: skipped, email taken@example.com already exists', err.getvalue())
+        self.assertEqual(User.objects.get(username='john').email, 'john.doe@corp.com')
+        response = self.client.post('/api/auth/login/', {'email': 'John.Doe@Corp.com', 'password': 'password123'},
+                                    format='json')
+        self.assertEqual(response.status_code, 200)
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('cyclist', 'cyclist@example.com', 'password123')
+        self.profile = UserProfile.objects.create(user=self.user, name='Cyclist', availability={'Tuesday': ['06:00-07:00']})
+        self.plan, _ = generate_workout_plan(self.profile, weeks=2, start_date=datetime.date(2025, 3, 3))
+        self.client.force_authenticate(self.user)
+
+    def assert_revalidates(self, url, change):
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertLessEqual(len(context.captured_queries), 2)
+
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_plan_tag_changes_when_a_session_changes(self):
+        session = self.plan.sessions.all()[0]
+        self.assert_revalidates(
+            f'/api/workout-plans/{self.plan.id}/',
+            lambda: self.client.post(f'/api/workout-sessions/{session.id}/update_status/', {'status': 'completed'}),
+        )
+
+    def test_session_list_tag_changes_when_a_session_is_deleted(self):
+        session = self.plan.sessions.all()[0]
+        self.assert_revalidates('/api/workout-sessions/', lambda: session.delete())
+
+    def test_profile_tag_changes_on_profile_edit(self):
+        self.assert_revalidates(
+            '/api/user-profile/',
+            lambda: self.client.patch(f'/api/user-profile/{self.profile.id}/', {'name': 'Renamed'}, format='json'),
+        )
+
+
+
+class AsyncViewTests(APITestCase):
+    """The async GET handlers must answer exactly like the DRF views they stand in for"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('swimmer', 'swimmer@example.com', 'password123')
+        self.profile = UserProfile.objects.create(user=self.user, name='Swimmer', availability={'Friday': ['06:00-07:00']})
+        generate_workout_plan(self.profile, weeks=2, start_date=datetime.date(2025, 3, 3))
+        self.token = Token.objects.create(user=self.user)
+        self.factory = RequestFactory()
+        token_cache.clear()
+
+    def both(self, view, url, params=None, **headers):
+        sync = self.client.get(url, params, **headers)
+        request = self.factory.get(url, params, **headers)
+        return sync, async_to_sync(view)(request)
+
+    def assert_same(self, view, url, params=None):
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {self.token.key}'}
+        sync, async_ = self.both(view, url, params, **auth)
+        self.assertEqual(async_.status_code, sync.status_code)
+        self.assertEqual(json.loads(async_.content), json.loads(sync.content))
+        self.assertEqual(async_.get('ETag'), sync.get('ETag'))
+        self.assertEqual(async_.get('Last-Modified'), sync.get('Last-Modified'))
+        if 'ETag' in sync:
+            # Either path accepts the other's ETag
+            sync, async_ = self.both(view, url, params, HTTP_IF_NONE_MATCH=sync['ETag'], **auth)
+            self.assertEqual((sync.status_code, async_.status_code), (304, 304))
+        return sync
+
+    def test_profile(self):
+        self.assert_same(async_views.profile_detail, '/api/user-profile/')
+
+    def test_plan_list(self):
+        self.assert_same(async_views.plan_list, '/api/workout-plans/')
+
+    def test_session_list(self):
+        self.assert_same(async_views.session_list, '/api/workout-sessions/', {'status': 'planned', 'page_size': 2})
+        self.assert_same(async_views.session_list, '/api/workout-sessions/', {'status': 'skipped'})
+
+    def test_verify_token(self):
+        self.assert_same(async_views.verify_token, '/api/auth/verify/')
+
+    def test_authentication_errors(self):
+        for headers in ({}, {'HTTP_AUTHORIZATION': 'Bearer nope'}):
+            sync, async_ = self.both(async_views.plan_list, '/api/workout-plans/', **headers)
+            self.assertEqual(async_.status_code, sync.status_code)
+            self.assertEqual(json.loads(async_.content), json.loads(sync.content))
+            self.assertEqual(async_['WWW-Authenticate'], sync['WWW-Authenticate'])
+
+    @override_settings(
+        CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'tokens': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'async-tokens'},
+        },
+        AUTH_TOKEN_CACHE={'CACHE_ALIAS': 'tokens'},
+    )
+    def test_shared_token_cache_is_read_off_the_event_loop(self):
+        request = self.factory.get('/api/workout-plans/', HTTP_AUTHORIZATION=f'Bearer {self.token.key}')
+        async_to_sync(async_views.plan_list)(request)
+        with mock.patch('workouts.authentication.sync_to_async', wraps=sync_to_async) as wrapped:
+            self.assertEqual(async_to_sync(async_views.plan_list)(request).status_code, 200)
+        wrapped.assert_called_once()
+
+class AvailabilityIndexTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('swimmer', 'swimmer@example.com', 'password123')
+        self.profile = UserProfile.objects.create(user=self.user, name='Swimmer')
+        self.client.force_authenticate(self.user)
+
+    def test_profile_update_rebuilds_slots(self):
+        url = f'/api/user-profile/{self.profile.id}/'
+        response = self.client.patch(url, {'availability': {'Tuesday': ['18:00-19:00', '18:30-20:00']}}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(self.profile.availability_slots.values_list('weekday', 'start_minute', 'end_minute')),
+                         [(1, 1080, 1200)])
+        self.assertEqual(list(profiles_free_at(1, 18 * 60 + 45)), [self.profile])
+        self.assertFalse(profiles_free_at(1, 20 * 60).exists())
+
+        self.client.patch(url, {'availability': {'wed': ['06:00-07:00']}}, format='json')
+        self.assertFalse(profiles_free_at(1, 18 * 60 + 45).exists())
+        self.assertEqual(list(profiles_free_at(2, 6 * 60)), [self.profile])
+
+        response = self.client.patch(url, {'availability': {'Tuesday': ['19:00-18:00']}}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_overlap_check(self):
+        mine = slot_mask(parse_availability({'mon': ['18:00-19:00'], 'fri': ['07:00-08:00']}))
+        theirs = slot_mask(parse_availability({'Monday': ['18:30-20:00']}))
+        self.assertEqual(overlapping_slots(mine, theirs), [(0, 18 * 60 + 30)])
+
+
+class FatigueSeriesTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('rower', 'rower@example.com', 'password123')
+        self.profile = UserProfile.objects.create(user=self.user, name='Rower')
+        self.client.force_authenticate(self.user)
+
+    def test_append_and_rolling_average(self):
+        today = datetime.date.today()
+        FatigueEntry.objects.bulk_create([
+            FatigueEntry(user_profile=self.profile, date=today - datetime.timedelta(days=days), level=2)
+            for days in range(7, 40)
+        ])
+        self.assertEqual(self.client.post('/api/fatigue/', {'level': 6}, format='json').status_code, 201)
+        self.client.post('/api/fatigue/', {'level': 9, 'date': (today - datetime.timedelta(days=1)).isoformat()},
+                         format='json')
+        self.assertEqual(self.client.post('/api/fatigue/', {'level': 11}, format='json').status_code, 400)
+
+        fatigue = self.client.get('/api/user-profile/').data['fatigue']
+        self.assertEqual(fatigue['latest_level'], 6)
+        self.assertEqual((fatigue['window_average'], fatigue['window_count']), (7.5, 2))
+
+        since = (today - datetime.timedelta(days=8)).isoformat()
+        response = self.client.get('/api/fatigue/', {'date_from': since})
+        self.assertEqual([entry['level'] for entry in response.data['results']], [2, 2, 9, 6])
+
+
+class WeeklySummaryTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('lifter', 'lifter@example.com', 'password123')
+        self.profile = UserProfile.objects.create(
+            user=self.user, name='Lifter', availability={'Monday': ['18:00-19:00'], 'Friday': ['07:00-08:00']},
+        )
+        self.today = datetime.date.today()
+        self.plan, _ = generate_workout_plan(self.profile, weeks=4, start_date=self.today - datetime.timedelta(weeks=1))
+        self.client.force_authenticate(self.user)
+
+    def summaries(self):
+        return list(WeeklySummary.objects.filter(user_profile=self.profile).exclude(
+            planned=0, completed=0, missed=0, rescheduled=0
+        ).order_by('week_start').values_list(
+            'week_start', 'planned', 'completed', 'missed', 'rescheduled', 'volume', 'completed_volume'
+        ))
+
+    def assert_matches_rebuild(self):
+        incremental = self.summaries()
+        rebuild_weekly_summaries([self.profile.id])
+        self.assertEqual(incremental, self.summaries())
+
+    def test_summaries_follow_every_session_change(self):
+        self.assert_matches_rebuild()
+        first, second, third = self.plan.sessions.all()[:3]
+        self.client.post(f'/api/workout-sessions/{first.id}/update_status/', {'status': 'completed'})
+        self.client.post('/api/workout-sessions/bulk_update_status/', [
+            {'id': second.id, 'status': 'missed'}, {'id': third.id, 'status': 'rescheduled'},
+        ], format='json')
+        self.assert_matches_rebuild()
+
+        self.profile.availability = {'Wednesday': ['18:00-19:00']}
+        self.profile.save()
+        regenerate_workout_plan(self.plan, today=self.today)
+        self.assert_matches_rebuild()
+
+        self.client.delete(f'/api/workout-plans/{self.plan.id}/')
+        self.assertEqual(self.summaries(), [])
+
+    # The racing update runs inside the request, so its queries would be reported against the route's budget
+    @override_settings(QUERY_BUDGET_MODE='off')
+    def test_a_concurrent_change_after_the_view_loaded_the_session(self):
+        session = self.plan.sessions.all()[0]
+        get_object = WorkoutSessionViewSet.get_object
+
+        def get_object_then_race(view):
+            instance = get_object(view)
+            # Another request completes the session before this one writes
+            update_session_statuses(WorkoutSession.objects.all(), [{'id': session.id, 'status': 'completed'}])
+            return instance
+
+        with mock.patch.object(WorkoutSessionViewSet, 'get_object', get_object_then_race):
+            response = self.client.patch(f'/api/workout-sessions/{session.id}/', {'notes': 'Stale'}, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assert_matches_rebuild()
+            self.assertEqual(self.client.delete(f'/api/workout-sessions/{session.id}/').status_code, 204)
+            self.assert_matches_rebuild()
+
+    def test_update_status_errors(self):
+        session = self.plan.sessions.all()[0]
+        url = f'/api/workout-sessions/{session.id}/update_status/'
+        self.assertEqual(self.client.post(url, {'status': 'skipped'}).status_code, 400)
+        self.assertEqual(self.client.post('/api/workout-sessions/abc/update_status/', {'status': 'missed'}).status_code, 404)
+        other = User.objects.create_user('other', 'other@example.com', 'password123')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.post(url, {'status': 'missed'}).status_code, 404)
+        self.assertEqual(WorkoutSession.objects.get(id=session.id).status, 'planned')
+
+    def test_weekly_endpoint(self):
+        session = self.plan.sessions.all()[0]
+        self.client.post(f'/api/workout-sessions/{session.id}/update_status/', {'status': 'completed'})
+        week = session.date - datetime.timedelta(days=session.date.weekday())
+        response = self.client.get('/api/stats/weekly/', {'date_from': session.date.isoformat()})
+        self.assertEqual(response.data[0]['week_start'], week.isoformat())
+        self.assertEqual(response.data[0]['completed'], 1)
+        self.assertEqual(response.data[0]['completed_volume'], session_volume(session.exercises))
+        self.assertEqual(response.data[0]['completion_rate'], 1.0)
+        self.assertEqual(self.client.get(f'/api/stats/weekly/{week.isoformat()}/').data['completed'], 1)
+        self.assertEqual(self.client.get('/api/stats/weekly/2025-13-45/').status_code, 404)
+
+
+class ExerciseCatalogTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('climber', 'climber@example.com', 'password123')
+        self.profile = UserProfile.objects.create(
+            user=self.user, name='Climber', availability={'Monday': ['18:00-19:00']},
+            equipment=['Dumbbells', 'Pull-up Bar'],
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_plans_use_the_profiles_equipment(self):
+        plan, _ = generate_workout_plan(self.profile, weeks=1, start_date=datetime.date(2025, 3, 3))
+        session = plan.sessions.all()[0]
+        # Stored compactly, expanded on the way out
+        self.assertNotIn('name', session.exercises[0])
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/workout-sessions/{session.id}/')
+        names = [exercise['name'] for exercise in response.data['exercises']]
+        self.assertEqual(names, ['Goblet Squat', 'Dumbbell Shoulder Press', 'Pull-up', 'Dumbbell Romanian Deadlift',
+                                 'Hanging Knee Raise'])
+
+    def test_available_filter(self):
+        response = self.client.get('/api/exercises/', {'available': '1', 'category': 'push'})
+        self.assertEqual([exercise['slug'] for exercise in response.data], ['dumbbell-shoulder-press', 'push-up'])
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'catalog': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'catalog'},
+})
+class CatalogRefreshTests(APITestCase):
+    def setUp(self):
+        patcher = mock.patch.object(catalog, '_catalog', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        caches['catalog'].clear()
+        self.exercise = Exercise.objects.get(slug='push-up')
+
+    def rename_elsewhere(self, name):
+        # What a save in another process looks like from here: no signal, only the shared generation moves
+        Exercise.objects.filter(id=self.exercise.id).update(name=name)
+        caches['catalog'].set(catalog.GENERATION_KEY, 'elsewhere', None)
+
+    def expire(self):
+        get_catalog().checked_at -= catalog.catalog_settings()['TTL'] + 1
+
+    def name(self):
+        return get_catalog().by_id[self.exercise.id].name
+
+    @override_settings(EXERCISE_CATALOG={'CACHE_ALIAS': 'catalog'})
+    def test_changes_elsewhere_are_seen_through_the_shared_generation(self):
+        self.assertEqual(self.name(), 'Push-up')
+        self.rename_elsewhere('Press-up')
+        # Trusted until the TTL runs out
+        self.assertEqual(self.name(), 'Push-up')
+        self.expire()
+        self.assertEqual(self.name(), 'Press-up')
+
+        # An unchanged generation keeps the copy without touching the table
+        loaded = get_catalog()
+        self.expire()
+        with self.assertNumQueries(0):
+            self.assertIs(get_catalog(), loaded)
+
+    def test_without_a_shared_cache_the_catalog_is_reloaded_after_the_ttl(self):
+        self.assertEqual(self.name(), 'Push-up')
+        Exercise.objects.filter(id=self.exercise.id).update(name='Press-up')
+        self.assertEqual(self.name(), 'Push-up')
+        self.expire()
+        self.assertEqual(self.name(), 'Press-up')
+
+    @override_settings(EXERCISE_CATALOG={'CACHE_ALIAS': 'catalog'})
+    def test_saves_bump_the_shared_generation_on_commit(self):
+        get_catalog()
+        generation = caches['catalog'].get(catalog.GENERATION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.exercise.name = 'Press-up'
+            self.exercise.save()
+            self.assertEqual(caches['catalog'].get(catalog.GENERATION_KEY), generation)
+        self.assertNotEqual(caches['catalog'].get(catalog.GENERATION_KEY), generation)
+        self.assertEqual(self.name(), 'Press-up')
+
+    def test_catalog_changes_move_session_and_plan_etags(self):
+        user = User.objects.create_user('rower', 'rower@example.com', 'password123')
+        profile = UserProfile.objects.create(user=user, name='Rower', availability={'Monday': ['18:00-19:00']})
+        plan, _ = generate_workout_plan(profile, weeks=1, start_date=datetime.date(2025, 3, 3))
+        self.client.force_authenticate(user)
+        for url in ('/api/workout-sessions/', '/api/workout-plans/', f'/api/workout-plans/{plan.id}/'):
+            etag = self.client.get(url)['ETag']
+            Exercise.objects.filter(id=self.exercise.id).update(name=f'Push-up {url}')
+            self.expire()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertIn(f'Push-up {url}', response.content.decode())
+
+
+class RequestMetricsTests(APITestCase):
+    def test_metrics_count_queries_per_route(self):
+        user = User.objects.create_user('walker', 'walker@example.com', 'password123')
+        profile = UserProfile.objects.create(user=user, name='Walker', availability={'Monday': ['18:00-19:00']})
+        plan, _ = generate_workout_plan(profile, weeks=2, start_date=datetime.date(2025, 3, 3))
+        self.client.force_authenticate(user)
+        registry.reset()
+
+        self.client.get(f'/api/workout-plans/{plan.id}/')
+        with self.settings(DEBUG=True):
+            body = self.client.get('/metrics').content.decode()
+        self.assertIn('http_requests_total{route="workout-plans-detail",method="GET",status="200"} 1', body)
+        self.assertIn('http_request_db_queries_sum{route="workout-plans-detail",method="GET"} 3', body)
+        self.assertIn('http_response_render_duration_seconds_count{route="workout-plans-detail",method="GET"} 1',
+                      body)
+        serialized = re.search(
+            r'http_response_serialize_duration_seconds_sum\{route="workout-plans-detail",method="GET"\} (\S+)', body
+        )
+        self.assertGreater(float(serialized.group(1)), 0)
+
+    def test_streamed_bodies_are_charged_to_the_request(self):
+        user = User.objects.create_user('walker', 'walker@example.com', 'password123')
+        profile = UserProfile.objects.create(user=user, name='Walker', availability={'Monday': ['18:00-19:00']})
+        generate_workout_plan(profile, weeks=4, start_date=datetime.date(2025, 3, 3))
+        self.client.force_authenticate(user)
+        registry.reset()
+
+        with mock.patch.object(WorkoutSessionViewSet, 'export_chunk_size', 1), \
+                CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/workout-sessions/export/')
+            # Nothing is recorded until the body has been sent
+            self.assertNotIn('workout-sessions-export', registry.render())
+            b''.join(response.streaming_content)
+        queries = len(context.captured_queries)
+        self.assertGreater(queries, 0)
+        with self.settings(DEBUG=True):
+            body = self.client.get('/metrics').content.decode()
+        self.assertIn(f'http_request_db_queries_sum{{route="workout-sessions-export",method="GET"}} {queries}', body)
+        self.assertIn('http_response_serialize_duration_seconds_count{route="workout-sessions-export",method="GET"} 1',
+                      body)
+
+    def test_metrics_are_not_public_by_default(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with self.settings(REQUEST_METRICS={'ALLOWED_ADDRESSES': ['127.0.0.1']}):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+        with self.settings(REQUEST_METRICS={'TOKEN': 'scrape'}, DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer nope').status_code, 401)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape').status_code, 200)
+
+
+@mock.patch('workouts.routers.replica_aliases', lambda: ['replica1'])
+class ReadReplicaRoutingTests(APITestCase):
+    def setUp(self):
+        self.pins = caches[settings.REPLICA_PIN_CACHE_ALIAS]
+        self.pins.clear()
+        token_cache.clear()
+        self.factory = RequestFactory()
+        # Records where a read made while serving the request would go
+        self.middleware = ReadReplicaMiddleware(lambda request: ReadReplicaRouter().db_for_read(User))
+
+    def tearDown(self):
+        self.pins.clear()
+        token_cache.clear()
+
+    def test_only_safe_requests_read_from_replicas(self):
+        self.assertEqual(self.middleware(self.factory.get('/api/user-profile/')), 'replica1')
+        self.assertIsNone(self.middleware(self.factory.post('/api/workout-plans/')))
+        self.assertIsNone(ReadReplicaRouter().db_for_read(User))
+        self.assertEqual(ReadReplicaRouter().db_for_write(User), 'default')
+
+    def write(self, token):
+        request = self.factory.patch('/api/user-profile/1/')
+        # As DRF leaves it once the view has authenticated the token
+        request.user = token.user if token is not None else AnonymousUser()
+        return request
+
+    def test_writer_reads_its_own_writes(self):
+        writer = Token.objects.create(user=User.objects.create_user('writer', 'writer@example.com', 'password123'))
+        other = Token.objects.create(user=User.objects.create_user('other', 'other@example.com', 'password123'))
+        self.middleware(self.write(writer))
+        # The pin belongs to the user, wherever their next request comes from
+        self.assertIsNone(self.middleware(self.factory.get(
+            '/api/user-profile/', HTTP_AUTHORIZATION=f'Bearer {writer.key}', REMOTE_ADDR='10.0.0.2',
+        )))
+        self.assertEqual(self.middleware(self.factory.get(
+            '/api/user-profile/', HTTP_AUTHORIZATION=f'Token {other.key}', REMOTE_ADDR='127.0.0.1',
+        )), 'replica1')
+        # Anonymous and failed writes pin nobody
+        self.middleware(self.factory.post('/api/auth/login/'))
+        self.middleware(self.write(None))
+        self.assertEqual(self.middleware(self.factory.get('/api/user-profile/')), 'replica1')
+
+        # Pins are in the shared cache, so every process sees them, and expire with it
+        self.assertTrue(replica_pins.is_pinned(writer.user_id))
+        self.pins.clear()
+        self.assertEqual(self.middleware(self.factory.get(
+            '/api/user-profile/', HTTP_AUTHORIZATION=f'Token {writer.key}',
+        )), 'replica1')
+
+    def test_async_writer_reads_its_own_writes(self):
+        writer = Token.objects.create(user=User.objects.create_user('writer', 'writer@example.com', 'password123'))
+        headers = {'HTTP_AUTHORIZATION': f'Token {writer.key}'}
+
+        async def view(request):
+            return ReadReplicaRouter().db_for_read(User)
+
+        middleware = ReadReplicaMiddleware(view)
+        self.assertEqual(async_to_sync(middleware)(self.factory.get('/api/user-profile/', **headers)), 'replica1')
+        async_to_sync(middleware)(self.write(writer))
+        self.assertIsNone(async_to_sync(middleware)(self.factory.get('/api/user-profile/', **headers)))
+
+
+CHECK_ROUTE_TIMES = os.environ.get('BUDGET_CHECK_TIMES') == '1'
+
+
+# Queries are counted on 'default', so keep reads there when DB_REPLICAS is set
+@override_settings(DATABASE_ROUTERS=[], QUERY_BUDGET_MODE='raise')
+class RouteBudgetTests(APITestCase):
+    """Every route in workouts/urls.py stays within its budget in workouts/budgets.py"""
+
+    @classmethod
+    def setUpTestData(cls):
+        today = datetime.date.today()
+        availability = {day: ['18:00-19:00'] for day in ('Monday', 'Wednesday', 'Friday', 'Saturday')}
+        # Other users' rows, so nothing passes by scanning a near-empty table
+        for i in range(10):
+            other = User.objects.create_user(f'other{i}', f'other{i}@example.com', 'password123')
+            generate_workout_plan(UserProfile.objects.create(user=other, name=other.username, availability=availability),
+                                  weeks=12)
+
+        cls.user = User.objects.create_user('budget', 'budget@example.com', 'password123')
+        cls.profile = UserProfile.objects.create(
+            user=cls.user, name='Budget', availability=availability, equipment=['Dumbbells'],
+        )
+        cls.plans = [
+            generate_workout_plan(cls.profile, weeks=12, start_date=today - datetime.timedelta(weeks=6 * i))[0]
+            for i in range(5)
+        ]
+        FatigueEntry.objects.bulk_create([
+            FatigueEntry(user_profile=cls.profile, date=today - datetime.timedelta(days=days), level=5)
+            for days in range(180)
+        ])
+        cls.job = Job.objects.create(user_profile=cls.profile, kind='generate_plan', params={'weeks': 4})
+        cls.token = Token.objects.create(user=cls.user)
+
+    def cases(self):
+        plan = self.plans[0]
+        sessions = list(plan.sessions.all())
+        today = datetime.date.today()
+        week = today - datetime.timedelta(days=today.weekday())
+        return [
+            ('GET', '/api/', None),
+            ('GET', '/api/user-profile/', None),
+            ('GET', f'/api/user-profile/{self.profile.id}/', None),
+            ('PATCH', f'/api/user-profile/{self.profile.id}/', {'availability': {'Tuesday': ['06:00-07:00']}}),
+            ('GET', '/api/workout-plans/', None),
+            ('POST', '/api/workout-plans/', {'weeks': 4}),
+            ('GET', f'/api/workout-plans/{plan.id}/', None),
+            ('POST', f'/api/workout-plans/{plan.id}/regenerate/', None),
+            ('GET', '/api/workout-sessions/', None),
+            ('GET', f'/api/workout-sessions/{sessions[0].id}/', None),
+            ('PATCH', f'/api/workout-sessions/{sessions[0].id}/', {'notes': 'Felt strong'}),
+            ('POST', f'/api/workout-sessions/{sessions[1].id}/update_status/', {'status': 'completed'}),
+            ('POST', '/api/workout-sessions/bulk_update_status/',
+             [{'id': session.id, 'status': 'missed'} for session in sessions[2:40]]),
+            ('GET', '/api/workout-sessions/export/', None),
+            ('DELETE', f'/api/workout-sessions/{sessions[45].id}/', None),
+            ('GET', '/api/jobs/', None),
+            ('GET', f'/api/jobs/{self.job.id}/', None),
+            ('GET', '/api/fatigue/', None),
+            ('POST', '/api/fatigue/', {'level': 4}),
+            ('GET', '/api/stats/weekly/', None),
+            ('GET', f'/api/stats/weekly/{week.isoformat()}/', None),
+            ('GET', '/api/exercises/', None),
+            ('GET', '/api/exercises/1/', None),
+            ('GET', '/api/auth/verify/', None),
+            ('GET', '/api/sync/', None),
+            ('DELETE', f'/api/workout-plans/{self.plans[4].id}/', None),
+            ('POST', '/api/auth/login/', {'email': 'budget@example.com', 'password': 'password123'}),
+            ('POST', '/api/auth/register/', {'email': 'new@example.com', 'username': 'newbie', 'password': 'password123'}),
+            ('POST', '/api/auth/logout/', None),
+        ]
+
+    def test_only_query_counts_fail_requests(self):
+        budget = ROUTE_BUDGETS[('sync', 'GET')]
+        with self.assertLogs('workouts.budgets', 'WARNING'):
+            check_budget('sync', 'GET', budget.queries, budget.ms / 1000 + 1)
+        with self.assertRaises(BudgetExceeded):
+            check_budget('sync', 'GET', budget.queries + 1, 0)
+
+    def test_every_route_has_a_budget(self):
+        names = set()
+        for pattern in urls.urlpatterns:
+            for entry in pattern.url_patterns if isinstance(pattern, URLResolver) else [pattern]:
+                names.add(entry.name)
+        self.assertEqual(names, {name for name, _ in ROUTE_BUDGETS})
+
+    def test_routes_stay_within_budget(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        covered = set()
+        for method, url, data in self.cases():
+            with self.subTest(method=method, url=url):
+                # Budgets assume a cold token cache and a catalog that is not due a refresh
+                token_cache.clear()
+                get_catalog()
+                with CaptureQueriesContext(connection) as context:
+                    started = time.perf_counter()
+                    response = getattr(self.client, method.lower())(url, data, format='json')
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                    elapsed = (time.perf_counter() - started) * 1000
+                self.assertLess(response.status_code, 300)
+                budget = ROUTE_BUDGETS[(response.resolver_match.url_name, method)]
+                self.assertLessEqual(len(context.captured_queries), budget.queries)
+                # Timings depend on the machine, so they are only checked on request
+                if CHECK_ROUTE_TIMES:
+                    self.assertLessEqual(elapsed, budget.ms)
+                covered.add((response.resolver_match.url_name, method))
+            if url == '/api/auth/login/':
+                self.client.credentials(HTTP_AUTHORIZATION=f'Token {response.data["token"]}')
+        self.assertEqual(covered, set(ROUTE_BUDGETS))
+
+
+class MockBackendRouteTests(SimpleTestCase):
+    """mock_backend.py serves the same routes and methods as workouts/urls.py"""
+
+    SAMPLES = {'pk': '1', 'week_start': '2025-01-06'}
+    # The mock keeps exactly one profile per user for the life of the account
+    NOT_MOCKED = {('user-profile/1/', 'DELETE')}
+
+    def sample_path(self, pattern):
+        path = re.sub(r'\(\?P<(\w+)>[^)]*\)', lambda match: self.SAMPLES[match.group(1)], pattern)
+        return path.lstrip('^').rstrip('$').replace('\\', '')
+
+    def drf_routes(self, patterns, prefix=''):
+        routes = set()
+        for pattern in patterns:
+            regex = prefix + str(pattern.pattern)
+            if isinstance(pattern, URLResolver):
+                routes |= self.drf_routes(pattern.url_patterns, regex)
+                continue
+            if 'format' in regex:
+                continue
+            callback = pattern.callback
+            if hasattr(callback, 'actions'):
+                methods = {method.upper() for method in callback.actions}
+            else:
+                methods = set(callback.cls().allowed_methods)
+            # Derived from GET by Django, and not served by the mock
+            methods -= {'HEAD', 'OPTIONS'}
+            path = self.sample_path(regex.replace('^', ''))
+            routes |= {(path, method) for method in methods}
+        return routes
+
+    def test_mock_routes_match_the_router(self):
+        import mock_backend
+
+        mock_routes = set()
+        for pattern, methods in mock_backend.MockAPI(None).routes:
+            path = self.sample_path(pattern.pattern)[len('/api/'):]
+            mock_routes |= {(path, method) for method in methods}
+        self.assertEqual(mock_routes, self.drf_routes(urls.urlpatterns) - self.NOT_MOCKED)
+
+    def test_mock_accepts_the_frontends_bearer_header(self):
+        import mock_backend
+
+        store = mock_backend.MockStore()
+        key = store.token_for(store.create_user('mock@example.com', 'mock', 'password123'))
+        api = mock_backend.MockAPI(store)
+
+        def get(path, authorization=None):
+            handler = SimpleNamespace(path=path, headers={'Authorization': authorization} if authorization else {})
+            try:
+                return api.dispatch(mock_backend.Request(handler, 'GET', b'')).status
+            except mock_backend.HttpError as exc:
+                return exc.status
+
+        for keyword in ('Bearer', 'Token'):
+            self.assertEqual(get('/api/auth/verify/', f'{keyword} {key}'), 200)
+        self.assertEqual(get('/api/auth/verify/', 'Bearer nope'), 401)
+        self.assertEqual(get('/api/auth/verify/', f'Basic {key}'), 401)
+        self.assertEqual(get('/api/auth/verify/'), 401)
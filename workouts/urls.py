@@ -1,16 +1,41 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import UserProfileViewSet, WorkoutPlanViewSet, WorkoutSessionViewSet
-from .auth_views import login_view, register_view, verify_token_view
+from .views import (
+    ExerciseViewSet, FatigueEntryViewSet, JobViewSet, UserProfileViewSet, WeeklySummaryViewSet, WorkoutPlanViewSet,
+    WorkoutSessionViewSet,
+)
+from .sync_views import sync_view
+from .auth_views import login_view, logout_view, register_view, verify_token_view
 
 router = DefaultRouter()
 router.register(r'user-profile', UserProfileViewSet, basename='user-profile')
 router.register(r'workout-plans', WorkoutPlanViewSet, basename='workout-plans')
 router.register(r'workout-sessions', WorkoutSessionViewSet, basename='workout-sessions')
+router.register(r'jobs', JobViewSet, basename='jobs')
+router.register(r'fatigue', FatigueEntryViewSet, basename='fatigue')
+router.register(r'stats/weekly', WeeklySummaryViewSet, basename='weekly-stats')
+router.register(r'exercises', ExerciseViewSet, basename='exercises')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('auth/login/', login_view, name='login'),
     path('auth/register/', register_view, name='register'),
     path('auth/verify/', verify_token_view, name='verify-token'),
+    path('auth/logout/', logout_view, name='logout'),
+    path('sync/', sync_view, name='sync'),
 ]
+
+if settings.ASYNC_API_VIEWS:
+    from .async_views import get_or_sync, plan_list, profile_detail, session_list, verify_token
+
+    # Serve the hot GET routes natively under ASGI; listed first so they win
+    urlpatterns = [
+        path('user-profile/', get_or_sync(profile_detail, UserProfileViewSet.as_view({'get': 'list', 'post': 'create'})),
+             name='user-profile-list'),
+        path('workout-plans/', get_or_sync(plan_list, WorkoutPlanViewSet.as_view({'get': 'list', 'post': 'create'})),
+             name='workout-plans-list'),
+        path('workout-sessions/', get_or_sync(session_list, WorkoutSessionViewSet.as_view({'get': 'list', 'post': 'create'})),
+             name='workout-sessions-list'),
+        path('auth/verify/', get_or_sync(verify_token, verify_token_view), name='verify-token'),
+    ] + urlpatterns
@@ -1,12 +1,99 @@
-from rest_framework import viewsets, status
+import csv
+import json
+from rest_framework import generics, mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Max, Prefetch
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from .models import UserProfile, WorkoutPlan, WorkoutSession
-from .serializers import UserProfileSerializer, WorkoutPlanSerializer, WorkoutSessionSerializer
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .availability import sync_availability_slots
+from .catalog import catalog_version, get_catalog
+from .conditional import ConditionalGetMixin
+from .fatigue import with_fatigue_summary
+from .jobs import enqueue
+from .models import (
+    FatigueEntry, Job, UserProfile, WeeklySummary, WorkoutPlan, WorkoutSession, profile_change_stamp,
+)
+from .pagination import FatigueEntryCursorPagination, WorkoutSessionCursorPagination
+from .renderers import FastJSONRenderer
+from .serializers import ExerciseSerializer, FatigueEntrySerializer, JobSerializer, UserProfileSerializer, WeeklySummarySerializer, WorkoutPlanSerializer, WorkoutSessionSerializer
+from .services import update_session_statuses
+from .signals import batched_tombstones
+from .stats import SummaryDelta, week_start
 
-class UserProfileViewSet(viewsets.ModelViewSet):
+class ProfileScopedMixin:
+    """Filter on the caller's profile id so queries hit the user_profile indexes directly"""
+
+    def get_profile_id(self):
+        try:
+            # user.profile is cached on the user instance after the first access
+            return self.request.user.profile.id
+        except UserProfile.DoesNotExist:
+            return None
+
+def plan_queryset(profile_id):
+    """A profile's plans with their sessions prefetched in date order"""
+    sessions = WorkoutSession.objects.order_by('date', 'id')
+    return WorkoutPlan.objects.filter(user_profile_id=profile_id).prefetch_related(
+        Prefetch('sessions', queryset=sessions)
+    )
+
+def parse_date_param(params, param):
+    """The date in query parameter ``param``, or None when it is absent"""
+    value = params.get(param)
+    if not value:
+        return None
+    try:
+        date = parse_date(value)
+    except ValueError:
+        date = None
+    if date is None:
+        raise ValidationError({param: 'Expected a date in YYYY-MM-DD format.'})
+    return date
+
+def filter_date_range(queryset, params):
+    """Narrow ``queryset`` by the date_from and date_to query parameters (inclusive)"""
+    for param, lookup in (('date_from', 'date__gte'), ('date_to', 'date__lte')):
+        date = parse_date_param(params, param)
+        if date is not None:
+            queryset = queryset.filter(**{lookup: date})
+    return queryset
+
+def session_queryset(profile_id, params):
+    """A profile's sessions narrowed by the date_from, date_to, status and plan query parameters"""
+    queryset = filter_date_range(WorkoutSession.objects.filter(user_profile_id=profile_id), params)
+
+    status_val = params.get('status')
+    if status_val:
+        if status_val not in dict(WorkoutSession.STATUS_CHOICES):
+            raise ValidationError({'status': 'Invalid status'})
+        queryset = queryset.filter(status=status_val)
+
+    plan_val = params.get('plan')
+    if plan_val:
+        if not plan_val.isdigit():
+            raise ValidationError({'plan': 'Invalid plan'})
+        queryset = queryset.filter(plan_id=int(plan_val))
+    return queryset
+
+def job_accepted(request, job):
+    """202 response pointing the client at the job's status URL"""
+    data = JobSerializer(job).data
+    data['url'] = request.build_absolute_uri(f'/api/jobs/{job.id}/')
+    return Response(data, status=status.HTTP_202_ACCEPTED, headers={'Location': data['url']})
+
+class Echo:
+    """File-like object whose write() hands the value back, for streaming csv.writer output"""
+
+    def write(self, value):
+        return value
+
+class UserProfileViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = UserProfileSerializer
     permission_classes = [IsAuthenticated]
 
@@ -14,53 +101,295 @@ class UserProfileViewSet(viewsets.ModelViewSet):
         return UserProfile.objects.filter(user=self.request.user)
 
     def get_object(self):
-        return get_object_or_404(UserProfile, user=self.request.user)
+        profiles = with_fatigue_summary(UserProfile.objects.select_related('user'))
+        return get_object_or_404(profiles, user=self.request.user)
 
     def list(self, request, *args, **kwargs):
         # Return the user's profile
-        profile = self.get_object()
-        serializer = self.get_serializer(profile)
-        return Response(serializer.data)
+        def build_response():
+            profile = self.get_object()
+            serializer = self.get_serializer(profile)
+            return Response(serializer.data)
+        return self.conditional_response(request, None, build_response)
+
+    def get_conditional_state(self, queryset):
+        # Every route on this viewset shows the caller's own profile
+        user = self.request.user
+        updated_at = UserProfile.objects.filter(user=user).values_list('updated_at', flat=True).first()
+        return self.profile_state(user, updated_at)
+
+    @staticmethod
+    def profile_state(user, updated_at):
+        if updated_at is None:
+            return None, None
+        # The fatigue window moves with the date, so the tag does too
+        return updated_at, '|'.join([
+            updated_at.isoformat(), timezone.localdate().isoformat(),
+            user.username, user.email, user.first_name, user.last_name,
+        ])
 
     def update(self, request, *args, **kwargs):
         profile = self.get_object()
         serializer = self.get_serializer(profile, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
+                if 'availability' in serializer.validated_data:
+                    sync_availability_slots([profile])
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class WorkoutPlanViewSet(viewsets.ModelViewSet):
+class WorkoutPlanViewSet(ProfileScopedMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = WorkoutPlanSerializer
     permission_classes = [IsAuthenticated]
 
+    # Plans embed their sessions, so session edits must change the tag too
+    conditional_aggregates = {
+        'plan_last': Max('last_updated'),
+        'plan_count': Count('id', distinct=True),
+        'session_last': Max('sessions__updated_at'),
+        'session_count': Count('sessions', distinct=True),
+    }
+
     def get_queryset(self):
-        return WorkoutPlan.objects.filter(user_profile__user=self.request.user)
+        if self.action == 'destroy':
+            # Nothing is serialized, so skip prefetching the sessions
+            return WorkoutPlan.objects.filter(user_profile_id=self.get_profile_id())
+        return plan_queryset(self.get_profile_id())
+
+    @staticmethod
+    def conditional_state_from(state):
+        last_modified = max(filter(None, [state['plan_last'], state['session_last']]), default=None)
+        # Session exercises are expanded from the catalog, so its changes count too
+        return last_modified, '|'.join([*(str(value) for value in state.values()), catalog_version()])
+
+    def create(self, request, *args, **kwargs):
+        # Plans are generated from the user's profile rather than posted by hand
+        profile = get_object_or_404(UserProfile, user=request.user)
+        try:
+            weeks = int(request.data.get('weeks', 4))
+        except (TypeError, ValueError):
+            weeks = 0
+        if not 1 <= weeks <= 52:
+            return Response({'error': 'Invalid weeks'}, status=status.HTTP_400_BAD_REQUEST)
+        job = enqueue(profile, 'generate_plan', weeks=weeks)
+        return job_accepted(request, job)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        delta = SummaryDelta()
+        for row in instance.sessions.values_list('user_profile_id', 'date', 'status', 'exercises'):
+            delta.remove(*row)
+        with batched_tombstones():
+            instance.delete()
+        delta.apply()
 
     @action(detail=True, methods=['post'])
     def regenerate(self, request, pk=None):
-        plan = self.get_object()
-        # TODO: Implement workout plan generation logic
-        serializer = WorkoutPlanSerializer(plan)
-        return Response(serializer.data)
+        # Only check ownership here; the job loads the plan and its sessions
+        plan = get_object_or_404(WorkoutPlan.objects.select_related('user_profile'), pk=pk, user_profile_id=self.get_profile_id())
+        job = enqueue(plan.user_profile, 'regenerate_plan', plan_id=plan.id)
+        return job_accepted(request, job)
     
-class WorkoutSessionViewSet(viewsets.ModelViewSet):
+class WorkoutSessionViewSet(ProfileScopedMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = WorkoutSessionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = WorkoutSessionCursorPagination
+    # Rows fetched per database round trip when streaming an export
+    export_chunk_size = 2000
+    max_bulk_updates = 500
+
+    conditional_aggregates = {'last': Max('updated_at'), 'count': Count('id')}
 
     def get_queryset(self):
-        return WorkoutSession.objects.filter(user_profile__user=self.request.user)
+        return session_queryset(self.get_profile_id(), self.request.query_params)
+
+    @staticmethod
+    def conditional_state_from(state):
+        # Exercises are expanded from the catalog, so its changes count too
+        return state['last'], f"{state['last']}|{state['count']}|{catalog_version()}"
+
+    # Keep the weekly summaries in step with hand-made session changes. What a
+    # session contributed is read from the row locked inside the transaction:
+    # the instance DRF loaded earlier may already be out of date.
+    @staticmethod
+    def locked_contribution(session_id):
+        return WorkoutSession.objects.select_for_update().filter(id=session_id).values_list(
+            'user_profile_id', 'date', 'status', 'exercises'
+        )
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        delta = SummaryDelta()
+        delta.add_session(serializer.save())
+        delta.apply()
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        delta = SummaryDelta()
+        for row in self.locked_contribution(serializer.instance.id):
+            delta.remove(*row)
+        delta.add_session(serializer.save())
+        delta.apply()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        delta = SummaryDelta()
+        for row in self.locked_contribution(instance.id):
+            delta.remove(*row)
+        instance.delete()
+        delta.apply()
 
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
-        session = self.get_object()
         status_val = request.data.get('status')
         notes = request.data.get('notes', '')
-        
-        if status_val in dict(WorkoutSession.STATUS_CHOICES):
+
+        with transaction.atomic():
+            # Read and lock the row here so the summary delta starts from its committed state
+            session = generics.get_object_or_404(self.get_queryset().select_for_update(), pk=pk)
+            if status_val not in dict(WorkoutSession.STATUS_CHOICES):
+                return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
+            delta = SummaryDelta()
+            delta.add_session(session, sign=-1)
             session.status = status_val
             if notes:
                 session.notes = notes
-            session.save()
-            return Response({'status': 'updated'})
-        return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+            delta.add_session(session)
+            # Leave the exercises JSON and the other columns alone
+            session.save(update_fields=['status', 'notes', 'updated_at'])
+            delta.apply()
+        return Response({'status': 'updated'})
+
+    @action(detail=False, methods=['post'])
+    def bulk_update_status(self, request):
+        """Update many sessions from a list of {id, status, notes}, reporting results per item"""
+        updates = request.data
+        if not isinstance(updates, list):
+            return Response({'error': 'Expected a list of updates'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(updates) > self.max_bulk_updates:
+            return Response(
+                {'error': f'At most {self.max_bulk_updates} updates per request'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = WorkoutSession.objects.filter(user_profile_id=self.get_profile_id())
+        results = update_session_statuses(queryset, updates)
+        failed = sum(1 for result in results if 'error' in result)
+        return Response({'updated': len(results) - failed, 'failed': failed, 'results': results})
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the (filtered) session history as JSON Lines or, with ?output=csv, as CSV"""
+        output = request.query_params.get('output', 'jsonl')
+        if output not in ('jsonl', 'csv'):
+            return Response({'error': 'Invalid output'}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.get_queryset().order_by('date', 'id')
+        serializer = self.get_serializer()
+        rows = (
+            serializer.to_representation(session)
+            for session in queryset.iterator(chunk_size=self.export_chunk_size)
+        )
+        if output == 'csv':
+            content = self._csv_lines(rows, serializer.Meta.fields)
+            content_type = 'text/csv'
+        else:
+            renderer = FastJSONRenderer()
+            content = (renderer.render(row) + b'\n' for row in rows)
+            content_type = 'application/x-ndjson'
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="workout-sessions.{output}"'
+        return response
+
+    @staticmethod
+    def _csv_lines(rows, fields):
+        writer = csv.writer(Echo())
+        yield writer.writerow(fields)
+        for row in rows:
+            row['exercises'] = json.dumps(row['exercises'])
+            yield writer.writerow([row[field] for field in fields])
+
+class JobViewSet(ProfileScopedMixin, viewsets.ReadOnlyModelViewSet):
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Job.objects.filter(user_profile_id=self.get_profile_id()).order_by('-created_at')
+
+class FatigueEntryViewSet(ProfileScopedMixin, mixins.CreateModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Append-only fatigue series: POST appends an entry, GET pages through a date range"""
+    serializer_class = FatigueEntrySerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = FatigueEntryCursorPagination
+
+    def get_queryset(self):
+        return filter_date_range(
+            FatigueEntry.objects.filter(user_profile_id=self.get_profile_id()), self.request.query_params
+        )
+
+    def perform_create(self, serializer):
+        profile = get_object_or_404(UserProfile, user=self.request.user)
+        with transaction.atomic():
+            serializer.save(user_profile=profile, date=serializer.validated_data.get('date') or timezone.localdate())
+            # The profile's fatigue summary changed, so record a change of the profile
+            UserProfile.objects.filter(id=profile.id).update(updated_at=timezone.now(), **profile_change_stamp())
+
+class WeeklySummaryViewSet(ProfileScopedMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """Precomputed per-week session counts and volume, listed by week or fetched by its Monday"""
+    serializer_class = WeeklySummarySerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'week_start'
+    lookup_value_regex = r'\d{4}-\d{2}-\d{2}'
+
+    conditional_aggregates = {'last': Max('updated_at'), 'count': Count('id')}
+
+    def get_queryset(self):
+        queryset = WeeklySummary.objects.filter(user_profile_id=self.get_profile_id())
+        date_from = parse_date_param(self.request.query_params, 'date_from')
+        date_to = parse_date_param(self.request.query_params, 'date_to')
+        if date_from is not None:
+            # Include the week the range starts in
+            queryset = queryset.filter(week_start__gte=week_start(date_from))
+        if date_to is not None:
+            queryset = queryset.filter(week_start__lte=date_to)
+        return queryset.order_by('week_start')
+
+    @staticmethod
+    def conditional_state_from(state):
+        # Exercises are expanded from the catalog, so its changes count too
+        return state['last'], f"{state['last']}|{state['count']}|{catalog_version()}"
+
+class ExerciseViewSet(viewsets.ViewSet):
+    """The exercise catalog, served from memory.
+
+    ?category= narrows to one category, ?search= matches names, and
+    ?available=1 keeps only exercises the caller's equipment allows.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        catalog = get_catalog()
+        params = request.query_params
+        if params.get('available') in ('1', 'true'):
+            try:
+                equipment = request.user.profile.equipment
+            except UserProfile.DoesNotExist:
+                equipment = []
+            exercises = catalog.available(equipment)
+        else:
+            exercises = catalog.exercises
+        category = params.get('category')
+        if category:
+            exercises = [exercise for exercise in exercises if exercise.category == category]
+        search = params.get('search', '').strip().lower()
+        if search:
+            exercises = [exercise for exercise in exercises if search in exercise.name.lower()]
+        return Response(ExerciseSerializer(exercises, many=True).data)
+
+    def retrieve(self, request, pk=None):
+        try:
+            exercise = get_catalog().by_id[int(pk)]
+        except (KeyError, ValueError):
+            return Response({'error': 'Exercise not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(ExerciseSerializer(exercise).data)